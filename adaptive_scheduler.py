@@ -0,0 +1,141 @@
+import os
+import math
+import time
+import threading
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# [적응형 스캔] 종목별 "열기"(0~1)로 다시 채점할 간격을 정함
+#  - 열기 = 변동성 + RVOL + 스나이퍼 밴드(MA20 ~ +3%) 근접도 + 최근 신호 점수 (가중합)
+#  - 간격: 열기 1 -> HOT_INTERVAL(5초), 열기 0 -> COLD_INTERVAL(2분), 사이는 기하 보간
+#  - 예산: SCAN_WINDOW(30초)당 채점 종목 수 한도 -> 기본값은 예선 통과 종목 수
+#    (= 기존 30초마다 전체 스캔과 같은 캔들 요청 / CPU 양), JAVIS_SCAN_BUDGET 으로 지정 가능
+#  - 매 회차(PASS_INTERVAL)마다 밀린 정도(경과/간격) 순으로 예산만큼 고름
+#    (처음 보는 종목 -> COLD_INTERVAL 넘긴 종목 (굶주림 방지) -> 나머지는 밀린 정도 순,
+#     남는 예산은 기한 전이라도 가장 밀린 종목)
+#  - JAVIS_ADAPTIVE=0 이면 기존처럼 30초마다 전체 스캔
+# -----------------------------------------------------------------------------
+ADAPTIVE = os.getenv("JAVIS_ADAPTIVE", "1") == "1"
+SCAN_BUDGET = int(os.getenv("JAVIS_SCAN_BUDGET", "0") or 0)     # 0 = 예선 통과 종목 수
+SCAN_WINDOW = 30         # 예산 기준 구간 (초) - 기존 자동 스캔 주기
+PASS_INTERVAL = 5        # 적응형 스캔 회차 주기 (초)
+HOT_INTERVAL = 5
+COLD_INTERVAL = 120
+WEIGHTS = {'vol': 0.15, 'rvol': 0.25, 'band': 0.4, 'score': 0.2}
+VOL_HOT = 0.02           # 최근 8봉 평균 (고-저)/종가 가 이 이상이면 변동성 만점
+RVOL_HOT = 3.0           # 마지막 봉 거래량 / 직전 20봉 평균
+BAND = (1.0, 1.03)       # 스나이퍼 밴드 (MA20 대비)
+BAND_FADE = 0.05         # 밴드에서 5% 벗어나면 근접도 0
+SCORE_HALF_LIFE = 1800   # 신호 점수 반감기 (초)
+
+
+def _clip(x):
+    return 0.0 if not x > 0 else min(1.0, float(x))
+
+
+# 15분봉 df -> 열기 요소 (각 0~1)
+def features(df):
+    n = min(len(df), 21)
+    if n < 2: return {}
+    h = df['high'].to_numpy(dtype=np.float64)[-n:]
+    l = df['low'].to_numpy(dtype=np.float64)[-n:]
+    c = df['close'].to_numpy(dtype=np.float64)[-n:]
+    v = df['volume'].to_numpy(dtype=np.float64)[-n:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol = np.nanmean(((h - l) / c)[-8:])
+        avg_v = v[:-1].mean()
+        rvol = v[-1] / avg_v if avg_v > 0 else 0.0
+        ma20 = c[-20:].mean()
+        r = c[-1] / ma20 if ma20 > 0 else 0.0
+    dist = BAND[0] - r if r < BAND[0] else (r - BAND[1] if r > BAND[1] else 0.0)
+    return {'vol': _clip(vol / VOL_HOT), 'rvol': _clip((rvol - 1) / (RVOL_HOT - 1)),
+            'band': _clip(1 - dist / BAND_FADE)}
+
+
+class AdaptiveScanScheduler:
+    def __init__(self, hot=HOT_INTERVAL, cold=COLD_INTERVAL, window=SCAN_WINDOW, budget=SCAN_BUDGET, weights=WEIGHTS):
+        self.hot, self.cold, self.window, self.budget = hot, cold, window, budget
+        self.weights = weights
+        self.state = {}          # ticker -> {'last', 'vol', 'rvol', 'band'}
+        self.scores = {}         # ticker -> (점수, 시각)
+        self.lock = threading.Lock()
+        self.last_plan = {}
+        self.last_pass = 0.0
+        self.credit = 0.0        # 쓰지 않은 예산 (소수점 이월, 최대 1구간 분량)
+
+    # 채점 직후 호출 (res = analyze_quant_coin 결과 또는 None)
+    def observe(self, ticker, df, res=None, now=None):
+        now = time.time() if now is None else now
+        f = features(df) if df is not None else {}
+        with self.lock:
+            s = self.state.setdefault(ticker, {})
+            s.update(f); s['last'] = now
+            if res: self.scores[ticker] = (res['prob'], now)
+
+    # 신호 보관함(quant_report) 의 점수 반영 (다른 경로에서 잡힌 신호 포함)
+    def seed_scores(self, report):
+        with self.lock:
+            for k, v in list(report.items()):
+                t = k.replace('⚠️ ', '')
+                at = v['found_time'].timestamp()
+                if t not in self.scores or self.scores[t][1] < at: self.scores[t] = (v['prob'], at)
+
+    def heat(self, ticker, now=None):
+        now = time.time() if now is None else now
+        s = self.state.get(ticker, {})
+        sc = self.scores.get(ticker)
+        score = _clip((sc[0] - 50) / 50) * 0.5 ** ((now - sc[1]) / SCORE_HALF_LIFE) if sc else 0.0
+        parts = {'vol': s.get('vol', 0.0), 'rvol': s.get('rvol', 0.0), 'band': s.get('band', 0.0), 'score': score}
+        return sum(self.weights[k] * parts[k] for k in self.weights)
+
+    def interval(self, heat):
+        return self.cold * (self.hot / self.cold) ** _clip(heat)
+
+    # 회차 한도 = 예산 x (회차 간격 / 예산 구간) + 이월분 -> 구간 합계가 예산을 넘지 않음
+    def limit(self, candidates, elapsed):
+        budget = self.budget or candidates
+        self.credit = min(budget, self.credit + budget * min(elapsed, self.window) / self.window)
+        return int(self.credit + 1e-9)
+
+    # 후보(예선 통과) 중 이번 회차에 채점할 종목 -> 밀린 정도 순
+    def plan(self, tickers, report=None, now=None):
+        now = time.time() if now is None else now
+        if report: self.seed_scores(report)
+        elapsed = now - self.last_pass if self.last_pass else PASS_INTERVAL
+        limit = self.limit(len(tickers), elapsed)
+        ranked = []
+        with self.lock:
+            for t in tickers:
+                s = self.state.get(t)
+                if s is None or 'last' not in s:
+                    ranked.append((math.inf, t, math.inf)); continue
+                age = now - s['last']
+                if age < self.hot: continue
+                ranked.append((math.inf if age >= self.cold else age / self.interval(self.heat(t, now)), t, age))
+        ranked.sort(key=lambda x: (x[0], x[-1]), reverse=True)
+        picked = [x[1] for x in ranked[:limit]]
+        self.credit -= len(picked)
+        self.last_pass = now
+        self.last_plan = {'candidates': len(tickers), 'due': sum(x[0] >= 1 for x in ranked), 'limit': limit,
+                          'picked': len(picked), 'at': now}
+        return picked
+
+    def retain(self, tickers):
+        keep = set(tickers)
+        with self.lock:
+            for d in (self.state, self.scores):
+                for t in [t for t in d if t not in keep]: del d[t]
+
+    # 화면용: 열기 구간별 종목 수 + 상위 종목 + 마지막 회차
+    def stats(self, top=5):
+        now = time.time()
+        with self.lock:
+            heats = {t: self.heat(t, now) for t in self.state}
+        bands = {'hot': sum(h >= 0.6 for h in heats.values()), 'warm': sum(0.3 <= h < 0.6 for h in heats.values()),
+                 'cold': sum(h < 0.3 for h in heats.values())}
+        hottest = sorted(heats.items(), key=lambda x: x[1], reverse=True)[:top]
+        return {'tracked': len(heats), **bands, 'plan': dict(self.last_plan),
+                'top': [{'t': t, 'heat': round(h, 2), 'interval': round(self.interval(h), 1)} for t, h in hottest]}
+
+
+ADAPTIVE_SCAN = AdaptiveScanScheduler()
@@ -0,0 +1,383 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+from indicators import MFI_LEN, RSI_LEN, MA_LEN, DIV_LOOKBACK
+from candle_cache import INTERVAL_SEC
+from timeframes import CONFIRM, BOUNDARY_NS, MTF_FILTER
+
+# -----------------------------------------------------------------------------
+# [백테스트] 15분봉 과거 데이터로 스나이퍼 / 세력매집 전략 재생
+#  python backtest.py --store [--days 365]    (candle_store 15분봉, 먼저 backfill)
+#  python backtest.py --dir history/          (종목별 CSV: KRW-BTC.csv ...)
+#  python backtest.py --synthetic 200 --bars 35040   (속도 확인용 랜덤 데이터)
+#  - 지표/신호는 전 종목 x 전 시점을 한 번에 계산 (종목 이어붙인 1차원 배열 + 구간 마스크)
+#  - 실시간 스캔과 같은 100봉 창 기준 (VWAP/OBV/체결강도는 창 시작부터 누적)
+#  - 진입: 자동 매수 조건(70점, 강도 100%, 초록불, 유효 보유 3개 미만) + 배팅 규칙
+#  - 청산: 손절 -3% (봉 저가 기준), +3% 이상에서 고점 대비 -1.5% (봉 종가 기준)
+#  - 상위봉 필터: 실시간과 같이 1시간/4시간봉(진행 중인 봉 포함) 하락 추세면 탈락 (mtf_filter, JAVIS_MTF)
+#  - 과거 호가가 없으므로 허매수벽 제외 / 방어벽 붕괴 청산은 재현하지 않음
+# -----------------------------------------------------------------------------
+WINDOW = 100            # 실시간 스캔이 받는 캔들 수 (count=100)
+
+DEFAULT_PARAMS = {
+    # 진입 (analyze_quant_coin)
+    'rsi_max': 70, 'sniper_band': 1.03, 'strength_min': 100, 'rvol_min': 2.0,
+    'stealth_price': 0.98, 'stealth_obv': 0.99, 'shadow_ratio': 2.0, 'min_score': 70, 'mtf_filter': MTF_FILTER,
+    # 배팅 (scan_whole_market)
+    'vip_score': 90, 'vip_ratio': 0.5, 'bet_ratio': 0.1, 'min_bet': 17000, 'max_positions': 3,
+    # 청산 (exit_engine)
+    'stop_loss': 0.97, 'trail_start': 3.0, 'trail_drop': 1.5,
+    # 체결
+    'fee': 0.0005, 'slippage': 0.001, 'initial_cash': 1_000_000,
+}
+
+
+class Panel:
+    # 종목별 캔들을 시간순으로 이어붙인 1차원 배열 (종목 경계는 start/end)
+    def __init__(self, frames):
+        cols = ['open', 'high', 'low', 'close', 'volume']
+        frames = {t: df.sort_index() for t, df in frames.items() if df is not None and len(df)}
+        self.tickers = list(frames)
+        lens = np.array([len(df) for df in frames.values()], dtype=np.int64)
+        self.end = np.cumsum(lens)
+        self.start = self.end - lens
+        data = np.concatenate([df[cols].to_numpy(dtype=np.float64) for df in frames.values()]) if frames \
+            else np.empty((0, 5))
+        self.o, self.h, self.l, self.c, self.v = (data[:, k] for k in range(5))
+        self.ts = np.concatenate([df.index.values.astype('datetime64[ns]').astype('int64') for df in frames.values()]) \
+            if frames else np.empty(0, dtype=np.int64)
+        self.tid = np.repeat(np.arange(len(self.tickers)), lens)
+        self.pos = np.arange(len(self.c)) - self.start[self.tid]   # 종목 안에서의 위치
+
+    # 이미 이어붙인 배열로 만들기 (공유 메모리 뷰 등, 복사 없음)
+    @classmethod
+    def from_arrays(cls, tickers, arrays):
+        p = cls.__new__(cls)
+        p.tickers = list(tickers)
+        for k in ('o', 'h', 'l', 'c', 'v', 'ts', 'tid', 'pos', 'start', 'end'): setattr(p, k, arrays[k])
+        p._grid = arrays.get('grid')
+        return p
+
+    def arrays(self):
+        return {'o': self.o, 'h': self.h, 'l': self.l, 'c': self.c, 'v': self.v, 'ts': self.ts, 'tid': self.tid,
+                'pos': self.pos, 'start': self.start, 'end': self.end, 'grid': self.grid}
+
+    def __len__(self): return len(self.c)
+
+    # 전 종목 시각 합집합 (평가 곡선 축)
+    @property
+    def grid(self):
+        if getattr(self, '_grid', None) is None: self._grid = np.unique(self.ts)
+        return self._grid
+
+
+# ----- 구간 안 롤링 연산 (종목 경계를 넘는 값은 NaN) -----
+def _roll_sum(x, w, pos):
+    cs = np.empty(len(x) + 1)
+    cs[0] = 0
+    np.cumsum(x, out=cs[1:])
+    out = np.full(len(x), np.nan)
+    if len(x) >= w: out[w - 1:] = cs[w:] - cs[:len(x) + 1 - w]
+    out[pos < w - 1] = np.nan
+    return out
+
+def _shift_max(a, b, k):
+    # out[i] = max(a[i], b[i-k])  (앞쪽 k 칸은 a 그대로, 어차피 마스크됨)
+    out = a.copy()
+    np.maximum(a[k:], b[:-k], out=out[k:])
+    return out
+
+def _roll_max(x, w, pos):
+    # 길이 1, 2, 4, 8.. 창 최대를 겹쳐서 w 창 최대 (maximum 연산 log2(w) 번)
+    out = np.full(len(x), np.nan)
+    if len(x) >= w:
+        pw, span = {1: x}, 1
+        while span * 2 <= w:
+            pw[span * 2] = _shift_max(pw[span], pw[span], span); span *= 2
+        m, got = pw[span], span
+        for k in sorted(pw, reverse=True):
+            if got + k <= w: m = _shift_max(m, pw[k], got); got += k
+        out[w - 1:] = m[w - 1:]
+    out[pos < w - 1] = np.nan
+    return out
+
+def _lag(x, k, pos):
+    out = np.full(len(x), np.nan)
+    out[k:] = x[:-k]
+    out[pos < k] = np.nan
+    return out
+
+# [상위봉 추세] 각 15분봉 시점의 timeframes.trend 값 (+1 / -1 / 0, 봉 부족 = NaN)
+#  - 시점의 상위봉 = 직전 완성봉 20개 + 진행 중인 봉 (종가 = 지금 15분봉 종가), 버킷은 있는 봉만 셈
+#  - MA20 기울기 (ma >= ma_prev) = 지금 종가 >= 20봉 전 완성봉 종가
+def mtf_trend(p, interval):
+    bucket = (p.ts - BOUNDARY_NS) // (INTERVAL_SEC[interval] * 10**9)
+    new = np.ones(len(bucket), dtype=bool)
+    new[1:] = (bucket[1:] != bucket[:-1]) | (p.tid[1:] != p.tid[:-1])
+    first = np.flatnonzero(new)
+    bid = np.cumsum(new) - 1                        # 봉 -> 상위봉 번호
+    bclose = p.c[np.concatenate([first[1:] - 1, [len(bucket) - 1]])] if len(first) else np.zeros(0)
+    btid = p.tid[first]
+    bpos = np.arange(len(first)) - np.searchsorted(btid, btid)      # 종목 안에서의 상위봉 위치
+    prev19 = _lag(_roll_sum(bclose, MA_LEN - 1, bpos), 1, bpos)[bid]
+    prev20 = _lag(bclose, MA_LEN, bpos)[bid]
+    c = p.c
+    ma = (prev19 + c) / MA_LEN
+    with np.errstate(invalid='ignore'):
+        up = (c > ma) & (c >= prev20)
+        down = (c < ma) & (c < prev20)
+    return np.where(np.isnan(prev20) | np.isnan(prev19), np.nan, np.where(up, 1.0, np.where(down, -1.0, 0.0)))
+
+
+def _osc(a, b):
+    with np.errstate(divide='ignore', invalid='ignore'): return 100 - (100 / (1 + a / b))
+
+
+# [지표] 실시간 스캔과 같은 값 (캔들 100개 창 기준) 을 전 시점에 대해 계산
+def features(p):
+    pos, o, h, l, c, v = p.pos, p.o, p.h, p.l, p.c, p.v
+    first = pos == 0
+    tp = (h + l + c) / 3
+    mf = tp * v
+    tp_d = np.diff(tp, prepend=np.nan); tp_d[first] = 0
+    c_d = np.diff(c, prepend=np.nan); c_d[first] = 0
+
+    mfi = _osc(_roll_sum(np.where(tp_d > 0, mf, 0.0), MFI_LEN, pos), _roll_sum(np.where(tp_d < 0, mf, 0.0), MFI_LEN, pos))
+    rsi = _osc(_roll_sum(np.where(c_d > 0, c_d, 0.0), RSI_LEN, pos) / RSI_LEN,
+               _roll_sum(np.where(c_d < 0, -c_d, 0.0), RSI_LEN, pos) / RSI_LEN)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = _roll_sum(mf, WINDOW, pos) / _roll_sum(v, WINDOW, pos)
+    down = _roll_sum(np.where(c < o, v, 0.0), WINDOW, pos)
+    strength = _roll_sum(np.where(c > o, v, 0.0), WINDOW, pos) / np.where(down == 0, 1, down) * 100
+    ma20 = _roll_sum(c, MA_LEN, pos) / MA_LEN
+    avg_vol = _roll_sum(v, MA_LEN, pos) / MA_LEN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rvol = np.where(avg_vol > 0, v / avg_vol, 0.0)
+
+    # OBV: 창 첫 캔들 기준 누적 (창 시작 = 100봉 전)
+    g = np.cumsum(np.sign(c_d) * v)
+    base = _lag(g, WINDOW - 1, pos)
+    obv = g - base
+    obv_max20 = _roll_max(g, MA_LEN, pos) - base
+
+    lag = DIV_LOOKBACK - 1
+    div = (c - _lag(c, lag, pos) <= 0) & (mfi - _lag(mfi, lag, pos) > 5)
+
+    # 상위봉 하락 (확인용 상위봉 중 하나라도 -1, 봉 부족은 모름 = 통과)
+    against = np.zeros(len(c), dtype=bool)
+    for iv in CONFIRM: against |= mtf_trend(p, iv) < 0
+
+    return {'open': o, 'high': h, 'close': c, 'rsi': rsi, 'vwap': vwap, 'strength': strength, 'ma20': ma20,
+            'rvol': rvol, 'obv': obv, 'obv_max20': obv_max20, 'close_max20': _roll_max(c, MA_LEN, pos),
+            'div': div, 'mtf_against': against, 'valid': pos >= WINDOW - 1}
+
+
+# [신호] analyze_quant_coin 채점 + 자동 매수 조건 -> (진입 위치, 점수, 전략)
+def signals(f, params=None):
+    q = dict(DEFAULT_PARAMS, **(params or {}))
+    o, c, h, ma20, strength = f['open'], f['close'], f['high'], f['ma20'], f['strength']
+    with np.errstate(invalid='ignore'):
+        band = (c > ma20) & (ma20 > 0) & (c <= ma20 * q['sniper_band'])
+        sniper_score = 40 + 20 * (strength >= q['strength_min']) + 20 * (f['rvol'] >= q['rvol_min']) + 10 * f['div']
+        sniper = band & (sniper_score >= q['min_score'])
+        stealth = ~sniper & (c < f['close_max20'] * q['stealth_price']) & (f['obv'] >= f['obv_max20'] * q['stealth_obv'])
+        score = np.where(sniper, sniper_score, np.where(stealth, 85, 0))
+
+        body = np.abs(c - o)
+        shadow = (body > 0) & (h - np.maximum(c, o) > body * q['shadow_ratio'])
+        ok = f['valid'] & (sniper | stealth) & ~(f['rsi'] >= q['rsi_max']) & ~shadow & (score >= q['min_score'])
+        if q['mtf_filter']: ok &= ~f['mtf_against']
+        # 자동 매수: 70점 / 강도 100% / 초록불 (종가 >= MA20)
+        ok &= (strength >= q['strength_min']) & (c >= ma20)
+    idx = np.flatnonzero(ok)
+    return idx, score[idx], sniper[idx]
+
+
+# [청산] 진입 후 첫 손절/익절 시점 (구간 단위로 앞으로 탐색)
+def _find_exit(p, i, entry, q, chunk=2048):
+    end = p.end[p.tid[i]]
+    stop = entry * q['stop_loss']
+    peak = entry
+    j = i + 1
+    while j < end:
+        k = min(end, j + chunk)
+        lo, hi, cl, op = p.l[j:k], p.h[j:k], p.c[j:k], p.o[j:k]
+        run_peak = np.maximum(np.maximum.accumulate(hi), peak)
+        hit_stop = lo < stop
+        hit_trail = ((cl - entry) / entry * 100 >= q['trail_start']) & ((run_peak - cl) / run_peak * 100 >= q['trail_drop'])
+        hit = np.flatnonzero(hit_stop | hit_trail)
+        if len(hit):
+            x = hit[0]
+            if hit_stop[x]: return j + x, min(op[x], stop), "손절"
+            return j + x, cl[x], "익절"
+        peak = run_peak[-1]
+        j = k
+    return end - 1, p.c[end - 1], "기간종료"
+
+
+def run_backtest(panel, params=None, feats=None):
+    q = dict(DEFAULT_PARAMS, **(params or {}))
+    f = feats if feats is not None else features(panel)
+    idx, score, is_sniper = signals(f, q)
+
+    # 같은 시각이면 점수 높은 순 (스캔은 도착 순서지만 동시 신호 중 최선을 먼저)
+    order = np.lexsort((-score, panel.ts[idx]))
+    idx, score, is_sniper = idx[order], score[order], is_sniper[order]
+
+    cash = float(q['initial_cash'])
+    open_pos = []          # (청산 위치, 청산 시각, 종목, 수량, 청산가, 사유, 진입 기록)
+    trades = []
+    fee, slip = q['fee'], q['slippage']
+
+    next_exit = np.iinfo(np.int64).max     # 가장 빠른 청산 시각 (그 전엔 포지션 변화 없음)
+
+    def close_until(t):
+        nonlocal cash, next_exit
+        for pos in sorted([x for x in open_pos if x[1] <= t], key=lambda x: x[1]):
+            open_pos.remove(pos)
+            _, _, tid, qty, px, reason, rec = pos
+            proceeds = qty * px * (1 - slip) * (1 - fee)
+            cash += proceeds
+            rec.update(exit_price=px * (1 - slip), pnl=proceeds - rec['bet'], reason=reason)
+            trades.append(rec)
+        next_exit = min((x[1] for x in open_pos), default=np.iinfo(np.int64).max)
+
+    ts = panel.ts[idx]
+    for i, t, s, sn in zip(idx, ts, score, is_sniper):
+        if t >= next_exit: close_until(t)
+        elif len(open_pos) >= q['max_positions']: continue
+        tid = panel.tid[i]
+        if len(open_pos) >= q['max_positions'] or any(x[2] == tid for x in open_pos): continue
+        ratio = q['vip_ratio'] if s >= q['vip_score'] else q['bet_ratio']
+        bet = min(max(cash * ratio, q['min_bet']), cash * 0.999)
+        if bet < 5000: continue
+        entry = panel.c[i] * (1 + slip)
+        qty = bet * (1 - fee) / entry
+        cash -= bet
+        x, px, reason = _find_exit(panel, i, entry, q)
+        rec = {'ticker': panel.tickers[tid], 'entry_time': t, 'exit_time': panel.ts[x], 'entry_price': entry,
+               'bet': bet, 'score': int(s), 'strategy': "추세포착" if sn else "세력매집", 'bars': int(x - i),
+               '_i': int(i), '_x': int(x), '_qty': qty}
+        open_pos.append((x, panel.ts[x], tid, qty, px, reason, rec))
+        next_exit = min(next_exit, panel.ts[x])
+    close_until(np.iinfo(np.int64).max)
+
+    trades_df = pd.DataFrame(trades)
+    return trades_df, summarize(panel, trades_df, q)
+
+
+# 평가 곡선 (보유 중엔 종가 평가) -> 손익 / 적중률 / 최대 낙폭
+def equity_curve(panel, trades, initial_cash):
+    grid = panel.grid
+    if trades.empty: return pd.Series(float(initial_cash), index=pd.to_datetime(grid))
+    flow = np.zeros(len(grid))
+    np.add.at(flow, np.searchsorted(grid, trades['entry_time'].values), -trades['bet'].values)
+    np.add.at(flow, np.searchsorted(grid, trades['exit_time'].values), trades['bet'].values + trades['pnl'].values)
+    equity = initial_cash + np.cumsum(flow)
+    # 보유 구간(진입~청산 직전) 평가액 더하기
+    for i, x, qty in zip(trades['_i'], trades['_x'], trades['_qty']):
+        g = np.searchsorted(grid, panel.ts[i:x])
+        equity[g] += qty * panel.c[i:x]
+    return pd.Series(equity, index=pd.to_datetime(grid))
+
+
+# 위험 대비 수익: 일간 수익률 샤프 (연환산, 코인은 365일) / 수익률 ÷ 최대 낙폭
+def risk_metrics(eq):
+    daily = eq.resample('1D').last().dropna().pct_change().dropna()
+    sd = daily.std()
+    sharpe = float(daily.mean() / sd * np.sqrt(365)) if len(daily) > 1 and sd > 0 else 0.0
+    dd = float((eq / eq.cummax() - 1).min() * 100) if len(eq) else 0.0
+    ret = float((eq.iloc[-1] / eq.iloc[0] - 1) * 100) if len(eq) else 0.0
+    calmar = ret / -dd if dd < 0 else 0.0
+    return sharpe, calmar, dd
+
+
+def summarize(panel, trades, q):
+    eq = equity_curve(panel, trades, q['initial_cash'])
+    sharpe, calmar, dd = risk_metrics(eq)
+    if trades.empty:
+        return {'trades': 0, 'pnl': 0.0, 'return_pct': 0.0, 'hit_rate': 0.0, 'max_drawdown_pct': dd,
+                'sharpe': 0.0, 'calmar': 0.0, 'equity': eq}
+    return {
+        'trades': len(trades), 'pnl': float(trades['pnl'].sum()),
+        'return_pct': float((eq.iloc[-1] / q['initial_cash'] - 1) * 100),
+        'hit_rate': float((trades['pnl'] > 0).mean() * 100),
+        'max_drawdown_pct': dd, 'sharpe': sharpe, 'calmar': calmar, 'avg_bars': float(trades['bars'].mean()),
+        'by_reason': trades['reason'].value_counts().to_dict(),
+        'by_strategy': trades.groupby('strategy')['pnl'].agg(['count', 'sum']).to_dict('index'),
+        'equity': eq,
+    }
+
+
+# ----- 데이터 -----
+def load_csv_dir(path):
+    frames = {}
+    for name in sorted(os.listdir(path)):
+        if not name.endswith('.csv'): continue
+        df = pd.read_csv(os.path.join(path, name), index_col=0, parse_dates=True)
+        frames[name[:-4]] = df
+    return frames
+
+
+# 디스크 캔들 저장소 (candle_store backfill 결과)
+def load_store(interval="minute15", start=None, end=None, tickers=None, store=None):
+    from candle_store import CANDLE_STORE
+    store = store or CANDLE_STORE
+    frames = {t: store.frame(t, interval, start, end) for t in (tickers or store.tickers(interval))}
+    return {t: df for t, df in frames.items() if len(df)}
+
+
+def synthetic_frames(n_tickers=200, n_bars=35040, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2023-01-01 09:00", periods=n_bars, freq="15min")
+    frames = {}
+    for k in range(n_tickers):
+        r = rng.normal(0, 0.006, n_bars) + 0.0003 * np.sin(np.arange(n_bars) / rng.uniform(50, 400))
+        c = 1000 * np.exp(np.cumsum(r))
+        o = np.concatenate([[c[0]], c[:-1]])
+        h = np.maximum(o, c) * (1 + rng.exponential(0.002, n_bars))
+        l = np.minimum(o, c) * (1 - rng.exponential(0.002, n_bars))
+        v = rng.lognormal(10, 1, n_bars)
+        frames[f"KRW-S{k:03d}"] = pd.DataFrame({'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}, index=idx)
+    return frames
+
+
+def report(s):
+    print(f"거래 {s['trades']}건 / 손익 {s['pnl']:,.0f}원 ({s['return_pct']:+.2f}%) / "
+          f"적중률 {s['hit_rate']:.1f}% / 최대 낙폭 {s['max_drawdown_pct']:.2f}% / 샤프 {s['sharpe']:.2f}")
+    if s['trades']:
+        print(f"평균 보유 {s['avg_bars']:.1f}봉 / 청산 사유 {s['by_reason']}")
+        for k, v in s['by_strategy'].items(): print(f"  {k}: {int(v['count'])}건 {v['sum']:,.0f}원")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--store", action="store_true")
+    ap.add_argument("--days", type=float)
+    ap.add_argument("--dir")
+    ap.add_argument("--synthetic", type=int, default=0)
+    ap.add_argument("--bars", type=int, default=35040)
+    a = ap.parse_args()
+    if a.store:
+        start = pd.Timestamp.now(tz='Asia/Seoul').tz_localize(None) - pd.Timedelta(days=a.days) if a.days else None
+        frames = load_store(start=start)
+    elif a.dir: frames = load_csv_dir(a.dir)
+    elif a.synthetic: frames = synthetic_frames(a.synthetic, a.bars)
+    else: ap.error("--store / --dir / --synthetic 중 하나 필요")
+
+    t0 = time.perf_counter()
+    panel = Panel(frames)
+    t1 = time.perf_counter()
+    feats = features(panel)
+    t2 = time.perf_counter()
+    trades, summary = run_backtest(panel, feats=feats)
+    t3 = time.perf_counter()
+    print(f"{len(panel.tickers)}종목 {len(panel):,}봉: 적재 {t1 - t0:.2f}s / 지표 {t2 - t1:.2f}s / 매매 {t3 - t2:.2f}s")
+    report(summary)
+    sys.exit(0)
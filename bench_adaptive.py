@@ -0,0 +1,76 @@
+import sys
+import logging
+
+import numpy as np
+
+import upbit_fixtures as ufx
+from adaptive_scheduler import AdaptiveScanScheduler, PASS_INTERVAL, SCAN_WINDOW
+
+# -----------------------------------------------------------------------------
+# [벤치] 적응형 스캔 vs 30초 전체 스캔 (가짜 시장 재생 + 가상 시계)
+#  python bench_adaptive.py [종목수] [봉수] [봉길이초]
+#  - 봉마다 전 종목을 채점해 정답(신호 여부)을 먼저 만들고,
+#    두 방식이 같은 시계로 돌면서 새 신호를 몇 초 만에 잡는지 / 놓치는지 / 채점 수를 비교
+#  - 30초 전체 스캔은 위상을 바꿔가며 평균 (봉 시작과 스캔 시각이 맞물리는 우연 제거)
+#  - 예선은 생략 (전 종목이 후보)
+# -----------------------------------------------------------------------------
+
+def ground_truth(market, start, end):
+    import core
+    truth, frames = {}, {}
+    for k in range(start, end):
+        market.seek(k)
+        for t in market.universe:
+            df = market.get_ohlcv(t, market.interval, 100)
+            frames[t, k] = df
+            truth[t, k] = core.analyze_quant_coin(t, df=df, ob=market._book_at(t))
+    return truth, frames
+
+
+def simulate(universe, truth, frames, start, end, bar_sec, adaptive, phase=0):
+    sched = AdaptiveScanScheduler()
+    delays, found, scored = [], set(), 0
+    last_full = -phase               # 전체 스캔이 봉 시작과 맞물리지 않게 위상 이동
+    t_end = (end - start) * bar_sec
+    now = 0.0
+    while now < t_end:
+        k = start + int(now // bar_sec)
+        if adaptive: picks = sched.plan(universe, now=now)
+        elif now - last_full >= SCAN_WINDOW: picks, last_full = universe, now
+        else: picks = []
+        for t in picks:
+            res = truth[t, k]
+            sched.observe(t, frames[t, k], res, now=now)
+            scored += 1
+            if not res: continue
+            # 같은 신호가 이어지는 구간의 첫 봉부터 잰 지연 (구간당 1회)
+            k0 = k
+            while k0 - 1 >= start and truth[t, k0 - 1]: k0 -= 1
+            if (t, k0) in found: continue
+            found.add((t, k0))
+            delays.append(now - (k0 - start) * bar_sec)
+        now += PASS_INTERVAL
+    return delays, found, scored / (t_end / SCAN_WINDOW)
+
+
+def bench(n=100, bars=60, bar_sec=900):
+    market = ufx.FixtureUpbit(ufx.synthetic(n), size=n)
+    ufx.install(market)
+    start = max(100, market.bars - bars)
+    end = market.bars
+    truth, frames = ground_truth(market, start, end)
+    episodes = sum(1 for (t, k), r in truth.items() if r and not (k > start and truth[t, k - 1]))
+    print(f"{n}종목 x {end - start}봉 (봉 {bar_sec}초)  새 신호 {episodes}건")
+    for name, adaptive in (("30초 전체", False), ("적응형", True)):
+        runs = [simulate(market.universe, truth, frames, start, end, bar_sec, adaptive, phase)
+                for phase in ((0,) if adaptive else range(0, SCAN_WINDOW, PASS_INTERVAL))]
+        d = np.concatenate([r[0] for r in runs]) if any(r[0] for r in runs) else np.zeros(1)
+        found, load = np.mean([len(r[1]) for r in runs]), np.mean([r[2] for r in runs])
+        print(f"  {name:8s} 포착 {found:6.1f}건  지연 평균 {d.mean():6.1f}s  p50 {np.percentile(d, 50):6.1f}s  "
+              f"p90 {np.percentile(d, 90):6.1f}s   채점 {load:6.1f}종목/{SCAN_WINDOW}초")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    a = [int(x) for x in sys.argv[1:]]
+    bench(*a)
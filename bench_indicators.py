@@ -0,0 +1,116 @@
+import time
+import math
+import numpy as np
+import pandas as pd
+
+from indicators import calculate_god_indicators, calculate_god_indicators_panel, StreamingGodIndicators
+
+# -----------------------------------------------------------------------------
+# [벤치] 지표 엔진 마이크로 벤치마크
+#  python bench_indicators.py [종목수]
+#  - 기존 루프 버전과 값 일치 확인 + 종목당 / 전체 시장 소요 시간 비교
+# -----------------------------------------------------------------------------
+
+# 기존 javis.py 루프 구현 (비교 기준)
+def legacy_god_indicators(df):
+    v = df['volume']
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    mf = tp * v
+    pos_flow = []; neg_flow = []
+    for i in range(len(df)):
+        if i == 0: pos_flow.append(0); neg_flow.append(0); continue
+        if tp.iloc[i] > tp.iloc[i-1]: pos_flow.append(mf.iloc[i]); neg_flow.append(0)
+        elif tp.iloc[i] < tp.iloc[i-1]: pos_flow.append(0); neg_flow.append(mf.iloc[i])
+        else: pos_flow.append(0); neg_flow.append(0)
+    pos_sum = pd.Series(pos_flow).rolling(14).sum()
+    neg_sum = pd.Series(neg_flow).rolling(14).sum()
+    mfi = 100 - (100 / (1 + pos_sum / neg_sum))
+    df = df.assign(vwap=(tp * v).cumsum() / v.cumsum())
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+    up_vol = df[df['close'] > df['open']]['volume'].sum()
+    down_vol = df[df['close'] < df['open']]['volume'].sum()
+    if down_vol == 0: down_vol = 1
+    trade_strength = (up_vol / down_vol) * 100
+    if len(df) >= 20: ma20 = df['close'].rolling(window=20).mean().iloc[-1]
+    else: ma20 = df['close'].mean()
+    if math.isnan(ma20): ma20 = 0
+    obv = [0] * len(df)
+    for i in range(1, len(df)):
+        if df['close'].iloc[i] > df['close'].iloc[i-1]: obv[i] = obv[i-1] + df['volume'].iloc[i]
+        elif df['close'].iloc[i] < df['close'].iloc[i-1]: obv[i] = obv[i-1] - df['volume'].iloc[i]
+        else: obv[i] = obv[i-1]
+    df['obv'] = obv
+    price_slope = df['close'].iloc[-1] - df['close'].iloc[-5]
+    mfi_slope = mfi.iloc[-1] - mfi.iloc[-5]
+    is_divergence = price_slope <= 0 and mfi_slope > 5
+    return mfi.iloc[-1], df['vwap'].iloc[-1], is_divergence, rsi.iloc[-1], trade_strength, ma20, df
+
+
+def make_candles(n=100, seed=0):
+    rng = np.random.default_rng(seed)
+    base = 10 ** rng.uniform(0, 5)
+    # 틱 단위 가격 (동가 캔들도 섞이도록 반올림)
+    close = np.round(base * np.exp(np.cumsum(rng.normal(0, 0.01, n))), 2)
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.uniform(0, 1e4, n)
+    idx = pd.date_range("2024-01-01", periods=n, freq="15min")
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}, index=idx)
+
+
+def check_equal(a, b):
+    for x, y in zip(a[:6], b[:6]):
+        if isinstance(x, (bool, np.bool_)):
+            if bool(x) != bool(y): return False
+        elif not np.isclose(x, y, rtol=1e-9, equal_nan=True): return False
+    return np.allclose(a[6]['obv'].values, b[6]['obv'].values) and np.allclose(a[6]['vwap'].values, b[6]['vwap'].values)
+
+
+def bench(n_tickers=200, n_candles=100):
+    frames = {f"KRW-T{i:03d}": make_candles(n_candles, seed=i) for i in range(n_tickers)}
+
+    mismatch = [t for t, df in frames.items() if not check_equal(legacy_god_indicators(df), calculate_god_indicators(df))]
+    print(f"값 검증: {n_tickers - len(mismatch)}/{n_tickers} 일치" + (f" (불일치: {mismatch[:5]})" if mismatch else ""))
+
+    t0 = time.perf_counter()
+    for df in frames.values(): legacy_god_indicators(df)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for df in frames.values(): calculate_god_indicators(df)
+    t_new = time.perf_counter() - t0
+
+    panel = pd.concat(frames)
+    t0 = time.perf_counter()
+    out = calculate_god_indicators_panel(panel)
+    t_panel = time.perf_counter() - t0
+
+    print(f"기존 루프   : 종목당 {t_legacy / n_tickers * 1e3:8.3f} ms / 전체 {t_legacy * 1e3:9.1f} ms")
+    print(f"넘파이 단건 : 종목당 {t_new / n_tickers * 1e3:8.3f} ms / 전체 {t_new * 1e3:9.1f} ms")
+    print(f"넘파이 일괄 : 종목당 {t_panel / n_tickers * 1e3:8.3f} ms / 전체 {t_panel * 1e3:9.1f} ms ({len(out)}종목)")
+
+    # 스트리밍: 종목마다 캔들 1개 추가 후 스냅샷 (재스캔 1회 비용)
+    streams = {}
+    for t, df in frames.items():
+        s = streams[t] = StreamingGodIndicators(n_candles)
+        s.seed(df.iloc[:-1])
+    last = {t: (df.index[-1], *df.iloc[-1][['open', 'high', 'low', 'close', 'volume']]) for t, df in frames.items()}
+    t0 = time.perf_counter()
+    for t, s in streams.items():
+        s.push(*last[t]); s.snapshot()
+    t_stream = time.perf_counter() - t0
+    print(f"스트리밍    : 종목당 {t_stream / n_tickers * 1e3:8.3f} ms / 전체 {t_stream * 1e3:9.1f} ms")
+
+    s_ok = all(streams[t].check() for t in frames)
+    print(f"스트리밍 검증: {'일치' if s_ok else '불일치'}")
+    return not mismatch and s_ok
+
+
+if __name__ == "__main__":
+    import sys
+    ok = bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    sys.exit(0 if ok else 1)
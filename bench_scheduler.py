@@ -0,0 +1,80 @@
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_upbit_server import serve
+import exchange
+from exchange import ExchangeClient, OrderExecutor, QuotationClient
+from candle_cache import CandleCache
+from request_scheduler import SCHEDULER, priority
+
+# -----------------------------------------------------------------------------
+# [벤치] 요청 스케줄러 부하 테스트 (가짜 업비트 REST 서버 사용)
+#  python bench_scheduler.py [스캔요청수]
+#  - 스캔 8스레드가 ticker 그룹을 가득 채우는 동안 보유 시세(1초마다)와
+#    청산 매도 주문을 섞어서 보냄 -> 순위별 대기 시간 / 429 / 실패 수 확인
+#  - 이어서 실제 캔들 경로(CandleCache -> 공개 세션 클라이언트)로 캔들 그룹을 가득 채움 -> 429 백오프 / 실패 수
+# -----------------------------------------------------------------------------
+
+def bench(n_scan=100):
+    server, state = serve()
+    client = ExchangeClient("bench-access-key-000000000000000", "bench-secret-key-000000000000000",
+                            base_url=f"http://127.0.0.1:{server.server_port}")
+    executor = OrderExecutor(client)
+    errors = []
+
+    def scan_one(i):
+        with priority('scan'):
+            res = client.request("GET", "/v1/ticker", params={"markets": f"KRW-C{i}"}, group='ticker')
+        if 'error' in res: errors.append(('scan', res))
+
+    def holdings_loop(stop):
+        while not stop.is_set():
+            with priority('holdings'):
+                res = client.request("GET", "/v1/ticker", params={"markets": "KRW-BTC,KRW-ETH"}, group='ticker')
+            if 'error' in res: errors.append(('holdings', res))
+            stop.wait(1.0)
+
+    stop = threading.Event()
+    t0 = time.perf_counter()
+    watcher = threading.Thread(target=holdings_loop, args=(stop,), daemon=True)
+    watcher.start()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(scan_one, i) for i in range(n_scan)]
+        time.sleep(1.0)
+        # 스캔 도중 청산: 12종목 동시 매도 (주문 그룹 초당 8회 초과 -> 스케줄러가 나눠 보냄)
+        sells = [executor.submit_sell(f"KRW-C{i}", 1.0) for i in range(12)]
+        sold = sum(1 for f in sells if 'uuid' in (f.result() or {}))
+        for f in futures: f.result()
+    stop.set(); watcher.join()
+    elapsed = time.perf_counter() - t0
+
+    print(f"스캔 {n_scan}건 + 보유 시세 + 청산 12건: {elapsed:.1f}초")
+    print(f"서버 처리 {state.stats['served']} / 429 거절 {state.stats['rejected']} / 최종 실패 {len(errors)} / 매도 접수 {sold}")
+    for group, st in SCHEDULER.stats().items():
+        print(f"[{group}] 속도 {st['rate']:.1f}/s, 429 {st['throttled']}회")
+        for p, w in st['wait'].items():
+            print(f"   {p:8s} {w['n']:4d}건  대기 p50 {w['p50_ms']:7.1f}ms  p99 {w['p99_ms']:7.1f}ms  max {w['max_ms']:7.1f}ms")
+
+    # 실제 캔들 경로: 서버 한도보다 빠르게 요청 (로컬 버킷을 서버보다 느슨하게) -> 429 가 나도 재시도로 전부 성공해야 함
+    exchange.QUOTATION = QuotationClient(base_url=f"http://127.0.0.1:{server.server_port}")
+    cache = CandleCache()
+    bucket = SCHEDULER._gate('candle').bucket
+    bucket.rate = bucket.capacity = bucket.tokens = 30.0
+    SCHEDULER._gate('candle').nominal = 30.0
+    rejected = state.stats['rejected']
+    t1 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool, priority('scan'):
+        frames = list(pool.map(lambda i: cache.get(f"KRW-C{i}", count=100), range(n_scan)))
+    missing = sum(1 for df in frames if df is None or len(df) < 100)
+    st = SCHEDULER.stats()['candle']
+    print(f"캔들 {n_scan}종목: {time.perf_counter() - t1:.1f}초 / 429 거절 {state.stats['rejected'] - rejected} / "
+          f"스케줄러 백오프 {st['throttled']}회 / 남은 요청(헤더) {st['remaining']} / 실패 {missing}")
+    server.shutdown()
+    return not errors and sold == 12 and not missing
+
+
+if __name__ == "__main__":
+    ok = bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,54 @@
+import sys
+import time
+import logging
+
+import upbit_fixtures as ufx
+
+# -----------------------------------------------------------------------------
+# [벤치] 샤드 스캔 (프로세스 수별 채점 시간 + 단일 스캔과 신호 일치 확인)
+#  python bench_sharded.py [종목수] [프로세스수,...]
+#  - 가짜 시장(픽스처 재생)이라 네트워크 없음 -> 채점(CPU) 시간만 비교
+# -----------------------------------------------------------------------------
+
+def bench(n_tickers=1000, procs=(1, 2, 4)):
+    import core
+    import sharded_scan
+    from scan_pipeline import iter_scan_inputs
+
+    market = ufx.FixtureUpbit(ufx.synthetic(200), size=n_tickers)
+    ufx.install(market)
+    inputs = [x for x in iter_scan_inputs(market.universe) if x[1] is not None]
+
+    # 작업 프로세스처럼 지표 스트림이 데워진 상태에서 비교 (1회 워밍업 후 3회 중 최소)
+    times = []
+    for k in range(4):
+        t0 = time.perf_counter()
+        serial = [r for r in (core.analyze_quant_coin(t, df=df, ob=ob) for t, df, ob in inputs) if r]
+        if k: times.append(time.perf_counter() - t0)
+    t_serial = min(times)
+    want = sorted((r['t'], r['prob']) for r in serial)
+    print(f"{len(inputs)}종목 단일 채점 {t_serial * 1000:8.0f}ms  신호 {len(serial)}")
+
+    ok = True
+    for n in procs:
+        sc = sharded_scan.ShardedScanner(n)
+        sc.score(inputs)                            # 작업 프로세스 기동 + core import + 지표 뱅크 (측정 제외)
+        times = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            res = sc.score(inputs)
+            times.append(time.perf_counter() - t0)
+        got = sorted((r['t'], r['prob']) for r in res)
+        ok &= got == want
+        best = min(times)
+        print(f"  {n}프로세스  {best * 1000:8.0f}ms  (x{t_serial / best:4.2f}, 묶기 {sc.stats['pack_ms']:.0f}ms, "
+              f"사용 프로세스 {sc.stats['procs']})  신호 {'일치' if got == want else '불일치'}")
+        sc.close()
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    procs = tuple(int(p) for p in sys.argv[2].split(",")) if len(sys.argv) > 2 else (1, 2, 4)
+    sys.exit(0 if bench(n, procs) else 1)
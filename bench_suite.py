@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tracemalloc
+
+import numpy as np
+
+import upbit_fixtures as ufx
+
+# -----------------------------------------------------------------------------
+# [벤치] 오프라인 성능 회귀 검사 (녹화된 업비트 응답 재생)
+#  python upbit_fixtures.py record [--synthetic 200]    # 픽스처 먼저
+#  python bench_suite.py                                # 10 / 100 / 1000 종목 측정
+#  python bench_suite.py --save-baseline                # 현재 결과를 기준값으로 저장
+#  python bench_suite.py --check                        # 기준값 대비 느려졌으면 종료코드 1
+#  - 대상: 지표 계산 / 종목 분석 / 전체 스캔 1회 / 자산 조회
+#  - 지표: 처리량(건/초), p50/p99 지연, 최대 메모리 (tracemalloc, 시간 측정과 별도 실행)
+# -----------------------------------------------------------------------------
+SIZES = (10, 100, 1000)
+BASELINE = os.path.join(os.getenv("JAVIS_STATE_DIR", ".javis_state"), "bench_baseline.json")
+TOLERANCE = 0.25        # 기준값보다 25% 넘게 나빠지면 회귀
+MIN_MS = 0.05           # 이보다 짧은 p50 은 잡음이 커서 비교 안 함
+
+
+def _summary(samples, items, elapsed):
+    a = np.asarray(samples) * 1000
+    return {'n': len(samples), 'throughput': items / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': float(np.percentile(a, 50)), 'p99_ms': float(np.percentile(a, 99))}
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try: fn()
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+# ----- 대상별 측정 (run -> (지연 샘플, 처리 건수)) -----
+def bench_indicators(replay, rounds):
+    from indicators import calculate_god_indicators
+    frames = [replay.get_ohlcv(t, replay.interval, 100) for t in replay.universe]
+    def run():
+        samples = []
+        for _ in range(rounds):
+            for df in frames:
+                t0 = time.perf_counter(); calculate_god_indicators(df); samples.append(time.perf_counter() - t0)
+        return samples, len(frames) * rounds
+    return run
+
+
+def bench_analyze(replay, rounds):
+    import core
+    from orderbook import ORDERBOOKS
+    inputs = [(t, replay.get_ohlcv(t, replay.interval, 100)) for t in replay.universe]
+    ORDERBOOKS.prefetch(replay.universe)
+    obs = {t: ORDERBOOKS.get(t) for t in replay.universe}
+    def run():
+        samples = []
+        for _ in range(rounds):
+            ufx.reset_caches()          # 지표 스트림 콜드 (종목마다 seed 부터)
+            for t, df in inputs:
+                t0 = time.perf_counter(); core.analyze_quant_coin(t, df=df, ob=obs[t]); samples.append(time.perf_counter() - t0)
+        return samples, len(inputs) * rounds
+    return run
+
+
+def bench_scan(replay, rounds):
+    import core
+    def run():
+        samples, items = [], 0
+        for _ in range(rounds):
+            ufx.reset_caches()
+            stats = {}
+            t0 = time.perf_counter()
+            core.scan_whole_market(1_000_000, {}, stats=stats)
+            samples.append(time.perf_counter() - t0)
+            items += len(replay.universe)
+        return samples, items
+    return run
+
+
+def bench_assets(replay, rounds):
+    import core
+    def run():
+        samples = []
+        for _ in range(rounds * 10):
+            ufx.reset_caches()
+            t0 = time.perf_counter(); core.get_full_asset_info({}); samples.append(time.perf_counter() - t0)
+        return samples, len(samples)
+    return run
+
+
+BENCHES = {
+    'calculate_god_indicators': bench_indicators,
+    'analyze_quant_coin': bench_analyze,
+    'scan_whole_market': bench_scan,
+    'get_full_asset_info': bench_assets,
+}
+
+
+def run_suite(fx, sizes=SIZES, rounds=3, names=None, memory=True, latency=0.0):
+    results = {}
+    for size in sizes:
+        replay = ufx.FixtureUpbit(fx, size=size, latency=latency)
+        ufx.install(replay, holdings=max(1, min(size // 10, 50)))
+        for name, make in BENCHES.items():
+            if names and name not in names: continue
+            run = make(replay, rounds)
+            run()                                   # 워밍업 (import / 첫 할당)
+            t0 = time.perf_counter()
+            samples, items = run()
+            res = _summary(samples, items, time.perf_counter() - t0)
+            if memory: res['peak_mb'] = _peak_mb(run)
+            results[f"{name}@{size}"] = res
+            print(f"{name:26s} {size:5d}종목  {res['throughput']:10.1f}/s  p50 {res['p50_ms']:9.3f}ms  "
+                  f"p99 {res['p99_ms']:9.3f}ms" + (f"  메모리 {res['peak_mb']:7.1f}MB" if memory else ""))
+    return results
+
+
+# 기준값 대비 나빠진 항목 -> [설명] (처리량은 p50 과 같은 정보라 보고만 하고 판정엔 안 씀)
+def compare(results, baseline, tol=TOLERANCE):
+    bad = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base: continue
+        if base['p50_ms'] >= MIN_MS and cur['p50_ms'] > base['p50_ms'] * (1 + tol):
+            bad.append(f"{key}: p50 {base['p50_ms']:.3f} -> {cur['p50_ms']:.3f}ms")
+        if 'peak_mb' in cur and 'peak_mb' in base and cur['peak_mb'] > base['peak_mb'] * (1 + tol) + 1:
+            bad.append(f"{key}: 메모리 {base['peak_mb']:.1f} -> {cur['peak_mb']:.1f}MB")
+    return bad
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixture", default=ufx.DEFAULT_FIXTURE)
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--only", nargs="*", choices=list(BENCHES))
+    ap.add_argument("--latency", type=float, default=0.0, help="가짜 응답 지연 (초)")
+    ap.add_argument("--no-memory", action="store_true")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE)
+    a = ap.parse_args()
+
+    if not os.path.exists(a.fixture): sys.exit(f"픽스처 없음: {a.fixture} (python upbit_fixtures.py record 먼저)")
+    fx = ufx.load(a.fixture)
+    print(f"픽스처: {fx['source']} {len(fx['candles'])}종목")
+    results = run_suite(fx, [int(s) for s in a.sizes.split(",")], a.rounds, a.only, not a.no_memory, a.latency)
+
+    if a.save_baseline:
+        os.makedirs(os.path.dirname(a.baseline) or ".", exist_ok=True)
+        with open(a.baseline, "w") as f: json.dump(results, f, indent=1)
+        print(f"기준값 저장: {a.baseline}")
+    if a.check:
+        if not os.path.exists(a.baseline): sys.exit(f"기준값 없음: {a.baseline} (--save-baseline 먼저)")
+        with open(a.baseline) as f: bad = compare(results, json.load(f), a.tolerance)
+        for b in bad: print(f"❌ 회귀 {b}")
+        print("✅ 기준값 이내" if not bad else f"회귀 {len(bad)}건")
+        sys.exit(1 if bad else 0)
@@ -0,0 +1,160 @@
+import time
+import threading
+import logging
+import numpy as np
+import pandas as pd
+
+from request_scheduler import SCHEDULER
+from exchange import fetch_ohlcv
+
+# -----------------------------------------------------------------------------
+# [캐시] 캔들 링버퍼 (ticker, interval) 단위
+#  - 첫 조회만 전체 다운로드, 이후엔 마지막 캔들 이후분만 추가 조회
+#  - 진행 중인 마지막 캔들은 매번 덮어씀
+# -----------------------------------------------------------------------------
+COLS = ('open', 'high', 'low', 'close', 'volume', 'value')
+INTERVAL_SEC = {
+    'minute1': 60, 'minute3': 180, 'minute5': 300, 'minute10': 600, 'minute15': 900,
+    'minute30': 1800, 'minute60': 3600, 'minute240': 14400, 'day': 86400, 'week': 604800,
+}
+KST_OFFSET = 9 * 3600  # 업비트 캔들 인덱스는 KST naive
+
+
+class CandleRing:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype='int64')       # ns (KST naive 기준)
+        self.data = np.zeros((capacity, len(COLS)))
+        self.start = 0
+        self.size = 0
+
+    def last_ts(self):
+        if self.size == 0: return None
+        return int(self.ts[(self.start + self.size - 1) % self.capacity])
+
+    def _append(self, ts, row):
+        if self.size < self.capacity:
+            pos = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            pos = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.ts[pos] = ts
+        self.data[pos] = row
+
+    # 정렬된 캔들 반영: 이미 닫힌 캔들은 무시, 마지막 캔들은 갱신, 새 캔들은 추가
+    def upsert(self, ts_arr, data_arr):
+        last = self.last_ts()
+        for ts, row in zip(ts_arr, data_arr):
+            if last is not None and ts < last: continue
+            if last is not None and ts == last:
+                self.data[(self.start + self.size - 1) % self.capacity] = row
+            else:
+                self._append(ts, row)
+                last = ts
+
+    def tail(self, n):
+        n = min(n, self.size)
+        idx = (self.start + self.size - n + np.arange(n)) % self.capacity
+        return self.ts[idx], self.data[idx]
+
+
+class CandleCache:
+    def __init__(self, capacity=200, fetcher=None, store=None):
+        self.capacity = capacity
+        self.fetcher = fetcher or fetch_ohlcv     # 세션 재사용 + 429 / Remaining-Req 가 스케줄러로
+        self.store = store          # 디스크 저장소 (candle_store) - 콜드 스타트 / 받은 캔들 저장
+        self.rings = {}
+        self.fetched_at = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'fetches': 0, 'candles': 0, 'warm': 0}
+
+    def _key_lock(self, key):
+        with self.lock:
+            if key not in self.locks: self.locks[key] = threading.Lock()
+            return self.locks[key]
+
+    def _missing_count(self, ring, interval):
+        # 마지막 캔들 이후 경과한 캔들 수 + 마지막 캔들 재조회 1개
+        step = INTERVAL_SEC.get(interval)
+        if step is None: return None
+        last_epoch = ring.last_ts() / 1e9 - KST_OFFSET
+        return int(max(0, time.time() - last_epoch) // step) + 2
+
+    # 실제로 API 를 부를 때만 스케줄러 토큰 소모 (우선순위는 호출한 스레드 기준)
+    #  429 는 스케줄러가 백오프 후 재시도, 그래도 실패하면 None (기존 pyupbit 와 같은 결과)
+    def _fetch(self, ticker, interval, count):
+        try: df = SCHEDULER.call('candle', self.fetcher, ticker, interval=interval, count=count)
+        except Exception as e:
+            logging.info(f"캔들 조회 실패 {ticker} {interval}: {e}")
+            df = None
+        self.stats['fetches'] += 1
+        if df is not None:
+            self.stats['candles'] += len(df)
+            if self.store is not None:
+                try: self.store.append_frame(ticker, interval, df)
+                except Exception as e: logging.info(f"캔들 저장 실패 {ticker}: {e}")
+        return df
+
+    # 디스크에 있는 최근 캔들로 링 채우기 (없으면 None)
+    def _warm(self, ticker, interval):
+        if self.store is None: return None
+        try: ts, cols = self.store.read(ticker, interval, count=self.capacity)
+        except Exception as e:
+            logging.info(f"캔들 저장소 읽기 실패 {ticker}: {e}")
+            return None
+        if len(ts) == 0: return None
+        ring = CandleRing(self.capacity)
+        ring.upsert(np.asarray(ts), np.column_stack([cols[c] for c in COLS]))
+        self.stats['warm'] += 1
+        return ring
+
+    def get(self, ticker, interval="minute15", count=100, max_age=0):
+        key = (ticker, interval)
+        count = min(count, self.capacity)
+        with self._key_lock(key):
+            ring = self.rings.get(key)
+            if ring is None:
+                ring = self._warm(ticker, interval)
+                if ring is not None: self.rings[key] = ring
+            if ring is not None and ring.size >= count and time.time() - self.fetched_at.get(key, 0) < max_age:
+                self.stats['hits'] += 1
+                return self._frame(ring, count)
+
+            need = None
+            if ring is not None and ring.size >= count: need = self._missing_count(ring, interval)
+            if need is None or need >= count:
+                # 콜드 스타트 (또는 공백이 길어서 사실상 전체 재조회)
+                df = self._fetch(ticker, interval, count)
+                if df is None or len(df) == 0: return None
+                ring = CandleRing(self.capacity)
+                self.rings[key] = ring
+            else:
+                df = self._fetch(ticker, interval, need)
+                if df is None: return self._frame(ring, count)
+
+            ring.upsert(df.index.values.astype('datetime64[ns]').astype('int64'), df[list(COLS)].to_numpy(dtype=np.float64))
+            self.fetched_at[key] = time.time()
+            return self._frame(ring, count)
+
+    def _frame(self, ring, count):
+        ts, data = ring.tail(count)
+        return pd.DataFrame(data, index=pd.DatetimeIndex(ts.astype('datetime64[ns]')), columns=list(COLS))
+
+    # 디스크 저장소 연결 (None = 끊기)
+    def attach(self, store):
+        self.store = store
+
+    # 스캔 대상에서 빠진 종목 제거
+    def retain(self, tickers, interval="minute15"):
+        keep = set(tickers)
+        with self.lock:
+            gone = [k for k in self.rings if k[1] == interval and k[0] not in keep]
+            for k in gone:
+                self.rings.pop(k, None); self.fetched_at.pop(k, None); self.locks.pop(k, None)
+        if gone: logging.info(f"캔들 캐시 정리: {len(gone)}종목 제거")
+        return len(gone)
+
+
+CANDLE_CACHE = CandleCache()
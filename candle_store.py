@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pyupbit
+
+try: import fcntl             # 프로세스 간 잠금 (윈도우면 없음 -> 프로세스 안 잠금만)
+except ImportError: fcntl = None
+
+from candle_cache import COLS, KST_OFFSET
+from request_scheduler import SCHEDULER, priority
+from exchange import fetch_ohlcv
+
+# -----------------------------------------------------------------------------
+# [저장소] 디스크 캔들 저장소 (ticker, interval) 단위 컬럼 파일
+#  - {루트}/{interval}/{ticker}/ts.i8, open.f8 ... value.f8  (행 = 캔들 1개, 시간순)
+#  - 뒤에 붙이기만 함 (마지막 캔들은 제자리 덮어쓰기) -> ts 파일 길이가 곧 행 수
+#    (쓰기 전에 모든 파일을 ts 행 수로 잘라냄 -> 중간에 죽어 남은 값 조각이 다음 행을 밀지 않음)
+#  - 쓰기는 종목별 잠금 파일(flock) -> 앱과 backfill CLI 가 동시에 같은 파일을 써도 안전
+#  - 읽기는 np.memmap 뷰 (복사 없이 지표 계산에 바로 사용), 구간은 ts 이분 탐색
+#  - 과거 채우기: python candle_store.py backfill --interval minute15 --days 365
+# -----------------------------------------------------------------------------
+STORE_DIR = os.getenv("JAVIS_CANDLE_DIR", os.path.join(os.getenv("JAVIS_STATE_DIR", ".javis_state"), "candles"))
+PAGE = 200              # 업비트 캔들 API 요청 1회 최대 개수
+
+
+def _frame_arrays(df):
+    ts = df.index.values.astype('datetime64[ns]').astype('int64')
+    data = np.column_stack([df[c].to_numpy(dtype=np.float64) if c in df else np.zeros(len(df)) for c in COLS])
+    return ts, data
+
+
+class CandleSeries:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._views = None      # (행 수, ts, {컬럼: memmap})
+
+    def _file(self, col):
+        return os.path.join(self.path, "ts.i8" if col == 'ts' else f"{col}.f8")
+
+    def __len__(self):
+        try: return os.path.getsize(self._file('ts')) // 8
+        except OSError: return 0
+
+    # 스레드 잠금 + 프로세스 간 파일 잠금 (쓰기 전용)
+    @contextmanager
+    def _locked(self):
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, ".lock"), "a") as lf:
+                if fcntl: fcntl.flock(lf, fcntl.LOCK_EX)
+                try: yield
+                finally:
+                    if fcntl: fcntl.flock(lf, fcntl.LOCK_UN)
+
+    # ts 행 수보다 긴 파일 (값 컬럼 쓰다가 / ts 쓰다가 중단된 흔적) 을 행 수에 맞춤
+    def _trim(self, n):
+        for col in ('ts',) + tuple(COLS):
+            f = self._file(col)
+            try:
+                if os.path.getsize(f) > n * 8: os.truncate(f, n * 8)
+            except FileNotFoundError: pass
+
+    def _ts_at(self, i):
+        with open(self._file('ts'), 'rb') as f:
+            f.seek(i * 8)
+            return int(np.frombuffer(f.read(8), dtype='int64')[0])
+
+    def first_ts(self):
+        return self._ts_at(0) if len(self) else None
+
+    def last_ts(self):
+        n = len(self)
+        return self._ts_at(n - 1) if n else None
+
+    # 정렬된 캔들 반영: 저장된 마지막 캔들보다 오래된 건 무시, 같은 시각은 덮어쓰기
+    def append(self, ts, data):
+        if len(ts) == 0: return 0
+        with self._locked():
+            n = len(self)
+            self._trim(n)
+            last = self.last_ts()
+            if last is not None:
+                same = np.flatnonzero(ts == last)
+                if len(same):
+                    for k, col in enumerate(COLS):
+                        with open(self._file(col), 'r+b') as f:
+                            f.seek((n - 1) * 8); f.write(np.float64(data[same[-1], k]).tobytes())
+                keep = ts > last
+                ts, data = ts[keep], data[keep]
+            if len(ts) == 0: return 0
+            # 값 컬럼 먼저, ts 마지막 -> 도중에 읽어도 ts 길이만큼은 항상 완전한 행
+            for k, col in enumerate(COLS):
+                with open(self._file(col), 'ab') as f: f.write(np.ascontiguousarray(data[:, k]).tobytes())
+            with open(self._file('ts'), 'ab') as f: f.write(np.ascontiguousarray(ts, dtype='int64').tobytes())
+            self._views = None
+            return len(ts)
+
+    # 과거 구간 앞에 붙이기 (채우기 전용, 파일 교체)
+    def prepend(self, ts, data):
+        with self._locked():
+            n = len(self)
+            self._trim(n)
+            if n:
+                old_ts, old = self._read_all()
+                keep = ts < old_ts[0]
+                ts = np.concatenate([ts[keep], old_ts]); data = np.vstack([data[keep], old])
+            for k, col in enumerate(['ts'] + list(COLS)):
+                arr = ts.astype('int64') if col == 'ts' else np.ascontiguousarray(data[:, k - 1])
+                tmp = self._file(col) + ".tmp"
+                with open(tmp, 'wb') as f: f.write(arr.tobytes()); f.flush(); os.fsync(f.fileno())
+                os.replace(tmp, self._file(col))
+            self._views = None
+            return len(ts) - n
+
+    def _read_all(self):
+        n = len(self)
+        ts = np.fromfile(self._file('ts'), dtype='int64', count=n)
+        data = np.column_stack([np.fromfile(self._file(c), dtype=np.float64, count=n) for c in COLS])
+        return ts, data
+
+    def _mapped(self):
+        n = len(self)
+        v = self._views
+        if v is not None and v[0] == n: return v
+        if n == 0: v = (0, np.empty(0, dtype='int64'), {c: np.empty(0) for c in COLS})
+        else:
+            v = (n, np.memmap(self._file('ts'), dtype='int64', mode='r', shape=(n,)),
+                 {c: np.memmap(self._file(c), dtype=np.float64, mode='r', shape=(n,)) for c in COLS})
+        self._views = v
+        return v
+
+    # 구간 읽기 -> (ts, {컬럼: 배열}) 모두 memmap 뷰 (복사 없음)
+    #  start/end: ns (KST naive, end 포함), count: 끝에서부터 개수
+    def read(self, start=None, end=None, count=None):
+        with self.lock: n, ts, cols = self._mapped()
+        lo = 0 if start is None else int(np.searchsorted(ts, start, 'left'))
+        hi = n if end is None else int(np.searchsorted(ts, end, 'right'))
+        if count is not None: lo = max(lo, hi - count)
+        return ts[lo:hi], {c: a[lo:hi] for c, a in cols.items()}
+
+
+class CandleStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.series_map = {}
+        self.lock = threading.Lock()
+
+    def series(self, ticker, interval):
+        key = (ticker, interval)
+        with self.lock:
+            if key not in self.series_map: self.series_map[key] = CandleSeries(os.path.join(self.root, interval, ticker))
+            return self.series_map[key]
+
+    def tickers(self, interval):
+        try: return sorted(os.listdir(os.path.join(self.root, interval)))
+        except FileNotFoundError: return []
+
+    def append_frame(self, ticker, interval, df):
+        if df is None or len(df) == 0: return 0
+        return self.series(ticker, interval).append(*_frame_arrays(df))
+
+    def read(self, ticker, interval, start=None, end=None, count=None):
+        return self.series(ticker, interval).read(_ns(start), _ns(end), count)
+
+    # 복사본 DataFrame (백테스트/화면용)
+    def frame(self, ticker, interval, start=None, end=None, count=None):
+        ts, cols = self.read(ticker, interval, start, end, count)
+        return pd.DataFrame({c: np.array(a) for c, a in cols.items()},
+                            index=pd.DatetimeIndex(np.array(ts).astype('datetime64[ns]')))
+
+    # ----- 과거 채우기 -----
+    # to_ts 이전(미포함)부터 과거 방향으로 200개씩, stop_ts 이하가 나오면 중단
+    def _page_back(self, ticker, interval, to_ts, stop_ts, fetcher):
+        frames = []
+        to = to_ts
+        while True:
+            utc = None if to is None else (pd.Timestamp(to) - timedelta(seconds=KST_OFFSET)).strftime("%Y-%m-%d %H:%M:%S")
+            try:
+                with priority('scan'):
+                    df = SCHEDULER.call('candle', fetcher, ticker, interval=interval, count=PAGE, to=utc)
+            except Exception as e:
+                logging.info(f"과거 캔들 조회 실패 {ticker} {interval} (to={utc}): {e}")
+                break
+            if df is None or len(df) == 0: break
+            frames.append(df)
+            to = df.index[0].value
+            if (stop_ts is not None and to <= stop_ts) or len(df) < PAGE: break
+        if not frames: return None
+        df = pd.concat(frames).sort_index()
+        df = df[~df.index.duplicated(keep='last')]
+        return df if stop_ts is None else df[df.index.values.astype('datetime64[ns]').astype('int64') >= stop_ts]
+
+    # 저장된 마지막 캔들 이후 + since 까지의 과거를 채움 -> 추가된 캔들 수
+    def backfill(self, ticker, interval, since, fetcher=None):
+        fetcher = fetcher or fetch_ohlcv
+        s = self.series(ticker, interval)
+        since_ts = _ns(since)
+        added = 0
+        last = s.last_ts()
+        if last is not None:
+            df = self._page_back(ticker, interval, None, last, fetcher)
+            if df is not None: added += s.append(*_frame_arrays(df))
+        first = s.first_ts()
+        if first is None or first > since_ts:
+            df = self._page_back(ticker, interval, first, since_ts, fetcher)
+            if df is not None and len(df):
+                added += s.prepend(*_frame_arrays(df)) if first is not None else s.append(*_frame_arrays(df))
+        return added
+
+
+def _ns(t):
+    if t is None or isinstance(t, (int, np.integer)): return t
+    return pd.Timestamp(t).value
+
+
+CANDLE_STORE = CandleStore()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("backfill")
+    b.add_argument("--interval", default="minute15")
+    b.add_argument("--days", type=float, default=30)
+    b.add_argument("--tickers", nargs="*")
+    b.add_argument("--root", default=STORE_DIR)
+    i = sub.add_parser("info")
+    i.add_argument("--interval", default="minute15")
+    i.add_argument("--root", default=STORE_DIR)
+    a = ap.parse_args(argv)
+    store = CandleStore(a.root)
+
+    if a.cmd == "backfill":
+        tickers = a.tickers or SCHEDULER.call('market', pyupbit.get_tickers, fiat="KRW")
+        since = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=KST_OFFSET) - timedelta(days=a.days)
+        t0 = time.time()
+        total = 0
+        for k, t in enumerate(tickers):
+            n = store.backfill(t, a.interval, since)
+            total += n
+            print(f"[{k + 1}/{len(tickers)}] {t}: +{n} (총 {len(store.series(t, a.interval))})")
+        print(f"완료: {total:,}개 캔들, {time.time() - t0:.1f}초")
+    else:
+        for t in store.tickers(a.interval):
+            ts, _ = store.read(t, a.interval)
+            if len(ts): print(f"{t}: {len(ts):,}개 {pd.Timestamp(ts[0])} ~ {pd.Timestamp(ts[-1])}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,548 @@
+import time
+import os
+from dotenv import load_dotenv
+from datetime import datetime
+from indicators import INDICATOR_BANK
+from timeframes import MTF, MTF_FILTER, CONTEXT
+from scan_pipeline import iter_scan_inputs
+from sharded_scan import get_sharded_scanner, SCAN_PROCS, MIN_SHARD
+from adaptive_scheduler import ADAPTIVE_SCAN, SCAN_WINDOW
+from candle_cache import CANDLE_CACHE
+from market_stream import get_market_stream
+from prescreen import prescreen, Funnel
+from orderbook import ORDERBOOKS, depth_metrics
+from quotes import QUOTES
+from market_meta import MARKET_META
+from notifier import get_notifier
+from metrics import METRICS
+from exchange import get_executor
+from paper import get_paper_executor
+from request_scheduler import priority
+
+# -----------------------------------------------------------------------------
+# [코어] 분석/매매 로직 (Streamlit 비의존)
+#  - javis.py(UI) 와 engine.py(백그라운드 엔진) 가 함께 사용
+# -----------------------------------------------------------------------------
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# [API] - 핵심 패치 적용 (공백, 줄바꿈, 따옴표 자동 제거)
+# -----------------------------------------------------------------------------
+def _secret(key_name):
+    # Streamlit 밖(헤드리스 엔진)에서는 secrets 가 없으므로 조용히 건너뜀
+    try:
+        import streamlit as st
+        if key_name in st.secrets: return str(st.secrets[key_name])
+    except: pass
+    return None
+
+def load_key(key_name):
+    try:
+        # 1. Streamlit Secrets에서 먼저 찾기 / 2. 없으면 환경변수(os.getenv)에서 찾기
+        val = _secret(key_name) or os.getenv(key_name)
+        
+        if val:
+            # 줄바꿈(\n), 따옴표(", '), 양쪽 공백 제거 -> 순수 키값만 추출
+            return val.strip().replace('\n', '').replace('"', '').replace("'", "")
+        return None
+    except:
+        return None
+
+access_key = load_key("UPBIT_ACCESS_KEY")
+secret_key = load_key("UPBIT_SECRET_KEY")
+tele_token = load_key("TELEGRAM_TOKEN")
+tele_id = load_key("TELEGRAM_CHAT_ID")
+
+# [스캔 대상] 마켓 목록 (예: JAVIS_SCAN_FIATS=KRW,BTC,USDT) - 자동 매수는 원화 마켓만
+SCAN_FIATS = [f.strip() for f in os.getenv("JAVIS_SCAN_FIATS", "KRW").split(",") if f.strip()]
+
+# [실시간 모드] JAVIS_STREAM=1 이면 WebSocket 최신 상태에서 시세/호가를 읽음 (없으면 REST)
+STREAM_MODE = os.getenv("JAVIS_STREAM", "0") == "1"
+
+# [모의투자] JAVIS_PAPER=1 이면 주문/잔고를 가상 거래소(paper.py)로 (실계좌 미사용)
+PAPER_MODE = os.getenv("JAVIS_PAPER", "0") == "1"
+
+# [캔들 저장소] 실시간 캔들 캐시 <-> 디스크 저장소 연결 (엔진 시작 / 샤드 작업 프로세스에서 호출)
+#  - 콜드 스타트는 디스크에서, 받은 캔들은 디스크로 (JAVIS_CANDLE_STORE=0 이면 끔)
+CANDLE_STORE_ON = os.getenv("JAVIS_CANDLE_STORE", "1") == "1"
+
+def attach_candle_store():
+    if not CANDLE_STORE_ON: return None
+    from candle_store import CANDLE_STORE
+    CANDLE_CACHE.attach(CANDLE_STORE)
+    return CANDLE_STORE
+
+def live_stream():
+    return get_market_stream() if STREAM_MODE else None
+
+# 여러 종목 현재가: 실시간 값 우선, 나머지는 시세 스냅샷(요청 1회)에서
+def get_live_prices(tickers):
+    s = live_stream()
+    prices = {}
+    if s:
+        for t in tickers:
+            p = s.price(t)
+            if p is not None: prices[t] = p
+    rest = [t for t in tickers if t not in prices]
+    if rest: prices.update(QUOTES.prices(rest))
+    return prices
+
+def get_live_price(ticker):
+    return get_live_prices([ticker]).get(ticker)
+
+def get_live_orderbook(ticker):
+    s = live_stream()
+    ob = s.orderbook(ticker) if s else None
+    if ob is None: ob = ORDERBOOKS.get(ticker)
+    return ob
+
+# [거래소] keep-alive 세션을 쓰는 공용 클라이언트 / 주문 실행 엔진 (모의투자면 가상 거래소)
+def order_executor():
+    if PAPER_MODE: return get_paper_executor(get_live_orderbook, get_live_price)
+    return get_executor(access_key, secret_key)
+
+def exchange():
+    return order_executor().client
+
+def fmt_price(price):
+    if price < 1: return f"{price:,.4f}원"
+    elif price < 100: return f"{price:,.2f}원"
+    else: return f"{price:,.0f}원"
+
+# -----------------------------------------------------------------------------
+# [기능] 텔레그램
+# -----------------------------------------------------------------------------
+# 큐에 넣고 바로 리턴 (전송/재시도/묶음은 notifier 백그라운드 스레드)
+def send_telegram_message(text):
+    if not tele_token or not tele_id: return
+    if PAPER_MODE: text = f"📝 [모의투자]\n{text}"
+    try: get_notifier(tele_token, tele_id).notify(text)
+    except: pass
+
+# -----------------------------------------------------------------------------
+# [기능] 매수/매도 로직
+# -----------------------------------------------------------------------------
+# 주문은 실행 엔진으로 제출 (UUID 체결 추적 -> 화면 '최근 주문'에 체결 상태 표시)
+def execute_buy_logic(ticker, buy_amount, cut_trigger, strategy_name):
+    try:
+        with priority('entry'):
+            curr_cash = exchange().get_balance("KRW")
+            
+            if curr_cash < buy_amount: buy_amount = curr_cash * 0.999
+            if buy_amount < 5000: return False, f"잔액 부족 (최소 5000원 필요)"
+
+        buy_res = order_executor().submit_buy(ticker, buy_amount).result()
+        if not buy_res or 'error' in buy_res: return False, f"매수 실패: {buy_res}"
+        
+        msg = (
+            f"🦅 **자비스 매수 체결 (V15.9.40)**\n\n"
+            f"🎯 종목: {ticker}\n"
+            f"💡 등급: {strategy_name}\n"
+            f"💰 투입: {buy_amount:,.0f}원\n"
+            f"🛡️ 손절가: {fmt_price(cut_trigger)}"
+        )
+        send_telegram_message(msg)
+        return True, "SUCCESS"
+    except Exception as e:
+        return False, str(e)
+
+def sell_all_holdings():
+    try:
+        with priority('exit'): balances = exchange().get_balances()
+        prices = get_live_prices([f"KRW-{b['currency']}" for b in balances if b['currency'] != 'KRW'])
+        # 전 종목 동시 매도 (주문 제한 안에서 한 번에) -> UUID 받은 것만 카운트
+        results = order_executor().liquidate(prices, balances=balances)
+        sold_count = sum(1 for r in results.values() if r and 'uuid' in r)
+        if sold_count > 0: send_telegram_message(f"🧹 전체 청산 완료 ({sold_count}종목)")
+        return sold_count
+    except: return 0
+
+# 자동/수동 매도 모두 청산 우선순위 (스캔이 밀려 있어도 먼저 나감) + UUID 체결 추적
+def sell_market_order(ticker, volume):
+    try: return order_executor().submit_sell(ticker, volume).result()
+    except Exception as e: return {'error': str(e)}
+
+# 최근 주문 체결 상태 (wait / done / cancel / unknown)
+def recent_orders(n=10):
+    try: return order_executor().recent(n)
+    except: return []
+
+# -----------------------------------------------------------------------------
+# [엔진 1] 시장 날씨
+# -----------------------------------------------------------------------------
+def analyze_market_weather():
+    try:
+        # 저장된 15분봉으로 일봉 재구성 (최근 것일 때만), 모자라면 일봉 API
+        btc_df = MTF.frame("KRW-BTC", "day", count=20, max_stale=1800)
+        if btc_df is None: btc_df = CANDLE_CACHE.get("KRW-BTC", interval="day", count=20, max_age=60)
+        if btc_df is None or len(btc_df) < 20: return 0, 0, 0
+        curr_price = btc_df['close'].iloc[-1]
+        ma5 = btc_df['close'].rolling(5).mean().iloc[-1] 
+        change_rate = (btc_df['close'].iloc[-1] - btc_df['open'].iloc[-1]) / btc_df['open'].iloc[-1] * 100
+        return curr_price, ma5, change_rate
+    except: return 0, 0, 0
+
+# -----------------------------------------------------------------------------
+# [엔진 2] 👁️ 호가창 X-Ray
+# -----------------------------------------------------------------------------
+def analyze_orderbook_depth(ticker, ob=None):
+    try:
+        if ob is None: ob = get_live_orderbook(ticker)
+        if not ob: return 0, False, False
+        # 상위 5호가 매수/매도 잔량 지표 (orderbook.depth_metrics 와 청산 로직이 같은 계산 사용)
+        m = depth_metrics([ob])
+        return m['ratio'][0], bool(m['real_wall'][0]), bool(m['fake_wall'][0])
+    except: return 0, False, False
+
+# -----------------------------------------------------------------------------
+# [엔진 3] 👁️ 지표 계산 (OBV 포함)
+# -----------------------------------------------------------------------------
+# calculate_god_indicators -> indicators.py (넘파이 엔진, 루프 제거 / 값 동일)
+
+# 유의 종목 set (종목 목록 캐시에서, 스캔마다 API 호출 X)
+def get_risk_tickers():
+    try: return MARKET_META.risk_tickers()
+    except: return frozenset()
+
+# -----------------------------------------------------------------------------
+# [엔진 4] 듀얼 코어 분석
+# -----------------------------------------------------------------------------
+def analyze_quant_coin(ticker, df=None, ob=None):
+    try:
+        if df is None: df = CANDLE_CACHE.get(ticker, interval="minute15", count=100)
+        if df is None or len(df) < 20: return None
+        
+        row = df.iloc[-1]
+        close = row['close']
+        open_p = row['open']
+        high_p = row['high']
+        volume = row['volume']
+        
+        # 종목별 스트리밍 지표: 새로 닫힌/갱신된 캔들만 반영 (전체 재계산 X)
+        with METRICS.timer('indicator_seconds'): ind = INDICATOR_BANK.update(ticker, df)
+        mfi, vwap, is_divergence, rsi = ind['mfi'], ind['vwap'], ind['is_divergence'], ind['rsi']
+        strength, ma20 = ind['strength'], ind['ma20']
+        ratio, is_wall, is_fake_wall = analyze_orderbook_depth(ticker, ob)
+        
+        avg_vol = ind['avg_vol20']
+        rvol = volume / avg_vol if avg_vol > 0 else 0
+
+        if is_fake_wall: return None 
+        if rsi >= 70: return None 
+
+        score = 0
+        reasons = []
+        strategy_type = ""
+
+        # [전략 A] 스나이퍼
+        if close > ma20:
+            if ma20 > 0 and close <= ma20 * 1.03:
+                sniper_score = 0
+                if close > ma20: sniper_score += 40
+                if strength >= 100: sniper_score += 20
+                if rvol >= 2.0: sniper_score += 20
+                if is_divergence: sniper_score += 10
+                
+                if sniper_score >= 70:
+                    strategy_type = "🔫추세포착"
+                    score = sniper_score
+                    reasons.append("정배열 돌파")
+                    reasons.append(f"강도{int(strength)}%")
+
+        # [전략 B] 잠입
+        if not strategy_type: 
+            max_price = ind['close_max20']
+            max_obv = ind['obv_max20']
+            current_obv = ind['obv']
+            
+            if close < max_price * 0.98:
+                if current_obv >= max_obv * 0.99: 
+                    strategy_type = "🕵️세력매집"
+                    score = 85 
+                    reasons.append("가격횡보중")
+                    reasons.append("OBV상승(매집)")
+
+        if not strategy_type or score < 70: return None
+        
+        body = abs(close - open_p)
+        upper_shadow = high_p - max(close, open_p)
+        if body > 0 and upper_shadow > body * 2: return None
+
+        # [상위봉 정렬] 1시간/4시간봉이 하락 추세면 탈락 (15분봉 재구성 -> API 추가 호출 없음)
+        with METRICS.timer('mtf_seconds'): mtf = MTF.context(ticker, df)
+        if MTF_FILTER and mtf['against']: return None
+        if mtf['aligned']: reasons.append("상위봉정렬")
+
+        reasons.insert(0, strategy_type)
+        cut_price = vwap * 0.97
+        target_price = close * 1.03
+
+        return {
+            't': ticker, 'p': close, 'prob': score,
+            'reasons': ", ".join(reasons),
+            'pos_ratio': 0.3, 'cut': cut_price, 'target': target_price,
+            'vwap': vwap, 'divergence': is_divergence, 'rsi': rsi,
+            'strength': strength, 'ma20': ma20, 'found_time': datetime.now(),
+            'mtf': {iv: mtf[iv]['trend'] for iv in CONTEXT}
+        }
+    except: return None
+
+# 1시간 지난 신호 정리 (저장소 보관함이면 found_at 인덱스로, 일반 dict 면 전체 확인)
+def expire_report(report):
+    if hasattr(report, 'expire'): return report.expire()
+    current_time = datetime.now()
+    expired_keys = []
+    for k, v in list(report.items()):
+        if (current_time - v['found_time']).total_seconds() > 3600: expired_keys.append(k)
+    for k in expired_keys: report.pop(k, None)
+    return expired_keys
+
+# [적응형 스캔] 잔고 / 예선 결과는 SCAN_WINDOW(30초) 동안 재사용 (5초 회차마다 다시 받지 않음)
+#  - 자동 매수가 나가면 바로 버림 -> 다음 회차가 새 잔고로 보유 개수 확인
+_PASS_CACHE = {}
+
+# [핵심] 스캔 로직 (투명 인간 모드 + 500원 수익 보장형 배팅)
+#  - report: 신호 보관 dict (엔진 소유), progress: 진행률 콜백 (frac, text)
+#  - stats: 단계별 통과 개수/시간을 채워 돌려줄 dict (선택)
+#  - adaptive: 예선 통과 종목 중 적응형 스케줄러가 고른 (기한 지난) 종목만 채점
+#  - 알림: 보관함에 처음 들어온 신호만 (이미 있는 종목을 다시 잡아도 재알림 없음)
+def scan_whole_market(total_cash, report, auto_mode=False, target_list=None, auto_buy=False, progress=None, stats=None,
+                      adaptive=False):
+    try:
+        funnel = Funnel()
+        upbit_check = exchange()
+        reuse = adaptive and not target_list and time.time() - _PASS_CACHE.get('at', 0) < SCAN_WINDOW
+        if reuse: balances = _PASS_CACHE['balances']
+        else:
+            balances = upbit_check.get_balances()
+            _PASS_CACHE.clear()
+        
+        # 1. 1차 필터: 장부상 보유 종목 확인
+        held_tickers = []
+        for b in balances:
+            total_held_qty = float(b['balance']) + float(b['locked'])
+            # 1000원 이상이면 '보유 중'으로 판단 (알림 차단용)
+            if b['currency'] != 'KRW' and total_held_qty * float(b['avg_buy_price']) > 1000:
+                held_tickers.append(f"KRW-{b['currency']}")
+
+        # [NEW] 투명 인간 처리 (LINK, ERA는 카운트에서 제외)
+        ghost_tickers = ['KRW-LINK', 'KRW-ERA']
+        active_count = 0
+        for t in held_tickers:
+            if t not in ghost_tickers:
+                active_count += 1
+
+        status_log = f"👁️ 분석 중... (보유 {len(held_tickers)}개 / 유효 {active_count}개)"
+        if active_count >= 3 and auto_buy:
+            status_log = f"👁️ 분석 중... (유효 3개 달성 ➔ 자동매수 일시정지)"
+
+        if target_list and len(target_list) > 0: tickers = target_list
+        else:
+            tickers = [t for fiat in SCAN_FIATS for t in MARKET_META.tickers(fiat)]
+            CANDLE_CACHE.retain(tickers, "minute15")  # 상폐/제외 종목 캐시 정리
+            INDICATOR_BANK.retain(tickers)
+            MTF.retain(tickers)
+            ADAPTIVE_SCAN.retain(tickers)
+        if live_stream(): live_stream().set_codes(tickers, 'scan')
+            
+        risk_tickers = get_risk_tickers()
+        
+        if progress: progress(0, status_log)
+        
+        funnel.mark("전체", len(tickers))
+        
+        # [예선] 시세 스냅샷 1회로 가망 없는 종목 제외 (전체 스캔일 때만 / 지정 종목은 그대로)
+        drop_counts = {}
+        if reuse and _PASS_CACHE.get('universe') == tickers:
+            tickers, drop_counts = list(_PASS_CACHE['passed']), _PASS_CACHE['drops']
+        else:
+            current_data = QUOTES.snapshot(tickers, force=True)
+            universe = tickers
+            if not target_list:
+                # 거래대금 기준이 원화라서 원화 마켓만 예선 (BTC/USDT 마켓은 그대로 본선)
+                krw, other = [t for t in tickers if t.startswith("KRW-")], [t for t in tickers if not t.startswith("KRW-")]
+                krw, drop_counts = prescreen(current_data, krw)
+                tickers = krw + other
+            if adaptive and not target_list:
+                _PASS_CACHE.update(universe=universe, passed=list(tickers), drops=drop_counts)
+                _PASS_CACHE.setdefault('balances', balances); _PASS_CACHE.setdefault('at', time.time())
+        funnel.mark("예선통과", len(tickers))
+        if adaptive and not target_list:
+            tickers = ADAPTIVE_SCAN.plan(tickers, report)
+            funnel.mark("우선순위", len(tickers))
+
+        new_findings = []
+        fresh = []              # 보관함에 처음 들어온 신호 (알림 대상)
+        fetched = 0
+        
+        # 신호 1건 처리: 유의 표시 / 배팅 금액 / 보관 / 자동 매수 (단일·샤드 스캔 공통)
+        def take(res):
+            market = res['t']
+            if market in risk_tickers: res['t'] = f"⚠️ {res['t']}"
+            
+            # =========================================================
+            # 💰 [500원 수익 보장형 배팅] (약 1.7만 원 최소값)
+            # =========================================================
+            min_seed_for_profit = 17000
+            
+            if res['prob'] >= 90:
+                bet_ratio = 0.5  # VIP: 50%
+                strategy_label = "👑VIP"
+            else:
+                bet_ratio = 0.1  # 일반: 10%
+                strategy_label = "🔫일반"
+            
+            calc_amount = total_cash * bet_ratio
+            final_bet = max(calc_amount, min_seed_for_profit)
+            final_bet = min(final_bet, total_cash * 0.999) 
+            
+            res['bet_money'] = final_bet
+            new_findings.append(res)
+
+            # 자동 매수 (LINK, ERA 제외한 카운트로 체크, 원화 마켓만)
+            is_green_light = res['p'] >= res['ma20']
+            can_auto_buy = active_count < 3 and market.startswith("KRW-")
+            
+            if auto_buy and can_auto_buy and res['prob'] >= 70 and res['strength'] >= 100.0 and is_green_light:
+                final_reason_tag = f"{strategy_label} + {res['reasons'].split(',')[0]}"
+                # 신호 확정 -> 매수 응답까지
+                with METRICS.timer('entry_signal_to_ack_seconds'):
+                    execute_buy_logic(res['t'], res['bet_money'], res['cut'], final_reason_tag)
+                res['reasons'] = "🤖자동매수 + " + res['reasons']
+                _PASS_CACHE.clear()
+            if res['t'] not in report: fresh.append(res)
+            report[res['t']] = res          # 자동매수 표시까지 끝난 뒤 보관 (저장소 기록 1회)
+
+        scanner = get_sharded_scanner() if SCAN_PROCS and len(tickers) >= MIN_SHARD else None
+        if scanner:
+            # [샤드 스캔] 수집은 스레드로 전부 모은 뒤, 채점만 작업 프로세스들에 나눠서
+            inputs = []
+            for i, x in enumerate(iter_scan_inputs(tickers)):
+                if progress: progress((i + 1) / len(tickers) * 0.5, f"{status_log} - {x[0]}")
+                if x[1] is not None: inputs.append(x)
+                else: ADAPTIVE_SCAN.observe(x[0], None)
+            fetched = len(inputs)
+            def shard_progress(done, total):
+                if progress: progress(0.5 + done / total * 0.5, f"{status_log} - 채점 {done}/{total}")
+            hits = {r['t']: r for r in scanner.score(inputs, shard_progress)}
+            for t, df, ob in inputs: ADAPTIVE_SCAN.observe(t, df, hits.get(t))
+            for res in hits.values(): take(res)
+        else:
+            # 캔들/호가 병렬 수집 -> 도착 순서대로 채점 (초당 제한은 파이프라인이 관리)
+            for i, (t, df, ob) in enumerate(iter_scan_inputs(tickers)):
+                if progress: progress((i + 1) / len(tickers), f"{status_log} - {t}")
+                if df is None:
+                    ADAPTIVE_SCAN.observe(t, None)
+                    continue
+                fetched += 1
+
+                res = analyze_quant_coin(t, df=df, ob=ob)
+                ADAPTIVE_SCAN.observe(t, df, res)
+                if res: take(res)
+            
+        funnel.mark("본선분석", fetched)
+        funnel.mark("신호", len(new_findings))
+        for st_ in funnel.stages: METRICS.set('scan_tickers', st_['count'], stage=st_['stage'])
+        METRICS.inc('scan_signals_total', len(new_findings))
+        if stats is not None:
+            stats.clear()
+            stats.update({'stages': funnel.stages, 'drops': drop_counts, 'summary': funnel.summary()})
+        if progress: progress(1, status_log)
+        
+        expire_report(report)
+
+        if auto_mode and fresh:
+            fresh.sort(key=lambda x: x['prob'], reverse=True)
+            best = fresh[0]
+            
+            clean_ticker_name = best['t'].replace('⚠️ ', '')
+            is_just_bought = "🤖자동매수" in best['reasons']
+            
+            # [알림] 보유 여부 2중 체크 (여긴 실제 보유 리스트인 held_tickers 사용 -> 중복매수 방지)
+            if clean_ticker_name not in held_tickers and not is_just_bought:
+                try:
+                    real_bal = upbit_check.get_balance(clean_ticker_name)
+                    if real_bal is None: real_bal = 0.0
+                except: real_bal = 0.0
+                
+                # 1,000원 미만일 때만 알림
+                if real_bal * best['p'] < 1000:
+                    if (datetime.now() - best['found_time']).total_seconds() < 60:
+                        strategy_type = best['reasons'].split(',')[0]
+                        tele_msg = (
+                            f"🦅 **자비스 사냥 성공 (V15.9.39)**\n\n"
+                            f"💎 종목: {best['t']}\n"
+                            f"🧭 등급: {'👑VIP' if best['prob']>=90 else '🔫일반'}\n"
+                            f"📊 점수: {best['prob']}점 (강도 {int(best['strength'])}%)\n"
+                            f"💰 추천금: {best['bet_money']:,.0f}원\n"
+                        )
+                        send_telegram_message(tele_msg)
+
+        report_list = list(report.values())
+        report_list.sort(key=lambda x: x['found_time'], reverse=True)
+
+        return report_list, status_log
+    except Exception as e: return [], f"오류: {e}"
+
+# peaks: 트레일링 고점 dict (엔진 소유)
+def get_full_asset_info(peaks):
+    try:
+        upbit = exchange()
+        balances = upbit.get_balances()
+        portfolio = []
+        total_krw = 0
+        total_assets = 0
+        prices = get_live_prices([f"KRW-{b['currency']}" for b in balances if b['currency'] != 'KRW'])
+        
+        for b in balances:
+            if b['currency'] == 'KRW':
+                total_krw = float(b['balance']) + float(b['locked'])
+                total_assets += total_krw
+                continue
+                
+            ticker = f"KRW-{b['currency']}"
+            amount = float(b['balance']) + float(b['locked'])
+            if amount == 0: continue
+            
+            avg = float(b['avg_buy_price'])
+            curr = prices.get(ticker)
+            if not curr: curr = avg
+            val = amount * curr
+            total_assets += val
+            profit_pct = (curr - avg) / avg * 100
+            
+            if ticker not in peaks:
+                peaks[ticker] = curr
+            else:
+                if curr > peaks[ticker]:
+                    peaks[ticker] = curr
+            
+            peak = peaks[ticker]
+            drop_rate = (peak - curr) / peak * 100
+            
+            should_sell = False
+            reason = ""
+            
+            # [익절 로직] 3.0% (약 500원 수익) 넘으면 감시 시작 -> 고점 대비 1.5% 빠지면 매도
+            if curr < avg * 0.97: should_sell = True; reason = "🚨 손절 (-3%)"
+            elif profit_pct >= 3.0 and drop_rate >= 1.5: should_sell = True; reason = f"💰 익절 (고점 대비 -1.5% 반납)"
+
+            portfolio.append({
+                "종목": ticker, "수익률": profit_pct, "평가금액": val, 
+                "should_sell": should_sell, "reason": reason, "보유수량": amount, "평단": avg
+            })
+            
+        # [방어벽 붕괴] 손익 애매한 종목 호가를 한 번에 조회해서 일괄 판정
+        check = [p for p in portfolio if not p['should_sell'] and p['수익률'] < 0.5]
+        if check:
+            try:
+                if not live_stream(): ORDERBOOKS.prefetch([p['종목'] for p in check])
+                obs = [get_live_orderbook(p['종목']) for p in check]
+                collapse = depth_metrics(obs)['bid_collapse']
+                for p, ob, c in zip(check, obs, collapse):
+                    if ob and c: p['should_sell'] = True; p['reason'] = "📉 방어벽 붕괴 (세력 이탈 감지)"
+            except: pass
+
+        if live_stream(): live_stream().set_codes([p['종목'] for p in portfolio], 'holdings')
+        return total_krw, total_assets, portfolio
+    except: return 0, 0, []
@@ -0,0 +1,278 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+import core
+from exit_engine import ExitEngine
+from request_scheduler import SCHEDULER, priority
+from metrics import METRICS, profile_call, serve as serve_metrics
+from adaptive_scheduler import ADAPTIVE, ADAPTIVE_SCAN, PASS_INTERVAL
+from state_store import get_state_store, SignalBook
+
+# -----------------------------------------------------------------------------
+# [엔진] 백그라운드 스캐너/트레이더 (Streamlit 재실행과 분리)
+#  - 자산 갱신 + 청산 감시, 시장 날씨, 자동 스캔을 자체 스케줄러로 반복
+#  - 전체 시장 자동 스캔은 적응형 (5초마다 기한 지난 종목만, adaptive_scheduler.py)
+#  - UI(javis.py)는 snapshot() 만 읽고 configure()/request_scan() 으로 조작
+#  - 신호 보관함 / 감시 종목 / 지갑 스냅샷은 state_store(SQLite) 에 기록 -> 재시작해도 이어서
+#  - 단독 실행: python engine.py  (브라우저 없이 알림/자동매매 유지)
+# -----------------------------------------------------------------------------
+ASSET_INTERVAL = 5      # 자산/청산 감시 주기 (초)
+WEATHER_INTERVAL = 60   # 시장 날씨 주기 (초)
+SCAN_INTERVAL = 30      # 자동 스캔 주기 (초) - 적응형이면 PASS_INTERVAL
+EXIT_POLL_INTERVAL = 1  # 실시간 수신이 없을 때 보유 종목 시세 폴링 주기 (초)
+COMPACT_INTERVAL = 3600 # 상태 저장소 정리 주기 (초)
+
+
+class JarvisEngine:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.settings = {
+            'auto_scan': False, 'auto_trade': False, 'auto_buy': False,
+            'target_coins': None,   # None = 아직 UI 선택 없음 -> monitored_coins 사용
+        }
+        # 공유 상태 (상태 저장소에서 복원)
+        self.state = get_state_store()
+        self.quant_report = SignalBook(self.state)
+        # 청산 엔진: 고점은 파일로 유지, 가격이 들어올 때마다 즉시 판정
+        self.exits = ExitEngine(core.sell_market_order, core.send_telegram_message)
+        self.trailing_peaks = self.exits.peaks
+        self.monitored_coins = self.state.get('monitored_coins', [])
+        self.wallet_snapshot = self.state.get('wallet_snapshot', [])
+        self._saved = {}
+        self.cash, self.total, self.portfolio = 0, 0, []
+        self.weather = (0, 0, 0)
+        self.last_scan_msg = None
+        self.last_scan_time = 0
+        self.scan_progress = None      # (frac, text) - 스캔 중일 때만
+        self.scan_stats = {}           # 마지막 스캔의 단계별 개수/시간
+        self.last_error = None
+        self.updated_at = 0
+        self.profile_next = False      # 다음 스캔 1회 cProfile
+        self.last_profile = None
+
+        self._manual_scan = False
+        self._scan_thread = None       # 스캔은 별도 스레드 (엔진 스레드의 청산 폴링/잔고 갱신이 스캔을 기다리지 않게)
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = None
+        self._next = {'assets': 0, 'weather': 0, 'exits': 0, 'compact': time.time() + COMPACT_INTERVAL}
+
+    # ----- UI -> 엔진 -----
+    def start(self):
+        if self._thread and self._thread.is_alive(): return self
+        self._stop = False
+        self._thread = threading.Thread(target=self.run_forever, name="jarvis-engine", daemon=True)
+        self._thread.start()
+        return self
+
+    def _attach_stream(self):
+        s = core.live_stream()
+        if s and self._on_stream not in s.listeners: s.add_listener(self._on_stream)
+        return s
+
+    # 실시간 체결/호가 -> 청산 엔진 (수신 스레드에서 바로 판정)
+    def _on_stream(self, kind, code, msg):
+        if kind in ('trade', 'ticker'): self.exits.on_price(code, float(msg['trade_price']))
+        elif kind == 'orderbook': self.exits.on_orderbook(code, msg)
+
+    # 신규 상장 / 상장 폐지 알림
+    def _on_market_change(self, added, removed):
+        added = [t for t in added if t.startswith("KRW-")]
+        removed = [t for t in removed if t.startswith("KRW-")]
+        if not added and not removed: return
+        lines = [f"🆕 신규: {', '.join(added)}"] if added else []
+        if removed: lines.append(f"🚫 폐지: {', '.join(removed)}")
+        core.send_telegram_message("📋 **[자비스] 종목 변경**\n\n" + "\n".join(lines))
+
+    def stop(self):
+        self._stop = True
+        self._wake.set()
+
+    def configure(self, **kw):
+        with self.lock:
+            self.settings.update(kw)
+            if kw.get('target_coins') is not None: self.monitored_coins = list(kw['target_coins'])
+            self.exits.arm(self.monitored_coins, self.settings['auto_trade'])
+        self._save_lists()
+
+    # 감시 종목 / 지갑 스냅샷 -> 상태 저장소 (바뀐 것만)
+    def _save_lists(self):
+        with self.lock: cur = {'monitored_coins': list(self.monitored_coins), 'wallet_snapshot': list(self.wallet_snapshot)}
+        for k, v in cur.items():
+            if self._saved.get(k) == v: continue
+            try: self.state.set(k, v); self._saved[k] = v
+            except Exception as e: logging.info(f"상태 저장 실패 {k}: {e}")
+
+    def request_scan(self):
+        self._manual_scan = True
+        self._wake.set()
+
+    def request_profile(self):
+        self.profile_next = True
+
+    def refresh_now(self):
+        self._next['assets'] = 0
+        self._wake.set()
+
+    def clear_report(self):
+        with self.lock: self.quant_report.clear()
+
+    def snapshot(self):
+        orders = core.recent_orders()
+        with self.lock:
+            return {
+                'cash': self.cash, 'total': self.total, 'portfolio': list(self.portfolio),
+                'weather': self.weather, 'quant_report': self.quant_report.snapshot(),
+                'monitored_coins': list(self.monitored_coins), 'last_scan_msg': self.last_scan_msg,
+                'last_scan_time': self.last_scan_time, 'scan_progress': self.scan_progress,
+                'scan_stats': self.scan_stats,
+                'settings': dict(self.settings), 'last_error': self.last_error, 'updated_at': self.updated_at,
+                'exit_latency': self.exits.latency_stats(), 'exit_events': list(self.exits.events)[-5:], 'orders': orders,
+                'requests': SCHEDULER.stats(), 'profile': self.last_profile, 'profile_pending': self.profile_next,
+                'adaptive': ADAPTIVE_SCAN.stats() if self._adaptive() else None,
+            }
+
+    # ----- 작업 -----
+    def _refresh_assets(self):
+        cash, total, portfolio = core.get_full_asset_info(self.trailing_peaks)
+        current_tickers = [p['종목'] for p in portfolio]
+        with self.lock:
+            self.cash, self.total, self.portfolio = cash, total, portfolio
+            # [자동 등록 로직]
+            if not self.wallet_snapshot:
+                self.wallet_snapshot = current_tickers
+                if not self.monitored_coins: self.monitored_coins = list(current_tickers)
+            newly = [t for t in current_tickers if t not in self.wallet_snapshot]
+            registered = []
+            for nc in newly:
+                if nc not in self.monitored_coins:
+                    self.monitored_coins.append(nc); registered.append(nc)
+            if newly: self.wallet_snapshot = current_tickers
+            self.wallet_snapshot = [t for t in self.wallet_snapshot if t in current_tickers]
+            self.monitored_coins = [t for t in self.monitored_coins if t in current_tickers]
+            self.updated_at = time.time()
+            self.exits.arm(self.monitored_coins, self.settings['auto_trade'])
+        # 잔고 조회 실패(0, 0, []) 때 고점 / 저장된 감시 종목이 지워지지 않도록 성공했을 때만 동기화
+        if total > 0 or portfolio:
+            self.exits.sync_positions(portfolio)
+            self._save_lists()
+        for nc in registered:
+            core.send_telegram_message(f"🔭 **[자비스] 신규 감시 등록**\n\n✅ {nc} 종목을 자동 매도 대상에 추가했습니다.")
+        self._check_exits(portfolio)
+
+    # 자산 갱신에서 잡힌 신호 (방어벽 붕괴 포함) -> 청산 엔진으로 (중복 주문은 엔진이 막음)
+    def _check_exits(self, portfolio):
+        for p in portfolio:
+            if p['should_sell'] and self.exits.fire(p['종목'], p['reason']): self._next['assets'] = time.time() + 1
+
+    # 실시간 수신이 없으면 보유 종목 시세를 1초마다 한 번에 조회해서 판정
+    def _poll_exits(self):
+        held = list(self.exits.positions)
+        if not held: return
+        for t, p in core.get_live_prices(held).items(): self.exits.on_price(t, p)
+
+    # 자동 스캔이 전체 시장 대상일 때만 적응형 (감시 종목 스캔은 기존대로)
+    def _adaptive(self):
+        return ADAPTIVE and not self.monitored_coins
+
+    def _scan(self, manual):
+        auto_mode = not manual
+        targets = self.monitored_coins if (auto_mode and self.monitored_coins) else None
+
+        def progress(frac, text):
+            with self.lock: self.scan_progress = (frac, text)
+        stats = {}
+
+        kw = dict(auto_mode=auto_mode, target_list=targets, auto_buy=self.settings['auto_buy'],
+                  progress=progress, stats=stats, adaptive=auto_mode and targets is None and ADAPTIVE)
+        with priority('scan'), METRICS.timer('scan_seconds', mode='manual' if manual else 'auto'):
+            if self.profile_next:
+                self.profile_next = False
+                (report_list, log), prof = profile_call(core.scan_whole_market, self.cash, self.quant_report, **kw)
+                with self.lock: self.last_profile = prof
+            else:
+                report_list, log = core.scan_whole_market(self.cash, self.quant_report, **kw)
+        with self.lock:
+            self.scan_progress = None
+            self.scan_stats = stats
+            self.last_scan_msg = log if manual else f"🔄 감시 완료 ({datetime.now().strftime('%H:%M:%S')})"
+            self.last_scan_time = time.time()
+
+    def scanning(self):
+        return self._scan_thread is not None and self._scan_thread.is_alive()
+
+    def _scan_worker(self, manual):
+        try: self._scan(manual)
+        except Exception as e:
+            self.last_error = str(e)
+            logging.info(f"스캔 오류: {e}")
+            with self.lock: self.scan_progress = None; self.last_scan_time = time.time()
+        self._wake.set()
+
+    # 스캔 중이 아니면 스캔 스레드 시작 (한 번에 1개)
+    def _start_scan(self, manual):
+        if self.scanning(): return False
+        self._scan_thread = threading.Thread(target=self._scan_worker, args=(manual,), name="jarvis-scan", daemon=True)
+        self._scan_thread.start()
+        return True
+
+    def tick(self):
+        now = time.time()
+        stream = self._attach_stream()
+        if not stream and now >= self._next['exits']:
+            self._poll_exits()
+            self._next['exits'] = time.time() + EXIT_POLL_INTERVAL
+        if now >= self._next['assets']:
+            with METRICS.timer('asset_refresh_seconds'): self._refresh_assets()
+            self._next['assets'] = time.time() + ASSET_INTERVAL
+        if now >= self._next['weather']:
+            w = core.analyze_market_weather()
+            with self.lock: self.weather = w
+            self._next['weather'] = time.time() + WEATHER_INTERVAL
+        if self._manual_scan:
+            if self._start_scan(manual=True): self._manual_scan = False     # 진행 중인 스캔이 끝나면 시작
+        elif self.settings['auto_scan'] and now - self.last_scan_time > (PASS_INTERVAL if self._adaptive() else SCAN_INTERVAL):
+            self._start_scan(manual=False)
+        core.expire_report(self.quant_report)
+        if now >= self._next['compact']:
+            self.state.compact()
+            self._next['compact'] = time.time() + COMPACT_INTERVAL
+
+    def run_forever(self):
+        logging.info("자비스 엔진 시작")
+        core.attach_candle_store()
+        core.MARKET_META.add_listener(self._on_market_change)
+        core.MARKET_META.start()
+        serve_metrics()
+        while not self._stop:
+            try:
+                self.tick()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logging.info(f"엔진 오류: {e}")
+            self._wake.wait(1.0)
+            self._wake.clear()
+
+
+ENGINE = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global ENGINE
+    with _engine_lock:
+        if ENGINE is None: ENGINE = JarvisEngine().start()
+        return ENGINE
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    eng = JarvisEngine()
+    eng.configure(auto_scan=os.getenv("JAVIS_AUTO_SCAN", "1") == "1",
+                  auto_trade=os.getenv("JAVIS_AUTO_TRADE", "0") == "1",
+                  auto_buy=os.getenv("JAVIS_AUTO_BUY", "0") == "1")
+    try: eng.run_forever()
+    except KeyboardInterrupt: eng.stop()
@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from request_scheduler import SCHEDULER, RateLimited, priority
+
+# -----------------------------------------------------------------------------
+# [거래소 클라이언트] keep-alive 세션 하나를 계속 재사용 (pyupbit.Upbit 매번 생성 X)
+# [시세 클라이언트] 인증 없는 공개 API (캔들) - 429 는 RateLimited 예외, Remaining-Req 는 스케줄러에 반영
+#  (pyupbit.get_ohlcv 는 429 포함 모든 예외를 삼키고 None -> 스케줄러가 백오프할 수 없음)
+# [주문 실행 엔진] 주문 제한(초당 8회) 안에서 동시 주문 + UUID 체결 추적 + 일괄 청산
+# -----------------------------------------------------------------------------
+UPBIT_API = os.getenv("JAVIS_UPBIT_API", "https://api.upbit.com")
+MIN_ORDER_KRW = 5000
+CANDLE_PAGE = 200       # 캔들 요청 1회 최대 개수
+CANDLE_COLS = {'opening_price': 'open', 'high_price': 'high', 'low_price': 'low', 'trade_price': 'close',
+               'candle_acc_trade_volume': 'volume', 'candle_acc_trade_price': 'value'}
+
+
+def candle_path(interval):
+    if interval.startswith("minute"): return f"/v1/candles/minutes/{interval[6:]}"
+    return {'day': "/v1/candles/days", 'week': "/v1/candles/weeks", 'month': "/v1/candles/months"}[interval]
+
+
+class QuotationClient:
+    def __init__(self, base_url=UPBIT_API, pool_size=16, timeout=5):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # 스케줄러 밖에서 부르는 1회 요청 (호출자가 SCHEDULER.call 로 감쌈 -> 429 재시도 / 백오프)
+    def public(self, path, params, group):
+        resp = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+        SCHEDULER.observe(resp.headers.get('Remaining-Req'), group)
+        if resp.status_code == 429: raise RateLimited(resp.text)
+        if resp.status_code >= 400: raise RuntimeError(f"{path} {resp.status_code}: {resp.text[:200]}")
+        return resp.json()
+
+    # pyupbit.get_ohlcv 와 같은 DataFrame (KST naive 인덱스, 오래된 순), to: UTC "YYYY-mm-dd HH:MM:SS"
+    def get_ohlcv(self, ticker, interval="day", count=CANDLE_PAGE, to=None):
+        params = {'market': ticker, 'count': min(max(int(count), 1), CANDLE_PAGE)}
+        if to is not None: params['to'] = to
+        rows = self.public(candle_path(interval), params, 'candle')
+        idx = pd.DatetimeIndex([r['candle_date_time_kst'] for r in rows])
+        df = pd.DataFrame({v: np.array([r[k] for r in rows], dtype=np.float64) for k, v in CANDLE_COLS.items()}, index=idx)
+        return df.sort_index()
+
+
+class ExchangeClient(QuotationClient):
+    def __init__(self, access_key, secret_key, base_url=UPBIT_API, pool_size=16, timeout=5):
+        super().__init__(base_url, pool_size, timeout)
+        self.access = access_key
+        self.secret = secret_key
+
+    def _headers(self, query=None):
+        payload = {"access_key": self.access, "nonce": str(uuid.uuid4())}
+        if query:
+            m = hashlib.sha512()
+            m.update(urlencode(query, doseq=True).replace("%5B%5D=", "[]=").encode())
+            payload['query_hash'] = m.hexdigest()
+            payload['query_hash_alg'] = "SHA512"
+        return {"Authorization": f"Bearer {jwt.encode(payload, self.secret, algorithm='HS256')}"}
+
+    # 실패 시 예외 대신 {'error': ...} (pyupbit 결과와 같은 방식으로 검사 가능)
+    #  - 429 는 스케줄러가 백오프 후 재시도, Remaining-Req 는 매 응답마다 반영
+    def request(self, method, path, params=None, data=None, group='exchange'):
+        def send():
+            resp = self.session.request(method, self.base_url + path, params=params, json=data,
+                                        headers=self._headers(params or data), timeout=self.timeout)
+            SCHEDULER.observe(resp.headers.get('Remaining-Req'), group)
+            body = resp.json() if resp.content else {}
+            if resp.status_code == 429: raise RateLimited(body)
+            if resp.status_code >= 400:
+                return {'error': body.get('error', body) if isinstance(body, dict) else body, 'status': resp.status_code}
+            return body
+        try: return SCHEDULER.call(group, send)
+        except Exception as e:
+            return {'error': str(e)}
+
+    # ----- pyupbit.Upbit 호환 -----
+    def get_balances(self):
+        res = self.request("GET", "/v1/accounts")
+        if isinstance(res, dict) and 'error' in res: raise RuntimeError(f"잔고 조회 실패: {res['error']}")
+        return res
+
+    def get_balance(self, ticker="KRW"):
+        fiat = "KRW"
+        if '-' in ticker: fiat, ticker = ticker.split('-')
+        try:
+            for b in self.get_balances():
+                if b['currency'] == ticker and b.get('unit_currency', fiat) == fiat: return float(b['balance'])
+            return 0
+        except Exception as e:
+            logging.info(f"{e}")
+            return None
+
+    def buy_market_order(self, ticker, price):
+        return self.request("POST", "/v1/orders", data={"market": ticker, "side": "bid",
+                                                        "price": str(price), "ord_type": "price"}, group='order')
+
+    def sell_market_order(self, ticker, volume):
+        return self.request("POST", "/v1/orders", data={"market": ticker, "side": "ask",
+                                                        "volume": str(volume), "ord_type": "market"}, group='order')
+
+    def get_order(self, order_uuid):
+        return self.request("GET", "/v1/order", params={"uuid": order_uuid})
+
+
+class OrderExecutor:
+    def __init__(self, client, workers=8, poll_interval=0.5, track_timeout=30):
+        self.client = client
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order")
+        self.poll_interval = poll_interval
+        self.track_timeout = track_timeout
+        self.orders = {}          # uuid -> 주문 상태
+        self.lock = threading.Lock()
+        self._tracker = None
+
+    # ----- 주문 제출 (Future 반환) -----
+    def _record(self, res, ticker, side, started):
+        if res and 'uuid' in res:
+            with self.lock:
+                cutoff = time.time() - 3600
+                for k in [k for k, o in self.orders.items() if o['done_at'] and o['done_at'] < cutoff]: del self.orders[k]
+                self.orders[res['uuid']] = {'uuid': res['uuid'], 't': ticker, 'side': side, 'state': res.get('state', 'wait'),
+                                            'submitted_ms': (time.perf_counter() - started) * 1000,
+                                            'submitted_at': time.time(), 'done_at': None, 'executed_volume': 0.0}
+                if self._tracker is None:
+                    self._tracker = threading.Thread(target=self._track_loop, name="order-tracker", daemon=True)
+                    self._tracker.start()
+        return res
+
+    # 주문 스레드는 호출한 쪽 우선순위를 물려받지 않으므로 여기서 지정 (매도=청산, 매수=진입)
+    def _run(self, prio, fn, ticker, amount, side, started):
+        with priority(prio): return self._record(fn(ticker, amount), ticker, side, started)
+
+    def submit_sell(self, ticker, volume):
+        return self.pool.submit(self._run, 'exit', self.client.sell_market_order, ticker, volume, 'ask', time.perf_counter())
+
+    def submit_buy(self, ticker, krw):
+        return self.pool.submit(self._run, 'entry', self.client.buy_market_order, ticker, krw, 'bid', time.perf_counter())
+
+    # [일괄 청산] 잔고 1회 조회 -> 5,000원 이상 종목 동시 매도 (주문 제한은 버킷이 관리)
+    def liquidate(self, prices, balances=None, exclude=()):
+        balances = balances if balances is not None else self.client.get_balances()
+        futures = {}
+        for b in balances:
+            if b['currency'] == 'KRW': continue
+            ticker = f"KRW-{b['currency']}"
+            if ticker in exclude: continue
+            volume = float(b['balance']) + float(b['locked'])
+            if volume * prices.get(ticker, 0) > MIN_ORDER_KRW:
+                futures[ticker] = self.submit_sell(ticker, volume)
+        return {t: f.result() for t, f in futures.items()}
+
+    # ----- 체결 추적 -----
+    def _track_loop(self):
+        while True:
+            with self.lock:
+                open_orders = [o for o in self.orders.values() if o['done_at'] is None]
+                if not open_orders:
+                    self._tracker = None
+                    return
+            for o in open_orders:
+                res = self.client.get_order(o['uuid'])
+                now = time.time()
+                with self.lock:
+                    if 'error' not in res:
+                        o['state'] = res.get('state', o['state'])
+                        o['executed_volume'] = float(res.get('executed_volume') or 0)
+                    if o['state'] in ('done', 'cancel'): o['done_at'] = now
+                    elif now - o['submitted_at'] > self.track_timeout:
+                        o['state'] = 'unknown'; o['done_at'] = now
+            time.sleep(self.poll_interval)
+
+    def recent(self, n=20):
+        with self.lock:
+            return sorted(self.orders.values(), key=lambda o: o['submitted_at'], reverse=True)[:n]
+
+
+QUOTATION = None
+EXECUTOR = None
+_executor_lock = threading.Lock()
+
+def get_quotation():
+    global QUOTATION
+    with _executor_lock:
+        if QUOTATION is None: QUOTATION = QuotationClient()
+        return QUOTATION
+
+# CandleCache / 캔들 저장소 기본 fetcher (pyupbit.get_ohlcv 와 같은 인자)
+def fetch_ohlcv(ticker, interval="day", count=CANDLE_PAGE, to=None):
+    return get_quotation().get_ohlcv(ticker, interval, count, to)
+
+def get_executor(access_key, secret_key):
+    global EXECUTOR
+    with _executor_lock:
+        if EXECUTOR is None: EXECUTOR = OrderExecutor(ExchangeClient(access_key, secret_key))
+        return EXECUTOR
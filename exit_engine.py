@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from orderbook import depth_metrics
+from metrics import METRICS
+
+# -----------------------------------------------------------------------------
+# [청산 엔진] 틱 단위 손절 / 트레일링 익절 / 방어벽 붕괴 감시
+#  - 실시간 체결(또는 1초 폴링) 가격이 들어올 때마다 바로 판정 -> 즉시 매도 주문
+#  - 고점(trailing peak)은 파일에 저장해 재시작해도 유지 (저장은 백그라운드 / 주문 스레드 -> 수신 스레드는 디스크 대기 없음)
+#  - 트리거 가격 수신 ~ 주문 전송까지 지연 시간 기록
+# -----------------------------------------------------------------------------
+STATE_DIR = os.getenv("JAVIS_STATE_DIR", ".javis_state")
+STOP_LOSS = 0.97            # 평단 대비 -3% 손절
+TRAIL_START = 3.0           # +3% 부터 트레일링 감시
+TRAIL_DROP = 1.5            # 고점 대비 -1.5% 반납 시 익절
+COLLAPSE_MAX_PROFIT = 0.5   # 방어벽 붕괴는 수익 0.5% 미만일 때만
+RETRY_AFTER = 30            # 주문 후 잔고가 그대로면 재시도까지 대기 (초)
+FAIL_BACKOFF = (5, 300)     # 주문 실패 시 재시도 대기 (초): 5초부터 실패마다 2배, 최대 5분
+
+
+class PeakStore:
+    def __init__(self, path=None, min_interval=1.0):
+        self.path = path or os.path.join(STATE_DIR, "peaks.json")
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.dirty = False
+        self.last_flush = 0
+        self.peaks = self._load()
+        self._wake = threading.Event()
+        self._flusher = None
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f: return {k: float(v) for k, v in json.load(f).items()}
+        except FileNotFoundError: return {}
+        except Exception as e:
+            logging.info(f"고점 파일 읽기 실패: {e}")
+            return {}
+
+    # 원자적 저장 (임시 파일 -> rename), 파일 쓰기는 한 번에 하나씩 (같은 .tmp 를 동시에 쓰지 않게)
+    def flush(self, force=False):
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty or (not force and time.time() - self.last_flush < self.min_interval): return
+                data = dict(self.peaks)
+                self.dirty = False
+                self.last_flush = time.time()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+                f.flush(); os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    # 수신 스레드용: 저장 요청만 남기고 바로 리턴 -> 백그라운드 스레드가 min_interval 마다 모아서 1회 저장
+    def flush_later(self):
+        with self.lock:
+            if not self.dirty: return
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="peak-flush", daemon=True)
+                self._flusher.start()
+        self._wake.set()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(); self._wake.clear()
+            try: self.flush(force=True)
+            except Exception as e: logging.info(f"고점 저장 실패: {e}")
+            time.sleep(self.min_interval)
+
+    def update(self, ticker, price):
+        with self.lock:
+            old = self.peaks.get(ticker)
+            if old is None or price > old:
+                self.peaks[ticker] = price
+                self.dirty = True
+            return self.peaks[ticker]
+
+    def drop(self, keep):
+        with self.lock:
+            for t in [t for t in self.peaks if t not in keep]:
+                del self.peaks[t]; self.dirty = True
+
+    # get_full_asset_info(peaks) 와 같은 dict 인터페이스
+    def __contains__(self, t): return t in self.peaks
+    def __getitem__(self, t): return self.peaks[t]
+    def __setitem__(self, t, v):
+        with self.lock: self.peaks[t] = float(v); self.dirty = True
+
+
+class ExitEngine:
+    def __init__(self, sell_fn, notify=None, peaks=None):
+        self.sell_fn = sell_fn
+        self.notify = notify or (lambda msg: None)
+        self.peaks = peaks or PeakStore()
+        self.lock = threading.Lock()
+        self.positions = {}         # ticker -> {'avg', 'volume'}
+        self.armed = set()          # 자동 매도 대상 (감시 종목 & 자동 매도 ON)
+        self.pending = {}           # ticker -> 재주문 가능 시각 (주문 후 RETRY_AFTER, 실패 시 백오프)
+        self.failures = {}          # ticker -> 연속 주문 실패 횟수
+        self.latency_ms = deque(maxlen=500)
+        self.events = deque(maxlen=100)
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="exit-order")
+
+    # ----- 상태 동기화 -----
+    # portfolio: get_full_asset_info 결과 (종목/평단/보유수량)
+    def sync_positions(self, portfolio):
+        with self.lock:
+            self.positions = {p['종목']: {'avg': p['평단'], 'volume': p['보유수량']} for p in portfolio if p.get('평단')}
+            for t in [t for t, until in self.pending.items() if t not in self.positions or time.time() >= until]:
+                del self.pending[t]
+            for t in [t for t in self.failures if t not in self.positions]: del self.failures[t]
+        self.peaks.drop(set(self.positions))
+        self.peaks.flush()
+
+    def arm(self, tickers, enabled=True):
+        with self.lock: self.armed = set(tickers) if enabled else set()
+
+    # ----- 가격 / 호가 수신 -----
+    def on_price(self, ticker, price, recv_ts=None):
+        recv_ts = recv_ts or time.perf_counter()
+        pos = self.positions.get(ticker)
+        if pos is None or not price: return None
+        avg = pos['avg']
+        peak = self.peaks.update(ticker, price)
+        profit_pct = (price - avg) / avg * 100
+        drop_rate = (peak - price) / peak * 100
+        reason = None
+        if price < avg * STOP_LOSS: reason = "🚨 손절 (-3%)"
+        elif profit_pct >= TRAIL_START and drop_rate >= TRAIL_DROP: reason = f"💰 익절 (고점 대비 -1.5% 반납)"
+        if reason: self.fire(ticker, reason, recv_ts)
+        else: self.peaks.flush_later()
+        return reason
+
+    def on_orderbook(self, ticker, ob, price=None, recv_ts=None):
+        recv_ts = recv_ts or time.perf_counter()
+        pos = self.positions.get(ticker)
+        if pos is None or not ob: return None
+        price = price or ob['orderbook_units'][0]['bid_price']
+        if (price - pos['avg']) / pos['avg'] * 100 >= COLLAPSE_MAX_PROFIT: return None
+        if bool(depth_metrics([ob])['bid_collapse'][0]):
+            self.fire(ticker, "📉 방어벽 붕괴 (세력 이탈 감지)", recv_ts)
+            return True
+        return None
+
+    # ----- 주문 -----
+    def fire(self, ticker, reason, recv_ts=None):
+        recv_ts = recv_ts or time.perf_counter()
+        with self.lock:
+            if ticker not in self.armed or time.time() < self.pending.get(ticker, 0): return False
+            pos = self.positions.get(ticker)
+            if pos is None: return False
+            self.pending[ticker] = time.time() + RETRY_AFTER
+        self.pool.submit(self._submit, ticker, pos['volume'], reason, recv_ts)
+        return True
+
+    def _submit(self, ticker, volume, reason, recv_ts):
+        sent = time.perf_counter()
+        self.latency_ms.append((sent - recv_ts) * 1000)
+        try: res = self.sell_fn(ticker, volume)
+        except Exception as e: res = {'error': str(e)}
+        ack_ms = (time.perf_counter() - recv_ts) * 1000
+        self.peaks.flush_later()        # 주문이 나간 뒤에 고점 저장
+        ok = bool(res) and 'uuid' in res
+        METRICS.observe('exit_trigger_to_submit_seconds', sent - recv_ts)
+        METRICS.observe('exit_trigger_to_ack_seconds', ack_ms / 1000, ok=str(ok).lower())
+        self.events.append({'t': ticker, 'reason': reason, 'ok': ok, 'submit_ms': (sent - recv_ts) * 1000,
+                            'ack_ms': ack_ms, 'at': time.time()})
+        if ok:
+            with self.lock: self.failures.pop(ticker, None)
+            # 매도 주문이 성공적으로 들어갔을 때만(UUID가 있을 때만) 알림 전송
+            self.notify(f"⚡ 자동 매도 실행: {ticker} ({reason})")
+        else:
+            # 실패해도 바로 풀지 않음 -> 매 틱 재주문 대신 5초, 10초, 20초 ... 뒤 재시도
+            with self.lock:
+                n = self.failures[ticker] = self.failures.get(ticker, 0) + 1
+                wait = min(FAIL_BACKOFF[0] * 2 ** (n - 1), FAIL_BACKOFF[1])
+                self.pending[ticker] = time.time() + wait
+            logging.info(f"자동 매도 실패 {ticker} ({n}회째, {wait}초 뒤 재시도): {res}")
+
+    def latency_stats(self):
+        if not self.latency_ms: return {}
+        a = np.array(self.latency_ms)
+        return {'n': len(a), 'p50_ms': float(np.percentile(a, 50)), 'p99_ms': float(np.percentile(a, 99)),
+                'max_ms': float(a.max())}
@@ -0,0 +1,90 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import websockets
+
+# -----------------------------------------------------------------------------
+# [테스트] 로컬 가짜 업비트 WebSocket 서버
+#  python fake_ws_server.py --port 8765 [--drop-every 30]
+#  JAVIS_WS_URL=ws://localhost:8765 JAVIS_STREAM=1 streamlit run javis.py
+#  - 구독한 종목마다 랜덤워크 ticker / trade / orderbook 을 업비트 형식으로 송신
+#  - --drop-every N: N초마다 연결을 강제로 끊어 재접속/재구독 확인
+# -----------------------------------------------------------------------------
+prices = {}
+
+
+def _price(code):
+    p = prices.get(code) or random.uniform(100, 100000)
+    p *= 1 + random.gauss(0, 0.001)
+    prices[code] = p
+    return p
+
+
+def make_messages(code, kinds):
+    p = _price(code)
+    now = int(time.time() * 1000)
+    out = []
+    if 'ticker' in kinds:
+        out.append({'type': 'ticker', 'code': code, 'trade_price': p, 'opening_price': p * 0.99,
+                    'high_price': p * 1.02, 'low_price': p * 0.97, 'prev_closing_price': p * 0.99,
+                    'signed_change_rate': 0.01, 'acc_trade_price_24h': random.uniform(1e8, 1e11),
+                    'acc_trade_volume_24h': random.uniform(1e3, 1e6), 'timestamp': now, 'stream_type': 'REALTIME'})
+    if 'trade' in kinds:
+        out.append({'type': 'trade', 'code': code, 'trade_price': p, 'trade_volume': random.uniform(0.1, 100),
+                    'ask_bid': random.choice(['ASK', 'BID']), 'trade_timestamp': now, 'timestamp': now,
+                    'stream_type': 'REALTIME'})
+    if 'orderbook' in kinds:
+        tick = p * 0.001
+        units = [{'ask_price': p + tick * (i + 1), 'bid_price': p - tick * i,
+                  'ask_size': random.uniform(1, 100), 'bid_size': random.uniform(1, 100)} for i in range(15)]
+        out.append({'type': 'orderbook', 'code': code, 'orderbook_units': units, 'timestamp': now,
+                    'total_ask_size': sum(u['ask_size'] for u in units),
+                    'total_bid_size': sum(u['bid_size'] for u in units), 'stream_type': 'REALTIME'})
+    return out
+
+
+async def handler(ws, *args, interval=0.2, drop_every=0):
+    subs = {}
+    started = time.time()
+
+    async def reader():
+        async for raw in ws:
+            req = json.loads(raw)
+            subs.clear()        # 업비트처럼 새 구독 메시지가 기존 구독을 교체
+            for item in req:
+                if 'type' in item: subs.setdefault(item['type'], set()).update(item.get('codes', []))
+
+    task = asyncio.ensure_future(reader())
+    try:
+        while not task.done():
+            if drop_every and time.time() - started > drop_every:
+                await ws.close(); break
+            codes = set().union(*subs.values()) if subs else set()
+            for code in codes:
+                kinds = {k for k, v in subs.items() if code in v}
+                for m in make_messages(code, kinds): await ws.send(json.dumps(m).encode())
+            await asyncio.sleep(interval)
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        task.cancel()
+
+
+async def main(host, port, interval, drop_every):
+    async def _h(ws, *args): await handler(ws, interval=interval, drop_every=drop_every)
+    async with websockets.serve(_h, host, port):
+        print(f"가짜 업비트 WS: ws://{host}:{port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--interval", type=float, default=0.2)
+    ap.add_argument("--drop-every", type=float, default=0)
+    a = ap.parse_args()
+    asyncio.run(main(a.host, a.port, a.interval, a.drop_every))
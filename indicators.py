@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+import math
+import logging
+import threading
+from collections import deque
+from numpy.lib.stride_tricks import sliding_window_view
+
+# -----------------------------------------------------------------------------
+# [엔진 3-N] 넘파이 지표 엔진 (루프 제거 + 다종목 일괄 계산)
+#  - 모든 배열은 (종목수, 캔들수) 2차원, 마지막 축이 시간
+#  - calculate_god_indicators(df) 와 값이 같아야 함 (점수 불변)
+# -----------------------------------------------------------------------------
+MFI_LEN = 14
+RSI_LEN = 14
+MA_LEN = 20
+DIV_LOOKBACK = 5
+
+
+def _rolling(x, w, fn):
+    # pandas rolling(w) 과 동일: 앞쪽 w-1 칸은 NaN
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= w:
+        out[..., w - 1:] = fn(sliding_window_view(x, w, axis=-1), axis=-1)
+    return out
+
+
+def _prev_diff(x):
+    # 첫 칸은 비교 대상 없음 -> 0
+    d = np.zeros(x.shape)
+    d[..., 1:] = x[..., 1:] - x[..., :-1]
+    return d
+
+
+def god_arrays(o, h, l, c, v):
+    o, h, l, c, v = (np.asarray(a, dtype=np.float64) for a in (o, h, l, c, v))
+    if c.ndim == 1: o, h, l, c, v = (a[None, :] for a in (o, h, l, c, v))
+
+    tp = (h + l + c) / 3
+    mf = tp * v
+
+    # MFI
+    tp_d = _prev_diff(tp)
+    pos_sum = _rolling(np.where(tp_d > 0, mf, 0.0), MFI_LEN, np.sum)
+    neg_sum = _rolling(np.where(tp_d < 0, mf, 0.0), MFI_LEN, np.sum)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mfi = 100 - (100 / (1 + pos_sum / neg_sum))
+
+    # VWAP (누적)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = np.cumsum(mf, axis=-1) / np.cumsum(v, axis=-1)
+
+    # RSI
+    c_d = _prev_diff(c)
+    gain = _rolling(np.where(c_d > 0, c_d, 0.0), RSI_LEN, np.mean)
+    loss = _rolling(np.where(c_d < 0, -c_d, 0.0), RSI_LEN, np.mean)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
+
+    # 체결 강도
+    up_vol = np.where(c > o, v, 0.0).sum(axis=-1)
+    down_vol = np.where(c < o, v, 0.0).sum(axis=-1)
+    down_vol = np.where(down_vol == 0, 1, down_vol)
+    strength = up_vol / down_vol * 100
+
+    # MA20
+    if c.shape[-1] >= MA_LEN: ma20 = c[:, -MA_LEN:].mean(axis=-1)
+    else: ma20 = c.mean(axis=-1)
+    ma20 = np.nan_to_num(ma20, nan=0.0)
+
+    # OBV
+    obv = np.cumsum(np.sign(c_d) * v, axis=-1)
+
+    # MFI 다이버전스
+    price_slope = c[:, -1] - c[:, -DIV_LOOKBACK]
+    mfi_slope = mfi[:, -1] - mfi[:, -DIV_LOOKBACK]
+    is_divergence = (price_slope <= 0) & (mfi_slope > 5)
+
+    return {
+        'mfi': mfi, 'vwap': vwap, 'rsi': rsi, 'obv': obv,
+        'strength': strength, 'ma20': ma20, 'is_divergence': is_divergence,
+    }
+
+
+def calculate_god_indicators(df):
+    try:
+        r = god_arrays(df['open'].values, df['high'].values, df['low'].values, df['close'].values, df['volume'].values)
+        df = df.assign(vwap=r['vwap'][0], obv=r['obv'][0])
+        ma20 = float(r['ma20'][0])
+        if math.isnan(ma20): ma20 = 0
+        return (r['mfi'][0, -1], r['vwap'][0, -1], bool(r['is_divergence'][0]),
+                r['rsi'][0, -1], r['strength'][0], ma20, df)
+    except: return 50, 0, False, 50, 0, 0, df
+
+
+# [일괄] 여러 종목 15분봉을 한 번에 계산
+#  - panel: (ticker, 시각) MultiIndex DataFrame  (pd.concat({t: df, ...}) 형태)
+#  - 캔들 개수가 같은 종목끼리 묶어 2차원 배열로 한 번에 계산
+def calculate_god_indicators_panel(panel):
+    cols = ['open', 'high', 'low', 'close', 'volume']
+    groups = {}
+    for t, g in panel.groupby(level=0, sort=False):
+        groups.setdefault(len(g), []).append((t, g[cols].to_numpy(dtype=np.float64)))
+
+    rows = []
+    for n, items in groups.items():
+        if n < DIV_LOOKBACK: continue
+        arr = np.stack([a for _, a in items])
+        r = god_arrays(*(arr[:, :, k] for k in range(5)))
+        for i, (t, _) in enumerate(items):
+            rows.append({
+                'ticker': t, 'mfi': r['mfi'][i, -1], 'vwap': r['vwap'][i, -1],
+                'is_divergence': bool(r['is_divergence'][i]), 'rsi': r['rsi'][i, -1],
+                'strength': r['strength'][i], 'ma20': r['ma20'][i], 'obv': r['obv'][i, -1],
+            })
+    if not rows:
+        return pd.DataFrame(columns=['mfi', 'vwap', 'is_divergence', 'rsi', 'strength', 'ma20', 'obv'])
+    return pd.DataFrame(rows).set_index('ticker')
+
+
+
+# -----------------------------------------------------------------------------
+# [엔진 3-S] 스트리밍 지표 (캔들 1개 반영 = 상수 시간)
+#  - 최근 window 개 캔들 기준으로 calculate_god_indicators 와 같은 값을 유지
+#  - push(): 새 캔들 추가, replace_last(): 진행 중인 마지막 캔들 갱신
+#  - verify=True 면 반영할 때마다 일괄 계산과 대조 (불일치 시 로그 + 재동기화)
+# -----------------------------------------------------------------------------
+class _Win:
+    # 고정 길이 구간 + 누적합 (+ 마지막 push 1회 되돌리기)
+    def __init__(self, n, track=True):
+        self.n = n
+        self.track = track
+        self.q = deque()
+        self.total = 0.0
+        self.nz = 0         # 0 이 아닌 값 개수 (합이 정확히 0 인지 판별용)
+        self.evicted = None
+
+    def _acc(self, x, sign):
+        if self.track: self.total += sign * x; self.nz += sign * (x != 0)
+
+    def push(self, x):
+        self.q.append(x); self._acc(x, 1)
+        self.evicted = self.q.popleft() if len(self.q) > self.n else None
+        if self.evicted is not None: self._acc(self.evicted, -1)
+
+    def undo(self):
+        self._acc(self.q.pop(), -1)
+        if self.evicted is not None:
+            self.q.appendleft(self.evicted); self._acc(self.evicted, 1)
+            self.evicted = None
+
+    def sum(self): return self.total if self.nz else 0.0
+    def full(self): return len(self.q) >= self.n
+    def __len__(self): return len(self.q)
+
+
+def _osc(up, down):
+    # 100 - 100 / (1 + up / down) 를 pandas 와 같은 규칙으로 (0/0 -> NaN, x/0 -> 100)
+    if down == 0: return float('nan') if up == 0 else 100.0
+    return 100 - (100 / (1 + up / down))
+
+
+class StreamingGodIndicators:
+    def __init__(self, window=100, verify=False, tol=1e-6):
+        self.window = max(window, MA_LEN + 1)
+        self.verify = verify
+        self.tol = tol
+        self.mismatches = 0
+        self.reset()
+
+    def reset(self):
+        W = self.window
+        self.raw = _Win(W, track=False)          # (ts, o, h, l, c, v) - 검증/재동기화용
+        self.prev = _Win(2, track=False)         # (tp, close, obv_abs)
+        self.pos = _Win(MFI_LEN); self.neg = _Win(MFI_LEN)
+        self.gain = _Win(RSI_LEN); self.loss = _Win(RSI_LEN)
+        self.mf = _Win(W); self.vol = _Win(W)
+        self.up = _Win(W); self.down = _Win(W)
+        self.obv_abs = _Win(W); self.obv20 = _Win(MA_LEN, track=False)
+        self.close20 = _Win(MA_LEN); self.vol20 = _Win(MA_LEN)
+        self.close5 = _Win(DIV_LOOKBACK, track=False); self.mfi5 = _Win(DIV_LOOKBACK, track=False)
+        self._wins = [self.raw, self.prev, self.pos, self.neg, self.gain, self.loss, self.mf, self.vol,
+                      self.up, self.down, self.obv_abs, self.obv20, self.close20, self.vol20, self.close5, self.mfi5]
+
+    def __len__(self): return len(self.raw)
+
+    def last_ts(self): return self.raw.q[-1][0] if len(self.raw) else None
+
+    def _add(self, ts, o, h, l, c, v):
+        tp = (h + l + c) / 3
+        mf = tp * v
+        # 윈도우 첫 캔들은 '이전 캔들 없음' 취급 (일괄 계산과 동일)
+        if len(self.prev) == 0:
+            pos = neg = gain = loss = 0.0
+            obv = 0.0
+        else:
+            ptp, pc, pobv = self.prev.q[-1]
+            pos = mf if tp > ptp else 0.0
+            neg = mf if tp < ptp else 0.0
+            d = c - pc
+            gain = d if d > 0 else 0.0
+            loss = -d if d < 0 else 0.0
+            obv = pobv + (v if d > 0 else -v if d < 0 else 0.0)
+
+        self.raw.push((ts, o, h, l, c, v))
+        self.prev.push((tp, c, obv))
+        self.pos.push(pos); self.neg.push(neg)
+        self.gain.push(gain); self.loss.push(loss)
+        self.mf.push(mf); self.vol.push(v)
+        self.up.push(v if c > o else 0.0); self.down.push(v if c < o else 0.0)
+        self.obv_abs.push(obv); self.obv20.push(obv)
+        self.close20.push(c); self.vol20.push(v); self.close5.push(c)
+        self.mfi5.push(_osc(self.pos.sum(), self.neg.sum()) if self.pos.full() else float('nan'))
+
+    def _undo(self):
+        for w in self._wins: w.undo()
+
+    def push(self, ts, o, h, l, c, v):
+        self._add(ts, o, h, l, c, v)
+        if self.verify: self.check()
+
+    def replace_last(self, ts, o, h, l, c, v):
+        if len(self.raw) == 0: return self.push(ts, o, h, l, c, v)
+        self._undo()
+        self.push(ts, o, h, l, c, v)
+
+    def seed(self, df):
+        self.reset()
+        tail = df.iloc[-self.window:]
+        for ts, row in zip(tail.index, tail[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)):
+            self._add(ts, *row)
+
+    # 캐시에서 받은 df 와 맞추기: 이어지면 증분 반영, 끊기면 재시드
+    def sync(self, df):
+        last = self.last_ts()
+        if last is None or last not in df.index:
+            self.seed(df)
+            return self.snapshot()
+        new = df.loc[last:]
+        for i, (ts, row) in enumerate(zip(new.index, new[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64))):
+            if i == 0: self.replace_last(ts, *row)
+            else: self.push(ts, *row)
+        return self.snapshot()
+
+    def snapshot(self):
+        n = len(self.raw)
+        if n == 0: return None
+        ts, o, h, l, c, v = self.raw.q[-1]
+        mfi = _osc(self.pos.sum(), self.neg.sum()) if self.pos.full() else float('nan')
+        rsi = _osc(self.gain.sum() / RSI_LEN, self.loss.sum() / RSI_LEN) if self.gain.full() else float('nan')
+        vwap = self.mf.sum() / self.vol.sum() if self.vol.sum() else float('nan')
+        down = self.down.sum()
+        strength = self.up.sum() / (down if down != 0 else 1) * 100
+        ma20 = self.close20.sum() / len(self.close20)
+        if math.isnan(ma20): ma20 = 0
+        is_div = False
+        if n >= DIV_LOOKBACK:
+            is_div = (c - self.close5.q[0] <= 0) and (mfi - self.mfi5.q[0] > 5)
+        base = self.obv_abs.q[0]
+        return {
+            'ts': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v,
+            'mfi': mfi, 'vwap': vwap, 'is_divergence': bool(is_div), 'rsi': rsi,
+            'strength': strength, 'ma20': ma20, 'obv': self.obv_abs.q[-1] - base,
+            'obv_max20': max(self.obv20.q) - base, 'close_max20': max(self.close20.q),
+            'avg_vol20': self.vol20.sum() / MA_LEN if self.vol20.full() else float('nan'),
+        }
+
+    def to_frame(self):
+        rows = list(self.raw.q)
+        return pd.DataFrame([r[1:] for r in rows], index=[r[0] for r in rows],
+                            columns=['open', 'high', 'low', 'close', 'volume'])
+
+    # [검증 모드] 일괄 계산과 대조
+    def check(self):
+        snap = self.snapshot()
+        df = self.to_frame()
+        mfi, vwap, is_div, rsi, strength, ma20, df_full = calculate_god_indicators(df)
+        ref = {'mfi': mfi, 'vwap': vwap, 'rsi': rsi, 'strength': strength, 'ma20': ma20,
+               'obv': df_full['obv'].iloc[-1], 'obv_max20': df_full['obv'].iloc[-MA_LEN:].max()}
+        bad = [k for k, x in ref.items() if not np.isclose(snap[k], x, rtol=self.tol, atol=self.tol, equal_nan=True)]
+        if len(df) >= DIV_LOOKBACK and snap['is_divergence'] != is_div: bad.append('is_divergence')
+        if bad:
+            self.mismatches += 1
+            logging.warning(f"스트리밍 지표 불일치 {bad} -> 재동기화")
+            self.seed(df)
+        return not bad
+
+
+# [지표 뱅크] 종목별 스트리밍 지표 보관 (스캔 스레드 공유)
+class IndicatorBank:
+    def __init__(self, window=100, verify=False):
+        self.window = window
+        self.verify = verify
+        self.streams = {}
+        self.lock = threading.Lock()
+
+    def update(self, ticker, df):
+        with self.lock:
+            s = self.streams.get(ticker)
+            if s is None:
+                s = self.streams[ticker] = StreamingGodIndicators(self.window, verify=self.verify)
+        return s.sync(df)
+
+    def retain(self, tickers):
+        keep = set(tickers)
+        with self.lock:
+            for t in [t for t in self.streams if t not in keep]: del self.streams[t]
+
+
+INDICATOR_BANK = IndicatorBank()
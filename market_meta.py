@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+import pyupbit
+
+from request_scheduler import SCHEDULER
+
+# -----------------------------------------------------------------------------
+# [메타] 종목 목록 / 유의 종목 캐시
+#  - get_market_all(is_details=True) 1회로 KRW 종목 목록 + 경고 플래그를 같이 받음
+#  - 긴 TTL 로 백그라운드 갱신, 조회는 set/dict (스캔마다 API 2회 + 리스트 선형 탐색 제거)
+#  - 신규 상장 / 상장 폐지는 로그 + 리스너로 알림
+# -----------------------------------------------------------------------------
+META_TTL = float(os.getenv("JAVIS_META_TTL", "600"))   # 초
+
+
+def _is_warning(m):
+    if m.get('market_warning', 'NONE') not in (None, 'NONE'): return True
+    return bool((m.get('market_event') or {}).get('warning'))
+
+
+class MarketMeta:
+    def __init__(self, ttl=META_TTL, fetcher=None):
+        self.ttl = ttl
+        self.fetcher = fetcher or (lambda: pyupbit.get_market_all(is_details=True))
+        self.lock = threading.Lock()
+        self.markets = {}        # market -> 원본 dict
+        self.by_fiat = {}        # 'KRW' -> [market, ...] (API 순서)
+        self.risk = frozenset()
+        self.loaded_at = 0
+        self.changes = deque(maxlen=50)   # {'at', 'added', 'removed'}
+        self.listeners = []
+        self._refreshing = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # ----- 갱신 -----
+    def refresh(self):
+        if not self._refreshing.acquire(blocking=False): return False
+        try:
+            rows = SCHEDULER.call('market', self.fetcher)
+            if not isinstance(rows, list) or not rows: raise ValueError(f"종목 목록 응답 이상: {rows}")
+            markets = {m['market']: m for m in rows}
+            by_fiat = {}
+            for m in rows: by_fiat.setdefault(m['market'].split('-')[0], []).append(m['market'])
+            risk = frozenset(k for k, m in markets.items() if _is_warning(m))
+            with self.lock:
+                first = not self.markets
+                added = [k for k in markets if k not in self.markets]
+                removed = [k for k in self.markets if k not in markets]
+                self.markets, self.by_fiat, self.risk = markets, by_fiat, risk
+                self.loaded_at = time.time()
+            if not first and (added or removed):
+                logging.info(f"종목 변경: 신규 {added} / 폐지 {removed}")
+                self.changes.append({'at': time.time(), 'added': added, 'removed': removed})
+                for fn in list(self.listeners):
+                    try: fn(added, removed)
+                    except Exception as e: logging.info(f"종목 변경 리스너 오류: {e}")
+            return True
+        except Exception as e:
+            logging.info(f"종목 목록 갱신 실패: {e}")
+            return False
+        finally:
+            self._refreshing.release()
+
+    # 처음 한 번은 기다려서 받고, 이후엔 오래됐으면 뒤에서 갱신 (호출자는 기존 값 사용)
+    def _ensure(self):
+        if not self.loaded_at: self.refresh(); return
+        if time.time() - self.loaded_at >= self.ttl and not self._refreshing.locked():
+            threading.Thread(target=self.refresh, name="market-meta", daemon=True).start()
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return self
+        self._stop.clear()
+        def loop():
+            while not self._stop.is_set():
+                self.refresh()
+                self._stop.wait(self.ttl)
+        self._thread = threading.Thread(target=loop, name="market-meta", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def add_listener(self, fn):
+        if fn not in self.listeners: self.listeners.append(fn)
+
+    # ----- 조회 -----
+    def tickers(self, fiat="KRW"):
+        self._ensure()
+        with self.lock: return list(self.by_fiat.get(fiat, []))
+
+    def risk_tickers(self):
+        self._ensure()
+        return self.risk
+
+    def is_risk(self, ticker):
+        return ticker in self.risk_tickers()
+
+    def name(self, ticker):
+        m = self.markets.get(ticker)
+        return m.get('korean_name', ticker) if m else ticker
+
+
+MARKET_META = MarketMeta()
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+
+import websockets
+
+# -----------------------------------------------------------------------------
+# [실시간] 업비트 WebSocket 수신 (ticker / trade / orderbook)
+#  - 최신 상태 테이블 하나에 모아두고 REST 대신 여기서 읽음
+#  - 끊기면 지수 백오프로 재접속 + 재구독
+#  - 구독 목록이 바뀌면 열린 연결에 구독 메시지만 다시 보냄 (재접속 없음 -> 청산 감시 체결 유실 없음)
+#  - JAVIS_WS_URL 로 로컬 가짜 서버(fake_ws_server.py) 지정 가능
+# -----------------------------------------------------------------------------
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+CHANNELS = ("ticker", "trade", "orderbook")
+
+
+class LatestState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prices = {}        # code -> (price, 수신시각)
+        self.tickers = {}       # code -> ticker 메시지
+        self.orderbooks = {}    # code -> (orderbook 메시지, 수신시각)
+        self.trades = {}        # code -> 마지막 체결 메시지
+
+    def apply(self, msg):
+        code = msg.get('code') or msg.get('cd')
+        kind = msg.get('type') or msg.get('ty')
+        if not code: return None
+        now = time.time()
+        with self.lock:
+            if kind == 'ticker':
+                self.tickers[code] = msg
+                self.prices[code] = (float(msg['trade_price']), now)
+            elif kind == 'trade':
+                self.trades[code] = msg
+                self.prices[code] = (float(msg['trade_price']), now)
+            elif kind == 'orderbook':
+                self.orderbooks[code] = (msg, now)
+        return kind, code
+
+    def price(self, code, max_age=5.0):
+        with self.lock:
+            p = self.prices.get(code)
+        if p is None or time.time() - p[1] > max_age: return None
+        return p[0]
+
+    def orderbook(self, code, max_age=2.0):
+        with self.lock:
+            ob = self.orderbooks.get(code)
+        if ob is None or time.time() - ob[1] > max_age: return None
+        return ob[0]
+
+    def drop(self, keep):
+        with self.lock:
+            for table in (self.prices, self.tickers, self.orderbooks, self.trades):
+                for k in [k for k in table if k not in keep]: del table[k]
+
+
+class MarketStream:
+    def __init__(self, url=None, channels=CHANNELS):
+        self.url = url or os.getenv("JAVIS_WS_URL", UPBIT_WS_URL)
+        self.channels = channels
+        self.state = LatestState()
+        self.lock = threading.Lock()     # groups / codes (화면 스레드 + 엔진 스레드)
+        self.codes = set()
+        self.groups = {}
+        self.listeners = []
+        self.connected = False
+        self.reconnects = 0
+        self.last_msg_at = 0
+        self._loop = None
+        self._ws = None
+        self._thread = None
+        self._stop = False
+
+    # ----- 외부 API -----
+    def start(self):
+        if self._thread and self._thread.is_alive(): return self
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="market-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop = True
+        self._kick()
+
+    # group 별 구독 목록 (예: 'scan' = 스캔 대상, 'holdings' = 보유 종목) -> 합집합 구독
+    def set_codes(self, codes, group='default'):
+        with self.lock:
+            self.groups[group] = set(codes)
+            codes = set().union(*self.groups.values())
+            if codes == self.codes: return
+            self.codes = codes
+        self.state.drop(codes)
+        self._resubscribe()
+
+    def add_listener(self, fn):
+        # fn(kind, code, msg) - 수신 스레드에서 호출되므로 가볍게
+        self.listeners.append(fn)
+
+    def price(self, code, max_age=5.0): return self.state.price(code, max_age)
+    def orderbook(self, code, max_age=2.0): return self.state.orderbook(code, max_age)
+
+    # ----- 내부 -----
+    def _kick(self):
+        if self._loop and self._ws:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+
+    # 열린 연결에 새 구독 메시지 (업비트는 같은 연결의 마지막 구독으로 교체)
+    #  - 목록이 비면 연결을 닫고 _main 이 목록이 생길 때까지 대기, 연결 전이면 접속할 때 보냄
+    def _resubscribe(self):
+        ws, loop = self._ws, self._loop
+        if not (ws and loop): return
+        with self.lock: empty = not self.codes
+        if empty: return self._kick()
+        fut = asyncio.run_coroutine_threadsafe(ws.send(self._subscribe_msg()), loop)
+        def done(f):
+            if not f.cancelled() and f.exception(): logging.info(f"재구독 실패: {f.exception()}")
+        fut.add_done_callback(done)
+
+    def _subscribe_msg(self):
+        with self.lock: codes = sorted(self.codes)
+        msg = [{"ticket": str(uuid.uuid4())}]
+        for ch in self.channels:
+            msg.append({"type": ch, "codes": codes})
+        return json.dumps(msg)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try: self._loop.run_until_complete(self._main())
+        finally: self._loop.close()
+
+    async def _main(self):
+        backoff = 1
+        while not self._stop:
+            if not self.codes:
+                await asyncio.sleep(0.5); continue
+            try:
+                async with websockets.connect(self.url, ping_interval=60, max_size=2 ** 22) as ws:
+                    self._ws = ws
+                    await ws.send(self._subscribe_msg())
+                    self.connected = True
+                    backoff = 1
+                    logging.info(f"실시간 수신 연결 ({len(self.codes)}종목)")
+                    async for raw in ws:
+                        self._on_message(raw)
+            except Exception as e:
+                if not self._stop: logging.info(f"실시간 수신 끊김: {e}")
+            self.connected = False
+            self._ws = None
+            if self._stop: break
+            self.reconnects += 1
+            await asyncio.sleep(min(backoff, 30) if backoff > 1 else 0.2)
+            backoff *= 2
+
+    def _on_message(self, raw):
+        try:
+            msg = json.loads(raw)
+            res = self.state.apply(msg)
+        except Exception as e:
+            logging.info(f"실시간 메시지 파싱 실패: {e}")
+            return
+        if res is None: return
+        self.last_msg_at = time.time()
+        for fn in self.listeners:
+            try: fn(res[0], res[1], msg)
+            except Exception as e: logging.info(f"실시간 리스너 오류: {e}")
+
+
+MARKET_STREAM = None
+_stream_lock = threading.Lock()
+
+def get_market_stream():
+    global MARKET_STREAM
+    with _stream_lock:
+        if MARKET_STREAM is None: MARKET_STREAM = MarketStream().start()
+        return MARKET_STREAM
@@ -0,0 +1,169 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# [계측] 카운터 / 게이지 / 히스토그램 (구간 시간)
+#  - API 호출(그룹별 지연/결과), 지표 계산, 스캔 단계, 신호 -> 주문 지연
+#  - JSON(to_dict) / Prometheus 텍스트(to_prometheus) 내보내기
+#    JAVIS_METRICS_PORT=9108 이면 /metrics 로 스크레이프 가능
+#  - 스캔 1회 cProfile (profile_call) -> .javis_state/profiles/*.prof + 상위 함수 요약
+# -----------------------------------------------------------------------------
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT = 500            # 백분위 계산용 최근 샘플 수
+PROFILE_DIR = os.path.join(os.getenv("JAVIS_STATE_DIR", ".javis_state"), "profiles")
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class _Hist:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.n = 0
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, v):
+        i = 0
+        while i < len(BUCKETS) and v > BUCKETS[i]: i += 1
+        self.counts[i] += 1
+        self.sum += v
+        self.n += 1
+        self.recent.append(v)
+
+    def summary(self):
+        a = np.array(self.recent) if self.recent else np.zeros(1)
+        return {'n': self.n, 'sum': self.sum, 'p50_ms': float(np.percentile(a, 50) * 1000),
+                'p99_ms': float(np.percentile(a, 99) * 1000), 'max_ms': float(a.max() * 1000)}
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}      # name -> {labels: 값}
+        self.gauges = {}
+        self.hists = {}
+        self.started = time.time()
+
+    def inc(self, name, n=1, **labels):
+        with self.lock:
+            d = self.counters.setdefault(name, {})
+            k = _key(labels)
+            d[k] = d.get(k, 0) + n
+
+    def set(self, name, value, **labels):
+        with self.lock: self.gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        with self.lock:
+            d = self.hists.setdefault(name, {})
+            k = _key(labels)
+            if k not in d: d[k] = _Hist()
+            d[k].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - t0, **labels)
+
+    def total(self, name):
+        with self.lock: return sum(self.counters.get(name, {}).values())
+
+    # ----- 내보내기 -----
+    def to_dict(self):
+        with self.lock:
+            fmt = lambda k: ",".join(f"{a}={b}" for a, b in k) or "-"
+            return {
+                'uptime_s': time.time() - self.started,
+                'counters': {n: {fmt(k): v for k, v in d.items()} for n, d in self.counters.items()},
+                'gauges': {n: {fmt(k): v for k, v in d.items()} for n, d in self.gauges.items()},
+                'histograms': {n: {fmt(k): h.summary() for k, h in d.items()} for n, d in self.hists.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=1)
+
+    def to_prometheus(self, prefix="javis_"):
+        def lbl(k, extra=()):
+            items = list(k) + list(extra)
+            return "{" + ",".join(f'{a}="{b}"' for a, b in items) + "}" if items else ""
+        out = []
+        with self.lock:
+            for n, d in self.counters.items():
+                out.append(f"# TYPE {prefix}{n} counter")
+                out += [f"{prefix}{n}{lbl(k)} {v}" for k, v in d.items()]
+            for n, d in self.gauges.items():
+                out.append(f"# TYPE {prefix}{n} gauge")
+                out += [f"{prefix}{n}{lbl(k)} {v}" for k, v in d.items()]
+            for n, d in self.hists.items():
+                out.append(f"# TYPE {prefix}{n} histogram")
+                for k, h in d.items():
+                    cum = 0
+                    for b, c in zip(list(BUCKETS) + ['+Inf'], h.counts):
+                        cum += c
+                        out.append(f"{prefix}{n}_bucket{lbl(k, [('le', b)])} {cum}")
+                    out.append(f"{prefix}{n}_sum{lbl(k)} {h.sum}")
+                    out.append(f"{prefix}{n}_count{lbl(k)} {h.n}")
+        return "\n".join(out) + "\n"
+
+
+METRICS = Metrics()
+
+
+# ----- 프로파일 (스캔 1회) -----
+def profile_call(fn, *args, name="scan", top=25, **kwargs):
+    prof = cProfile.Profile()
+    prof.enable()
+    try: result = fn(*args, **kwargs)
+    finally: prof.disable()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    prof.dump_stats(path)
+    buf = io.StringIO()
+    pstats.Stats(prof, stream=buf).sort_stats('cumulative').print_stats(top)
+    return result, {'path': path, 'text': buf.getvalue(), 'at': time.time()}
+
+
+# ----- Prometheus 스크레이프 -----
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'): body, ctype = METRICS.to_json(), 'application/json'
+        elif self.path.startswith('/metrics'): body, ctype = METRICS.to_prometheus(), 'text/plain; version=0.0.4'
+        else:
+            self.send_response(404); self.end_headers(); return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+_server = None
+
+def serve(port=None, host="0.0.0.0"):
+    global _server
+    port = port or int(os.getenv("JAVIS_METRICS_PORT", "0") or 0)
+    if not port or _server: return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.info(f"계측 서버: http://{host}:{port}/metrics")
+    except OSError as e:
+        logging.info(f"계측 서버 시작 실패: {e}")
+    return _server
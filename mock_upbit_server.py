@@ -0,0 +1,140 @@
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# -----------------------------------------------------------------------------
+# [테스트] 로컬 가짜 업비트 REST 서버 (요청 제한을 실제처럼 강제)
+#  python mock_upbit_server.py --port 8766
+#  JAVIS_UPBIT_API=http://localhost:8766 python engine.py
+#  - 그룹별 최근 1초 요청 수를 세서 Remaining-Req 헤더로 알려주고, 넘으면 429
+#  - 잔고/주문/주문조회 + 시세(ticker/orderbook/candles) 응답은 형식만 맞춘 더미
+# -----------------------------------------------------------------------------
+MOCK_LIMITS = {'default': 30, 'order': 8, 'ticker': 10, 'orderbook': 10, 'candles': 10, 'market': 10}
+LATENCY = 0.02      # 응답 지연 (초)
+
+
+def _group(method, path):
+    if path == '/v1/orders' and method == 'POST': return 'order'
+    if path.startswith('/v1/candles'): return 'candles'
+    if path.startswith('/v1/ticker'): return 'ticker'
+    if path.startswith('/v1/orderbook'): return 'orderbook'
+    if path.startswith('/v1/market'): return 'market'
+    return 'default'
+
+
+class MockState:
+    def __init__(self, limits=None, latency=LATENCY):
+        self.limits = dict(MOCK_LIMITS, **(limits or {}))
+        self.latency = latency
+        self.hits = {g: deque() for g in self.limits}
+        self.lock = threading.Lock()
+        self.stats = {'served': 0, 'rejected': 0}
+        self.orders = {}
+
+    # (허용 여부, 이번 초 남은 수)
+    def admit(self, group):
+        now = time.monotonic()
+        with self.lock:
+            q = self.hits[group]
+            while q and now - q[0] >= 1.0: q.popleft()
+            if len(q) >= self.limits[group]:
+                self.stats['rejected'] += 1
+                return False, 0
+            q.append(now)
+            self.stats['served'] += 1
+            return True, self.limits[group] - len(q)
+
+
+def _markets(qs):
+    return [m for v in qs.get('markets', []) for m in v.split(',') if m]
+
+
+class Handler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, *args): pass
+
+    def _send(self, code, obj, group, sec):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Remaining-Req', f"group={group}; min=1800; sec={sec}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+        data = {}
+        if method == 'POST':
+            n = int(self.headers.get('Content-Length') or 0)
+            data = json.loads(self.rfile.read(n) or b'{}')
+        group = _group(method, url.path)
+        ok, sec = self.state.admit(group)
+        if not ok:
+            return self._send(429, {'error': {'name': 'too_many_requests', 'message': 'Too many API requests.'}}, group, 0)
+        time.sleep(self.state.latency)
+        self._send(200, self._body(method, url.path, qs, data), group, sec)
+
+    def _body(self, method, path, qs, data):
+        if path == '/v1/accounts':
+            return [{'currency': 'KRW', 'balance': '1000000', 'locked': '0', 'avg_buy_price': '0', 'unit_currency': 'KRW'}]
+        if path == '/v1/orders':
+            oid = str(uuid.uuid4())
+            self.state.orders[oid] = dict(data, uuid=oid, state='wait', created=time.time())
+            return {'uuid': oid, 'side': data.get('side'), 'market': data.get('market'), 'state': 'wait'}
+        if path == '/v1/order':
+            o = self.state.orders.get(qs.get('uuid', [''])[0])
+            if o is None: return {'error': {'name': 'order_not_found'}}
+            if time.time() - o['created'] > 0.2: o['state'] = 'done'
+            return {'uuid': o['uuid'], 'state': o['state'], 'executed_volume': o.get('volume') or '0'}
+        if path == '/v1/ticker':
+            return [{'market': m, 'trade_price': random.uniform(100, 1000), 'acc_trade_price_24h': 1e9} for m in _markets(qs)]
+        if path == '/v1/orderbook':
+            return [{'market': m, 'orderbook_units': [{'ask_price': 101, 'bid_price': 100, 'ask_size': 1.0,
+                                                        'bid_size': 1.0}] * 5} for m in _markets(qs)]
+        if path.startswith('/v1/candles'):
+            n = int(qs.get('count', ['1'])[0])
+            t0 = int(time.time()) // 900 * 900
+            return [{'market': qs.get('market', [''])[0], 'candle_date_time_kst': time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t0 - k * 900 + 9 * 3600)),
+                     'opening_price': 100.0, 'high_price': 101.0, 'low_price': 99.0, 'trade_price': 100.0,
+                     'candle_acc_trade_volume': 1.0, 'candle_acc_trade_price': 100.0} for k in range(n)]
+        if path.startswith('/v1/market'):
+            return [{'market': 'KRW-BTC', 'market_warning': 'NONE'}]
+        return {}
+
+    def do_GET(self): self._handle('GET')
+    def do_POST(self): self._handle('POST')
+    def do_DELETE(self): self._handle('DELETE')
+
+
+def serve(host="127.0.0.1", port=0, limits=None, latency=LATENCY):
+    state = MockState(limits, latency)
+    handler = type('MockHandler', (Handler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-upbit", daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--latency", type=float, default=LATENCY)
+    a = ap.parse_args()
+    server, state = serve(a.host, a.port, latency=a.latency)
+    print(f"가짜 업비트 REST: http://{a.host}:{a.port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"처리 {state.stats['served']} / 거절(429) {state.stats['rejected']}")
+    except KeyboardInterrupt:
+        server.shutdown()
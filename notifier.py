@@ -0,0 +1,146 @@
+import time
+import logging
+import threading
+from collections import deque
+
+import requests
+
+# -----------------------------------------------------------------------------
+# [알림] 비동기 텔레그램 큐
+#  - notify() 는 큐에 넣고 바로 리턴 (매수/매도/스캔 경로가 네트워크를 기다리지 않음)
+#  - 백그라운드 스레드가 잠깐(coalesce) 모인 메시지를 한 통으로 묶어 전송
+#  - 세션 재사용 + 타임아웃 + 재시도(백오프, 429 retry_after 준수)
+#  - 큐가 가득 차면 가장 오래된 알림부터 버림 (거래는 절대 막지 않음)
+#  - sink 교체 가능: TelegramSink / LogSink / MemorySink(테스트)
+# -----------------------------------------------------------------------------
+MAX_QUEUE = 500
+COALESCE_SEC = 1.0          # 첫 메시지 후 이 시간 동안 온 알림은 한 통으로
+MAX_CHARS = 3500            # 텔레그램 한도 4096 이하로 나눔
+RETRIES = 4
+SEPARATOR = "\n\n─────────\n\n"
+
+
+class TelegramSink:
+    def __init__(self, token, chat_id, timeout=5):
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    # 실패 시 예외 (재시도 판단은 Notifier), 429 는 retry_after 를 실어서
+    def send(self, text):
+        params = {'chat_id': self.chat_id, 'text': text, 'parse_mode': 'Markdown'}
+        resp = self.session.post(self.url, data=params, timeout=self.timeout)
+        if resp.status_code == 400 and 'parse' in resp.text:
+            # 마크다운 깨짐 (종목명/이유에 특수문자) -> 일반 텍스트로 한 번 더
+            params.pop('parse_mode')
+            resp = self.session.post(self.url, data=params, timeout=self.timeout)
+        if resp.status_code == 429:
+            e = RuntimeError("telegram 429")
+            e.retry_after = resp.json().get('parameters', {}).get('retry_after', 1)
+            raise e
+        resp.raise_for_status()
+
+
+class LogSink:
+    def send(self, text): logging.info(f"[알림] {text}")
+
+
+class MemorySink:
+    def __init__(self, fail_first=0):
+        self.sent = []
+        self.fail_first = fail_first
+
+    def send(self, text):
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            raise RuntimeError("일부러 실패")
+        self.sent.append(text)
+
+
+class Notifier:
+    def __init__(self, sink, maxsize=MAX_QUEUE, coalesce=COALESCE_SEC, retries=RETRIES, backoff=0.5):
+        self.sink = sink
+        self.coalesce = coalesce
+        self.retries = retries
+        self.backoff = backoff
+        self.q = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.stats = {'queued': 0, 'sent': 0, 'batches': 0, 'failed': 0, 'dropped': 0}
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def notify(self, text):
+        if not text: return
+        with self.cond:
+            if len(self.q) == self.q.maxlen: self.stats['dropped'] += 1
+            self.q.append(text)
+            self.stats['queued'] += 1
+            self.cond.notify()
+
+    # 큐가 빌 때까지 대기 (종료 직전 / 테스트용)
+    def flush(self, timeout=10):
+        deadline = time.time() + timeout
+        with self.cond:
+            while (self.q or self._busy) and time.time() < deadline:
+                self.cond.wait(0.05)
+        return not self.q and not self._busy
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.q: self.cond.wait()
+                self._busy = True
+            time.sleep(self.coalesce)       # 몰려오는 알림을 잠깐 모음
+            with self.cond:
+                batch = list(self.q); self.q.clear()
+            for chunk, n in self._pack(batch):
+                self._send(chunk, n)
+            with self.cond:
+                self._busy = False
+                self.cond.notify_all()
+
+    # 메시지들을 한도 안에서 이어붙임 -> [(본문, 건수)]
+    @staticmethod
+    def _pack(msgs):
+        chunks, cur, n = [], "", 0
+        for m in msgs:
+            m = m[:MAX_CHARS]
+            if cur and len(cur) + len(SEPARATOR) + len(m) > MAX_CHARS:
+                chunks.append((cur, n)); cur, n = m, 1
+            else:
+                cur = f"{cur}{SEPARATOR}{m}" if cur else m
+                n += 1
+        if cur: chunks.append((cur, n))
+        return chunks
+
+    def _send(self, text, n):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.send(text)
+                self.stats['sent'] += n
+                self.stats['batches'] += 1
+                return True
+            except Exception as e:
+                if attempt == self.retries: break
+                wait = getattr(e, 'retry_after', None) or delay
+                logging.info(f"알림 전송 실패 ({e}) -> {wait:.1f}초 후 재시도")
+                time.sleep(wait)
+                delay = min(delay * 2, 30)
+        self.stats['failed'] += n
+        logging.info(f"알림 전송 포기 ({n}건 묶음)")
+        return False
+
+
+NOTIFIER = None
+_notifier_lock = threading.Lock()
+
+def get_notifier(token=None, chat_id=None):
+    global NOTIFIER
+    with _notifier_lock:
+        if NOTIFIER is None:
+            sink = TelegramSink(token, chat_id) if token and chat_id else LogSink()
+            NOTIFIER = Notifier(sink)
+        return NOTIFIER
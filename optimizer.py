@@ -0,0 +1,164 @@
+import sys
+import time
+import random
+import logging
+import argparse
+import itertools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import backtest as bt
+
+# -----------------------------------------------------------------------------
+# [최적화] 점수/청산 기준값 파라미터 탐색 (프로세스 풀)
+#  python optimizer.py --store --random 2000 --workers 8
+#  python optimizer.py --synthetic 200 --bars 35040 --grid
+#  - 캔들 배열 + 지표(기준값과 무관)는 부모가 한 번만 계산해서 공유 메모리에 올림
+#    -> 작업 프로세스는 이름으로 붙기만 함 (DataFrame 피클링 없음)
+#  - 조합마다 신호/매매만 다시 돌리고 샤프(일간, 연환산) 순으로 정렬
+# -----------------------------------------------------------------------------
+SPACE = {
+    'rsi_max': [60, 65, 70, 75],
+    'sniper_band': [1.01, 1.02, 1.03, 1.05],
+    'strength_min': [80, 100, 120],
+    'rvol_min': [1.5, 2.0, 3.0],
+    'stealth_obv': [0.97, 0.99, 1.0],
+    'min_score': [70, 80],
+    'vip_score': [90, 100],
+    'stop_loss': [0.95, 0.97, 0.98],
+    'trail_start': [2.0, 3.0, 5.0],
+    'trail_drop': [1.0, 1.5, 2.5],
+}
+GRID_KEYS = ['rsi_max', 'sniper_band', 'strength_min', 'rvol_min', 'stop_loss', 'trail_start', 'trail_drop']
+MIN_TRADES = 30         # 거래가 너무 적은 조합은 순위 뒤로 (우연 방지)
+RESULT_COLS = ['sharpe', 'calmar', 'return_pct', 'max_drawdown_pct', 'hit_rate', 'trades']
+
+
+# ----- 공유 메모리 -----
+def share_arrays(arrays):
+    meta, blocks = {}, []
+    for k, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        shm = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+        np.ndarray(a.shape, a.dtype, buffer=shm.buf)[...] = a
+        meta[k] = (shm.name, a.shape, a.dtype.str)
+        blocks.append(shm)
+    return meta, blocks
+
+
+def attach_arrays(meta):
+    arrays, blocks = {}, []
+    for k, (name, shape, dtype) in meta.items():
+        # 작업 프로세스는 부모의 resource_tracker 를 같이 씀 -> 정리(unlink)는 만든 부모만
+        shm = shared_memory.SharedMemory(name=name)
+        arrays[k] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        blocks.append(shm)
+    return arrays, blocks
+
+
+_W = {}
+
+def _init_worker(tickers, panel_meta, feat_meta):
+    arrays, b1 = attach_arrays(panel_meta)
+    feats, b2 = attach_arrays(feat_meta)
+    _W['panel'] = bt.Panel.from_arrays(tickers, arrays)
+    _W['feats'] = feats
+    _W['blocks'] = b1 + b2
+
+
+def _evaluate(params):
+    try:
+        _, s = bt.run_backtest(_W['panel'], params, feats=_W['feats'])
+        return params, {k: s.get(k, 0.0) for k in RESULT_COLS}
+    except Exception as e:
+        logging.info(f"조합 실패 {params}: {e}")
+        return params, None
+
+
+# ----- 탐색 공간 -----
+def grid_params(space=SPACE, keys=GRID_KEYS):
+    for combo in itertools.product(*(space[k] for k in keys)):
+        yield dict(zip(keys, combo))
+
+
+def random_params(n, space=SPACE, seed=0):
+    rnd = random.Random(seed)
+    seen = set()
+    total = int(np.prod([len(v) for v in space.values()]))
+    while len(seen) < min(n, total):
+        p = tuple((k, rnd.choice(v)) for k, v in space.items())
+        if p in seen: continue
+        seen.add(p)
+        yield dict(p)
+
+
+def rank(rows):
+    df = pd.DataFrame(rows)
+    if df.empty: return df
+    df['enough'] = df['trades'] >= MIN_TRADES
+    return df.sort_values(['enough', 'sharpe', 'calmar'], ascending=False).drop(columns='enough').reset_index(drop=True)
+
+
+def optimize(panel, param_sets, workers=None, progress=True):
+    workers = workers or mp.cpu_count()
+    t0 = time.perf_counter()
+    feats = bt.features(panel)
+    panel_meta, b1 = share_arrays(panel.arrays())
+    feat_meta, b2 = share_arrays(feats)
+    del feats
+    logging.info(f"지표 계산 + 공유 메모리 {time.perf_counter() - t0:.1f}초 "
+                 f"({sum(b.size for b in b1 + b2) / 1e6:,.0f} MB)")
+    rows = []
+    try:
+        ctx = mp.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(panel.tickers, panel_meta, feat_meta)) as pool:
+            futures = [pool.submit(_evaluate, p) for p in param_sets]
+            for k, f in enumerate(as_completed(futures)):
+                params, res = f.result()
+                if res is not None: rows.append({**params, **res})
+                if progress and (k + 1) % 50 == 0:
+                    print(f"  {k + 1}/{len(futures)} ({time.perf_counter() - t0:.0f}초)")
+    finally:
+        for b in b1 + b2:
+            b.close(); b.unlink()
+    return rank(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--store", action="store_true")
+    ap.add_argument("--days", type=float)
+    ap.add_argument("--dir")
+    ap.add_argument("--synthetic", type=int, default=0)
+    ap.add_argument("--bars", type=int, default=35040)
+    ap.add_argument("--grid", action="store_true")
+    ap.add_argument("--random", type=int, default=500)
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--out", default="optimizer_results.csv")
+    a = ap.parse_args()
+
+    if a.store:
+        start = pd.Timestamp.now(tz='Asia/Seoul').tz_localize(None) - pd.Timedelta(days=a.days) if a.days else None
+        frames = bt.load_store(start=start)
+    elif a.dir: frames = bt.load_csv_dir(a.dir)
+    elif a.synthetic: frames = bt.synthetic_frames(a.synthetic, a.bars)
+    else: ap.error("--store / --dir / --synthetic 중 하나 필요")
+
+    panel = bt.Panel(frames)
+    del frames
+    params = list(grid_params() if a.grid else random_params(a.random))
+    print(f"{len(panel.tickers)}종목 {len(panel):,}봉 / {len(params)}개 조합")
+    t0 = time.perf_counter()
+    result = optimize(panel, params, a.workers)
+    print(f"완료 {time.perf_counter() - t0:.1f}초")
+    result.to_csv(a.out, index=False)
+    with pd.option_context('display.width', 200, 'display.max_columns', 30):
+        print(result.head(a.top).to_string())
+    sys.exit(0)
@@ -0,0 +1,107 @@
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+import pyupbit
+
+from request_scheduler import SCHEDULER
+
+# -----------------------------------------------------------------------------
+# [호가 서비스] 여러 종목 호가를 한 번에 조회 + 짧은 TTL 캐시 + 벡터 지표
+#  - 진입 필터(analyze_orderbook_depth)와 청산 로직(방어벽 붕괴)이 함께 사용
+# -----------------------------------------------------------------------------
+DEPTH = 5           # 상위 5호가 기준
+CHUNK = 100         # 요청 1회당 종목 수
+FAKE_WALL_RATIO = 5.0
+REAL_WALL_MULT = 2.0
+COLLAPSE_RATIO = 0.2
+
+
+# limit_info=True -> 응답의 Remaining-Req 를 스케줄러 'orderbook' 그룹에 반영
+def _fetch_orderbooks(tickers):
+    books, limit = pyupbit.get_orderbook(tickers, limit_info=True)
+    SCHEDULER.observe(limit, 'orderbook')
+    return books
+
+
+# obs: 호가 dict 리스트 -> 종목별 지표 배열
+def depth_metrics(obs):
+    n = len(obs)
+    ask = np.zeros((n, DEPTH)); bid = np.zeros((n, DEPTH))
+    for i, ob in enumerate(obs):
+        units = (ob or {}).get('orderbook_units', [])[:DEPTH]
+        for j, u in enumerate(units):
+            ask[i, j] = u['ask_size']; bid[i, j] = u['bid_size']
+    ask_vol = ask.sum(axis=1)
+    bid_vol = bid.sum(axis=1)
+    ratio = bid_vol / np.where(ask_vol == 0, 0.0001, ask_vol)
+    fake_wall = ratio > FAKE_WALL_RATIO
+    real_wall = (bid[:, 0] > bid_vol / DEPTH * REAL_WALL_MULT) & ~fake_wall
+    bid_collapse = bid_vol < ask_vol * COLLAPSE_RATIO
+    return {'ratio': ratio, 'real_wall': real_wall, 'fake_wall': fake_wall,
+            'bid_collapse': bid_collapse, 'ask_vol': ask_vol, 'bid_vol': bid_vol}
+
+
+class OrderbookService:
+    def __init__(self, ttl=1.0, chunk=CHUNK, fetcher=None):
+        self.ttl = ttl
+        self.chunk = chunk
+        self.fetcher = fetcher or _fetch_orderbooks
+        self.books = {}       # ticker -> (호가, 수신시각)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'books': 0}
+
+    def _fresh(self, ticker, now):
+        b = self.books.get(ticker)
+        return b is not None and now - b[1] < self.ttl
+
+    def _fetch(self, tickers):
+        res = SCHEDULER.call('orderbook', self.fetcher, list(tickers))
+        self.stats['requests'] += 1
+        if isinstance(res, dict): res = [res]
+        now = time.time()
+        with self.lock:
+            for ob in res or []:
+                self.books[ob['market']] = (ob, now)
+        self.stats['books'] += len(res or [])
+
+    # 오래된/없는 종목만 묶어서 조회
+    def prefetch(self, tickers):
+        now = time.time()
+        with self.lock:
+            stale = [t for t in dict.fromkeys(tickers) if not self._fresh(t, now)]
+        for i in range(0, len(stale), self.chunk):
+            part = stale[i:i + self.chunk]
+            try: self._fetch(part)
+            except Exception as e:
+                # 묶음 중 하나가 문제면 묶음 전체가 실패 -> 반으로 나눠 재시도
+                logging.info(f"호가 묶음 조회 실패 ({len(part)}종목): {e}")
+                if len(part) > 1:
+                    self.prefetch(part[:len(part) // 2]); self.prefetch(part[len(part) // 2:])
+
+    # 스캔 1회분 호가 고정 사본 (TTL 지나도 스캔이 끝날 때까지 재조회 없이 사용)
+    def snapshot(self, tickers):
+        self.prefetch(tickers)
+        with self.lock:
+            return {t: self.books[t][0] for t in tickers if t in self.books}
+
+    def get(self, ticker):
+        with self.lock:
+            if self._fresh(ticker, time.time()): return self.books[ticker][0]
+        self.prefetch([ticker])
+        with self.lock:
+            b = self.books.get(ticker)
+        return b[0] if b else None
+
+    def depth(self, tickers):
+        self.prefetch(tickers)
+        with self.lock:
+            obs = [self.books.get(t, (None, 0))[0] for t in tickers]
+        m = depth_metrics(obs)
+        df = pd.DataFrame({k: m[k] for k in ('ratio', 'real_wall', 'fake_wall', 'bid_collapse')}, index=list(tickers))
+        df['ok'] = [ob is not None for ob in obs]
+        return df
+
+
+ORDERBOOKS = OrderbookService()
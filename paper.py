@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import uuid
+import logging
+import argparse
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from exchange import OrderExecutor, MIN_ORDER_KRW
+
+# -----------------------------------------------------------------------------
+# [모의투자] 프로세스 안의 가상 거래소 (실계좌 미사용)
+#  - JAVIS_PAPER=1 이면 core 의 주문/잔고가 전부 여기로 (ExchangeClient 와 같은 메서드)
+#  - 시장가 주문은 실시간(또는 재생) 호가를 위에서부터 먹으면서 체결 + 슬리피지 + 수수료
+#  - 잔고 / 체결 장부는 .javis_state/paper_account.json 에 유지
+#  python paper.py replay --synthetic 100 --bars 600   # 스캔 -> 매수 -> 트레일링 청산 가속 재생
+#  python paper.py replay --fixture .javis_state/fixtures/upbit.json.gz
+# -----------------------------------------------------------------------------
+STATE_DIR = os.getenv("JAVIS_STATE_DIR", ".javis_state")
+PAPER_PATH = os.path.join(STATE_DIR, "paper_account.json")
+PAPER_CASH = float(os.getenv("JAVIS_PAPER_CASH", "1000000"))
+FEE = 0.0005                # 업비트 원화마켓 수수료 0.05%
+SLIPPAGE_BPS = float(os.getenv("JAVIS_PAPER_SLIPPAGE_BPS", "5"))   # 호가 위에 추가로 얹는 미끄러짐
+LEDGER_KEEP = 1000
+
+
+def _err(name, message):
+    return {'error': {'name': name, 'message': message}}
+
+
+# 호가 단계 [(가격, 수량)] 를 위에서부터 소진 -> (체결 수량, 체결 금액)
+#  krw: 이 금액만큼 사기 / volume: 이 수량만큼 팔기. 호가가 모자라면 마지막 가격으로 나머지 체결
+def walk_book(levels, krw=None, volume=None):
+    filled, cost = 0.0, 0.0
+    for price, size in levels:
+        if krw is not None:
+            take = min(size, (krw - cost) / price)
+        else:
+            take = min(size, volume - filled)
+        filled += take; cost += take * price
+        if (krw is not None and cost >= krw - 1e-9) or (volume is not None and filled >= volume - 1e-12): break
+    else:
+        price = levels[-1][0]
+        if krw is not None and cost < krw: filled += (krw - cost) / price; cost = krw
+        if volume is not None and filled < volume: cost += (volume - filled) * price; filled = volume
+    return filled, cost
+
+
+class PaperExchange:
+    def __init__(self, cash=PAPER_CASH, book_fn=None, price_fn=None, fee=FEE, slippage_bps=SLIPPAGE_BPS, path=None):
+        self.fee = fee
+        self.slip = slippage_bps / 1e4
+        self.book_fn = book_fn
+        self.price_fn = price_fn
+        self.path = path
+        self.lock = threading.Lock()
+        self.initial = cash
+        self.accounts = {'KRW': {'balance': cash, 'avg_buy_price': 0.0}}
+        self.ledger = deque(maxlen=LEDGER_KEEP)
+        self.orders = {}
+        if path: self._load()
+
+    # ----- 저장 -----
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f: d = json.load(f)
+            self.initial = d['initial']; self.accounts = d['accounts']
+            self.ledger.extend(d['ledger'])
+            self.orders = {o['uuid']: o for o in self.ledger}
+        except FileNotFoundError: pass
+        except Exception as e: logging.info(f"모의 계좌 읽기 실패: {e}")
+
+    def _save(self):
+        if not self.path: return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({'initial': self.initial, 'accounts': self.accounts, 'ledger': list(self.ledger)}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def reset(self, cash=None):
+        with self.lock:
+            self.initial = cash or self.initial
+            self.accounts = {'KRW': {'balance': self.initial, 'avg_buy_price': 0.0}}
+            self.ledger.clear(); self.orders.clear()
+            self._save()
+
+    # ----- 호가 -----
+    def _levels(self, ticker, side):
+        ob = self.book_fn(ticker) if self.book_fn else None
+        if ob and ob.get('orderbook_units'):
+            k = 1 + self.slip if side == 'bid' else 1 - self.slip
+            key = 'ask' if side == 'bid' else 'bid'
+            return [(u[f'{key}_price'] * k, u[f'{key}_size']) for u in ob['orderbook_units']]
+        p = self.price_fn(ticker) if self.price_fn else None
+        if not p: return None
+        return [(p * (1 + self.slip if side == 'bid' else 1 - self.slip), float('inf'))]
+
+    def _fill(self, ticker, side, ord_type, filled, cost, fee):
+        o = {'uuid': str(uuid.uuid4()), 'market': ticker, 'side': side, 'ord_type': ord_type, 'state': 'done',
+             'executed_volume': filled, 'avg_price': cost / filled if filled else 0.0, 'funds': cost,
+             'paid_fee': fee, 'trades_count': 1, 'created_at': time.time()}
+        self.ledger.append(o)
+        self.orders[o['uuid']] = o
+        if len(self.orders) > LEDGER_KEEP:
+            for k in list(self.orders)[:len(self.orders) - LEDGER_KEEP]: del self.orders[k]
+        self._save()
+        return o
+
+    # ----- ExchangeClient / pyupbit.Upbit 호환 -----
+    def get_balances(self):
+        with self.lock:
+            return [{'currency': c, 'balance': str(a['balance']), 'locked': '0', 'avg_buy_price': str(a['avg_buy_price']),
+                     'avg_buy_price_modified': False, 'unit_currency': 'KRW'} for c, a in self.accounts.items()]
+
+    def get_balance(self, ticker="KRW"):
+        cur = ticker.split('-')[-1]
+        with self.lock: return float(self.accounts.get(cur, {}).get('balance', 0))
+
+    def buy_market_order(self, ticker, price):
+        price = float(price)
+        if price < MIN_ORDER_KRW: return _err('under_min_total_bid', f"최소 주문금액 {MIN_ORDER_KRW}원")
+        levels = self._levels(ticker, 'bid')
+        if not levels: return _err('market_offline', f"{ticker} 호가 없음")
+        with self.lock:
+            krw = self.accounts['KRW']
+            fee = price * self.fee
+            if krw['balance'] < price + fee: return _err('insufficient_funds_bid', "주문가능 금액 부족")
+            filled, cost = walk_book(levels, krw=price)
+            krw['balance'] -= cost + fee
+            cur = ticker.split('-')[-1]
+            a = self.accounts.setdefault(cur, {'balance': 0.0, 'avg_buy_price': 0.0})
+            total = a['balance'] + filled
+            a['avg_buy_price'] = (a['balance'] * a['avg_buy_price'] + cost) / total
+            a['balance'] = total
+            return self._fill(ticker, 'bid', 'price', filled, cost, fee)
+
+    def sell_market_order(self, ticker, volume):
+        volume = float(volume)
+        cur = ticker.split('-')[-1]
+        levels = self._levels(ticker, 'ask')
+        if not levels: return _err('market_offline', f"{ticker} 호가 없음")
+        with self.lock:
+            a = self.accounts.get(cur)
+            if a is None or a['balance'] < volume * (1 - 1e-9): return _err('insufficient_funds_ask', "매도가능 수량 부족")
+            filled, cost = walk_book(levels, volume=volume)
+            if cost < MIN_ORDER_KRW: return _err('under_min_total_ask', f"최소 주문금액 {MIN_ORDER_KRW}원")
+            fee = cost * self.fee
+            self.accounts['KRW']['balance'] += cost - fee
+            a['balance'] = max(0.0, a['balance'] - filled)
+            if a['balance'] * (cost / filled) < 1: del self.accounts[cur]     # 먼지 잔량 정리
+            return self._fill(ticker, 'ask', 'market', filled, cost, fee)
+
+    def get_order(self, order_uuid):
+        o = self.orders.get(order_uuid)
+        return dict(o) if o else _err('order_not_found', order_uuid)
+
+    # ----- 요약 -----
+    def summary(self, prices=None):
+        with self.lock:
+            cash = self.accounts['KRW']['balance']
+            held = {c: a for c, a in self.accounts.items() if c != 'KRW'}
+            ledger = list(self.ledger)
+        prices = prices or {}
+        value = sum(a['balance'] * prices.get(f"KRW-{c}", a['avg_buy_price']) for c, a in held.items())
+        equity = cash + value
+        return {'initial': self.initial, 'cash': cash, 'equity': equity, 'return_pct': (equity / self.initial - 1) * 100,
+                'positions': len(held), 'buys': sum(o['side'] == 'bid' for o in ledger),
+                'sells': sum(o['side'] == 'ask' for o in ledger), 'fees': sum(o['paid_fee'] for o in ledger)}
+
+
+PAPER = None
+PAPER_EXECUTOR = None
+_paper_lock = threading.Lock()
+
+def get_paper_executor(book_fn=None, price_fn=None):
+    global PAPER, PAPER_EXECUTOR
+    with _paper_lock:
+        if PAPER_EXECUTOR is None:
+            PAPER = PaperExchange(book_fn=book_fn, price_fn=price_fn, path=PAPER_PATH)
+            PAPER_EXECUTOR = OrderExecutor(PAPER)
+        return PAPER_EXECUTOR
+
+
+# ----- 가속 재생: 스캔 -> 자동 매수 -> 청산 루프 -----
+def replay(fx, size=None, start=100, steps=None, cash=PAPER_CASH, progress=True):
+    global PAPER, PAPER_EXECUTOR
+    import upbit_fixtures as ufx
+    import core
+    from exit_engine import ExitEngine, PeakStore
+    from metrics import METRICS
+
+    core.tele_token = None                      # 재생 중 실제 알림 금지
+    market = ufx.FixtureUpbit(fx, size=size)
+    paper = PaperExchange(cash, book_fn=core.get_live_orderbook, price_fn=core.get_live_price)
+    ufx.install(market, client=paper)
+    with _paper_lock: PAPER, PAPER_EXECUTOR = paper, core.get_executor(None, None)
+
+    exits = ExitEngine(core.sell_market_order, peaks=PeakStore(os.path.join(tempfile.mkdtemp(), "peaks.json")))
+    exits.pool = ThreadPoolExecutor(max_workers=1)      # 단계마다 주문 완료를 기다리기 위해 순차
+    report, equity, step_ms = {}, [], []
+    end = market.bars if steps is None else min(market.bars, start + steps)
+    t_run = time.perf_counter()
+    for k in range(start, end):
+        market.seek(k)
+        ufx.reset_quotes()
+        t0 = time.perf_counter()
+        cash_now, total, portfolio = core.get_full_asset_info(exits.peaks)
+        exits.sync_positions(portfolio)
+        exits.arm([p['종목'] for p in portfolio], True)
+        for p in portfolio:
+            if p['should_sell']: exits.fire(p['종목'], p['reason'])
+        for t, price in core.get_live_prices(list(exits.positions)).items(): exits.on_price(t, price)
+        exits.pool.submit(int).result()
+        core.scan_whole_market(paper.get_balance("KRW"), report, auto_buy=True)
+        step_ms.append((time.perf_counter() - t0) * 1000)
+        equity.append(total)
+        if progress and (k - start + 1) % 50 == 0:
+            print(f"  {k - start + 1}/{end - start}봉  평가 {total:,.0f}원  ({np.mean(step_ms[-50:]):.0f}ms/봉)")
+    elapsed = time.perf_counter() - t_run
+
+    market.seek(end)
+    ufx.reset_quotes()
+    held = [f"KRW-{c}" for c in paper.accounts if c != 'KRW']
+    s = paper.summary(core.get_live_prices(held))
+    hist = METRICS.to_dict()['histograms']
+    lat = lambda name: next(iter(hist.get(name, {}).values()), None)
+    a = np.asarray(step_ms) if step_ms else np.zeros(1)
+    s.update({'bars': len(step_ms), 'elapsed_s': elapsed, 'bars_per_s': len(step_ms) / elapsed if elapsed else 0.0,
+              'step_p50_ms': float(np.percentile(a, 50)), 'step_p99_ms': float(np.percentile(a, 99)),
+              'entry_ack': lat('entry_signal_to_ack_seconds'), 'exit_ack': lat('exit_trigger_to_ack_seconds'),
+              'equity_curve': equity})
+    return s
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("replay")
+    r.add_argument("--fixture")
+    r.add_argument("--synthetic", type=int, default=0)
+    r.add_argument("--bars", type=int, default=600)
+    r.add_argument("--size", type=int)
+    r.add_argument("--start", type=int, default=100)
+    r.add_argument("--steps", type=int)
+    r.add_argument("--cash", type=float, default=PAPER_CASH)
+    sub.add_parser("show")
+    sub.add_parser("reset")
+    a = ap.parse_args()
+
+    if a.cmd == "replay":
+        import upbit_fixtures as ufx
+        fx = ufx.synthetic(a.synthetic, a.bars) if a.synthetic else ufx.load(a.fixture or ufx.DEFAULT_FIXTURE)
+        s = replay(fx, a.size, a.start, a.steps, a.cash)
+        print(f"{s['bars']}봉 재생 {s['elapsed_s']:.1f}초 ({s['bars_per_s']:.1f}봉/초, 실시간 대비 x{s['bars_per_s'] * 900:,.0f})")
+        print(f"봉당 결정 p50 {s['step_p50_ms']:.1f}ms / p99 {s['step_p99_ms']:.1f}ms")
+        for name, key in (('매수 신호 -> 체결', 'entry_ack'), ('청산 신호 -> 체결', 'exit_ack')):
+            if s[key]: print(f"{name} p50 {s[key]['p50_ms']:.2f}ms / p99 {s[key]['p99_ms']:.2f}ms ({s[key]['n']}건)")
+        print(f"매수 {s['buys']} / 매도 {s['sells']} / 보유 {s['positions']} / 수수료 {s['fees']:,.0f}원")
+        print(f"평가 {s['equity']:,.0f}원 ({s['return_pct']:+.2f}%)")
+    else:
+        p = PaperExchange(path=PAPER_PATH)
+        if a.cmd == "reset": p.reset(PAPER_CASH); print(f"모의 계좌 초기화: {PAPER_CASH:,.0f}원")
+        else:
+            print(json.dumps(p.summary(), ensure_ascii=False, indent=1))
+            for o in list(p.ledger)[-20:]:
+                print(f"{time.strftime('%m-%d %H:%M:%S', time.localtime(o['created_at']))} {o['market']:12s} "
+                      f"{'매수' if o['side'] == 'bid' else '매도'} {o['executed_volume']:.6f} @ {o['avg_price']:,.4f}")
@@ -0,0 +1,74 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# [예선] 전체 시세 스냅샷 1회로 가망 없는 종목 걸러내기 (벡터 연산)
+#  - 입력: pyupbit.get_current_price(tickers, verbose=True) 결과 (list of dict)
+#  - 통과한 종목만 캔들/호가 다운로드 + analyze_quant_coin 으로 넘어감
+#  - 기본: 70점이 확실히 불가능한 종목만 제외 (24시간 거래 없음) -> 신호 결과는 예선 없을 때와 같음
+#  - JAVIS_PRESCREEN_STRICT=1: 아래 추정 규칙까지 적용 (거래대금/과열/저가)
+#    세력매집(85점)은 거래대금 조건이 없고 스나이퍼도 강도만으로 70점이 나올 수 있어서
+#    이 규칙들은 신호를 놓칠 수 있음 -> 요청 수를 더 줄이고 싶을 때만
+# -----------------------------------------------------------------------------
+PRESCREEN_STRICT = os.getenv("JAVIS_PRESCREEN_STRICT", "0") == "1"
+PRESCREEN_RULES = {
+    # 추정 규칙 (PRESCREEN_STRICT 일 때만)
+    'min_value_24h': 100_000_000,     # 24h 거래대금 하한 (원) - 잡코인 거래량 부족
+    # 과열: 급등 + 당일 고점 부근 -> RSI 70 이상 탈락이 사실상 확실
+    'overheat_change': 0.25,           # 전일 대비 +25% 이상
+    'overheat_near_high': 0.99,        # 현재가 >= 24h 고가 * 0.99
+    'min_price': 0,                    # 가격 하한 (0 = 사용 안 함)
+}
+
+
+def snapshot_frame(current_data):
+    if not isinstance(current_data, list) or not current_data: return None
+    cols = ['market', 'trade_price', 'high_price', 'low_price', 'signed_change_rate', 'acc_trade_price_24h']
+    df = pd.DataFrame(current_data)
+    if not set(cols) <= set(df.columns): return None
+    return df[cols].set_index('market')
+
+
+# 반환: (통과 종목 list, 탈락 사유별 개수 dict)
+def prescreen(current_data, tickers, rules=PRESCREEN_RULES, strict=PRESCREEN_STRICT):
+    snap = snapshot_frame(current_data)
+    if snap is None: return list(tickers), {}
+    snap = snap.reindex(list(tickers))
+
+    price = snap['trade_price'].to_numpy(dtype=np.float64)
+    high = snap['high_price'].to_numpy(dtype=np.float64)
+    change = snap['signed_change_rate'].to_numpy(dtype=np.float64)
+    value = snap['acc_trade_price_24h'].to_numpy(dtype=np.float64)
+
+    # 스냅샷에 없는 종목(NaN)은 판단 불가 -> 통과
+    known = ~np.isnan(price)
+    drops = {'거래없음': known & ((value <= 0) | (price <= 0))}
+    if strict: drops.update({
+        '거래대금미달': known & (value < rules['min_value_24h']),
+        '과열': known & (change >= rules['overheat_change']) & (price >= high * rules['overheat_near_high']),
+        '저가': known & (price < rules['min_price']),
+    })
+    dropped = np.zeros(len(price), dtype=bool)
+    counts = {}
+    for name, mask in drops.items():
+        counts[name] = int((mask & ~dropped).sum())
+        dropped |= mask
+    passed = [t for t, d in zip(snap.index, dropped) if not d]
+    return passed, counts
+
+
+# 단계별 개수/시간 기록
+class Funnel:
+    def __init__(self):
+        self.stages = []
+        self.t = time.perf_counter()
+
+    def mark(self, name, count):
+        now = time.perf_counter()
+        self.stages.append({'stage': name, 'count': count, 'ms': (now - self.t) * 1000})
+        self.t = now
+
+    def summary(self):
+        return " ➔ ".join(f"{s['stage']} {s['count']}" for s in self.stages)
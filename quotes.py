@@ -0,0 +1,80 @@
+import os
+import time
+import logging
+import threading
+import pyupbit
+
+from request_scheduler import SCHEDULER
+
+# -----------------------------------------------------------------------------
+# [시세 스냅샷] 여러 종목 현재가를 요청 1회로 받아 TTL 동안 공유
+#  - 포트폴리오 / 타임라인 / 전체 청산 / 스캔 예선이 같은 테이블을 읽음
+#  - 조회 안 되는 종목(PUMP/BEAM 같은 케이스)은 묶음을 반씩 나눠 찾아낸 뒤
+#    일정 시간 묶음에서 제외 -> 종목별 개별 조회로 돌아가지 않음
+# -----------------------------------------------------------------------------
+QUOTE_TTL = float(os.getenv("JAVIS_QUOTE_TTL", "2.0"))
+BAD_TICKER_TTL = 600    # 조회 실패 종목 제외 시간 (초)
+CHUNK = 200             # 요청 1회당 종목 수 (업비트 ticker API 한도)
+
+
+# limit_info=True -> 응답의 Remaining-Req 를 스케줄러 'ticker' 그룹에 반영
+def _fetch_tickers(tickers):
+    rows, limit = pyupbit.get_current_price(tickers, limit_info=True, verbose=True)
+    SCHEDULER.observe(limit, 'ticker')
+    return rows
+
+
+class QuoteBook:
+    def __init__(self, ttl=QUOTE_TTL, fetcher=None):
+        self.ttl = ttl
+        self.fetcher = fetcher or _fetch_tickers
+        self.rows = {}        # ticker -> (ticker API 원본 dict, 수신시각)
+        self.bad = {}         # ticker -> 제외 해제 시각
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'failures': 0}
+
+    def _fetch(self, tickers):
+        self.stats['requests'] += 1
+        res = SCHEDULER.call('ticker', self.fetcher, list(tickers))
+        if not isinstance(res, list): raise ValueError(f"시세 응답 이상: {res}")
+        now = time.time()
+        with self.lock:
+            for row in res: self.rows[row['market']] = (row, now)
+
+    def _fetch_isolated(self, tickers):
+        try: self._fetch(tickers)
+        except Exception as e:
+            self.stats['failures'] += 1
+            if len(tickers) == 1:
+                logging.info(f"시세 조회 불가 종목 제외: {tickers[0]} ({e})")
+                with self.lock: self.bad[tickers[0]] = time.time() + BAD_TICKER_TTL
+                return
+            half = len(tickers) // 2
+            self._fetch_isolated(tickers[:half]); self._fetch_isolated(tickers[half:])
+
+    def refresh(self, tickers, force=False):
+        now = time.time()
+        with self.lock:
+            for t in [t for t, until in self.bad.items() if until < now]: del self.bad[t]
+            need = [t for t in dict.fromkeys(tickers) if t not in self.bad
+                    and (force or t not in self.rows or now - self.rows[t][1] >= self.ttl)]
+        for i in range(0, len(need), CHUNK):
+            self._fetch_isolated(need[i:i + CHUNK])
+
+    # ticker -> 현재가 (조회 불가 종목은 빠짐)
+    def prices(self, tickers):
+        self.refresh(tickers)
+        with self.lock:
+            return {t: float(self.rows[t][0]['trade_price']) for t in tickers if t in self.rows}
+
+    def price(self, ticker):
+        return self.prices([ticker]).get(ticker)
+
+    # ticker API 원본 행 리스트 (스캔 예선용)
+    def snapshot(self, tickers, force=False):
+        self.refresh(tickers, force=force)
+        with self.lock:
+            return [self.rows[t][0] for t in tickers if t in self.rows]
+
+
+QUOTES = QuoteBook()
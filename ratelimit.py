@@ -0,0 +1,63 @@
+import time
+import threading
+
+# -----------------------------------------------------------------------------
+# [공용] 토큰 버킷 (업비트 초당 요청 제한 공유)
+# -----------------------------------------------------------------------------
+# 업비트 REST 초당 제한 (IP/계정 단위, 그룹별)
+UPBIT_LIMITS = {
+    'market': 10, 'candle': 10, 'ticker': 10, 'orderbook': 10, 'trade': 10,
+    'exchange': 30, 'order': 8,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    # keep: 남겨둘 여유 토큰 (낮은 우선순위 요청용)
+    def try_acquire(self, n=1, keep=0):
+        with self.lock:
+            self._refill()
+            if self.tokens >= n + keep:
+                self.tokens -= n
+                return True
+            return False
+
+    # n개(+여유분)가 모일 때까지 남은 시간 (초)
+    def eta(self, n=1, keep=0):
+        with self.lock:
+            self._refill()
+            return max(0.0, (n + keep - self.tokens) / self.rate)
+
+    # 토큰이 생길 때까지 대기 (timeout 초과 시 False)
+    def acquire(self, n=1, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return True
+                wait = (n - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline: return False
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(group):
+    with _buckets_lock:
+        if group not in _buckets:
+            _buckets[group] = TokenBucket(UPBIT_LIMITS.get(group, 10))
+        return _buckets[group]
@@ -0,0 +1,189 @@
+import re
+import time
+import heapq
+import itertools
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from ratelimit import UPBIT_LIMITS, get_bucket
+from metrics import METRICS
+
+# -----------------------------------------------------------------------------
+# [요청 스케줄러] 모든 업비트 REST 호출이 거쳐 가는 우선순위 큐
+#  - 우선순위: 청산 주문 > 진입 주문 > 보유 종목 시세 > 시장 스캔
+#    (같은 그룹 안에서 높은 순위가 먼저 토큰을 받음, 스캔은 여유 토큰 1개를 남김)
+#  - Remaining-Req 헤더(group=..; min=..; sec=..)로 남은 요청 수를 따라감
+#    (주문/잔고는 응답 헤더, 시세/호가는 pyupbit limit_info=True 결과)
+#  - 429 를 받으면 실패로 끝내지 않고 그룹을 잠깐 멈춘 뒤 속도를 낮춰 재시도
+#    (성공이 이어지면 원래 속도로 천천히 복구)
+# -----------------------------------------------------------------------------
+PRIORITIES = {'exit': 0, 'entry': 1, 'holdings': 2, 'scan': 3}
+DEFAULT_PRIORITY = 'holdings'
+RESERVE = {'scan': 1}          # 이 순위는 버킷에 토큰을 남겨둔 채로만 가져감
+MAX_RETRIES = 4
+BACKOFF_START = 0.5            # 첫 429 후 멈춤 시간 (초), 연속되면 2배씩
+BACKOFF_MAX = 8.0
+RECOVER_STEP = 0.5             # 성공 1회당 속도 복구량 (요청/초)
+
+# 헤더의 그룹 이름 -> UPBIT_LIMITS 키
+HEADER_GROUPS = {'candles': 'candle', 'trades': 'trade', 'default': 'exchange', 'order': 'order'}
+_REMAINING_RE = re.compile(r"group=([a-z\-]+); min=([0-9]+); sec=([0-9]+)")
+
+
+class RateLimited(Exception):
+    """429 응답 (재시도 대상)"""
+
+
+_local = threading.local()
+
+@contextmanager
+def priority(name):
+    prev = getattr(_local, 'priority', None)
+    _local.priority = name
+    try: yield
+    finally: _local.priority = prev
+
+def current_priority():
+    return getattr(_local, 'priority', None) or DEFAULT_PRIORITY
+
+# 이 스레드가 보낸 요청 수 (화면 새로고침 1회당 API 호출 수 확인용)
+def thread_calls():
+    return getattr(_local, 'calls', 0)
+
+
+def parse_remaining(header):
+    m = _REMAINING_RE.search(header or "")
+    if not m: return None
+    return {'group': m.group(1), 'min': int(m.group(2)), 'sec': int(m.group(3))}
+
+
+def _is_rate_limited(e):
+    if isinstance(e, RateLimited): return True
+    if getattr(e, 'code', None) == 429: return True   # pyupbit TooManyRequests
+    return '429' in str(e) or 'too_many' in str(e).lower()
+
+
+class _Gate:
+    def __init__(self, group):
+        self.group = group
+        self.bucket = get_bucket(group)
+        self.nominal = UPBIT_LIMITS.get(group, self.bucket.rate)
+        self.cond = threading.Condition()
+        self.waiting = []              # heap (순위, 순번)
+        self.paused_until = 0.0
+        self.backoff = 0.0
+        self.remaining = None          # 마지막 Remaining-Req
+        self.granted = {p: 0 for p in PRIORITIES}
+        self.waits = {p: deque(maxlen=500) for p in PRIORITIES}
+        self.throttled = 0
+
+
+class RequestScheduler:
+    def __init__(self):
+        self.gates = {}
+        self.lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _gate(self, group):
+        with self.lock:
+            if group not in self.gates: self.gates[group] = _Gate(group)
+            return self.gates[group]
+
+    # 토큰을 받을 때까지 대기 -> 대기 시간(초)
+    def acquire(self, group, prio=None):
+        prio = prio or current_priority()
+        g = self._gate(group)
+        entry = (PRIORITIES[prio], next(self._seq))
+        keep = RESERVE.get(prio, 0)
+        started = time.perf_counter()
+        with g.cond:
+            heapq.heappush(g.waiting, entry)
+            g.cond.notify_all()
+            while True:
+                now = time.time()
+                if g.waiting[0] == entry:
+                    if now < g.paused_until: wait = g.paused_until - now
+                    elif g.bucket.try_acquire(keep=keep): break
+                    else: wait = g.bucket.eta(keep=keep)
+                else:
+                    wait = 0.5     # 앞 순번이 토큰을 받으면 notify 로 깨어남
+                g.cond.wait(max(wait, 0.001))
+            heapq.heappop(g.waiting)
+            waited = time.perf_counter() - started
+            g.granted[prio] += 1
+            g.waits[prio].append(waited * 1000)
+            g.cond.notify_all()
+        METRICS.observe('api_wait_seconds', waited, group=group, priority=prio)
+        return waited
+
+    # ----- 서버 피드백 -----
+    # header: Remaining-Req 문자열 또는 pyupbit limit_info=True 로 받은 dict
+    def observe(self, header, group=None):
+        info = header if isinstance(header, dict) else parse_remaining(header)
+        if info is None: return None
+        group = group or HEADER_GROUPS.get(info['group'], info['group'])
+        g = self._gate(group)
+        with g.cond:
+            g.remaining = info
+            # 서버가 아는 남은 수가 더 정확 -> 로컬 버킷을 맞춤
+            with g.bucket.lock: g.bucket.tokens = min(g.bucket.tokens, float(info['sec']))
+            if info['sec'] == 0: g.paused_until = max(g.paused_until, time.time() + 1.0)
+        return info
+
+    def succeeded(self, group):
+        g = self._gate(group)
+        with g.cond:
+            g.backoff = 0.0
+            if g.bucket.rate < g.nominal: g.bucket.rate = min(g.nominal, g.bucket.rate + RECOVER_STEP)
+
+    def throttled(self, group):
+        g = self._gate(group)
+        with g.cond:
+            g.throttled += 1
+            g.backoff = min(BACKOFF_MAX, g.backoff * 2 or BACKOFF_START)
+            g.paused_until = max(g.paused_until, time.time() + g.backoff)
+            g.bucket.rate = max(1.0, g.bucket.rate * 0.5)
+            with g.bucket.lock: g.bucket.tokens = 0.0
+            g.cond.notify_all()
+        logging.info(f"요청 제한 초과 ({group}) -> {g.backoff:.1f}초 대기, 속도 {g.bucket.rate:.1f}/s")
+
+    # 토큰 획득 -> 호출 -> 429 면 백오프 후 재시도
+    def call(self, group, fn, *args, prio=None, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire(group, prio)
+            _local.calls = thread_calls() + 1
+            t0 = time.perf_counter()
+            try: res = fn(*args, **kwargs)
+            except Exception as e:
+                limited = _is_rate_limited(e)
+                METRICS.inc('api_calls_total', group=group, status='429' if limited else 'error')
+                if not limited or attempt == MAX_RETRIES: raise
+                self.throttled(group)
+                continue
+            finally: METRICS.observe('api_latency_seconds', time.perf_counter() - t0, group=group)
+            METRICS.inc('api_calls_total', group=group, status='ok')
+            self.succeeded(group)
+            return res
+
+    # ----- 통계 -----
+    def stats(self):
+        out = {}
+        with self.lock: gates = list(self.gates.values())
+        for g in gates:
+            with g.cond:
+                waits = {}
+                for p, d in g.waits.items():
+                    if not d: continue
+                    a = np.array(d)
+                    waits[p] = {'n': g.granted[p], 'p50_ms': float(np.percentile(a, 50)),
+                                'p99_ms': float(np.percentile(a, 99)), 'max_ms': float(a.max())}
+                out[g.group] = {'queued': len(g.waiting), 'rate': g.bucket.rate, 'throttled': g.throttled,
+                                'remaining': g.remaining['sec'] if g.remaining else None, 'wait': waits}
+        return out
+
+
+SCHEDULER = RequestScheduler()
@@ -0,0 +1,50 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from request_scheduler import priority
+from candle_cache import CANDLE_CACHE
+from orderbook import ORDERBOOKS
+
+# -----------------------------------------------------------------------------
+# [스캔 파이프라인] 캔들 병렬 수집 + 호가 묶음 조회 (초당 제한 공유)
+#  - 호가는 시작 시 100종목 단위로 한 번에 받아두고 캔들만 종목별로 수집
+#    (받아둔 사본을 스캔 끝까지 사용 -> 캔들 수집이 TTL 보다 길어도 종목별 재조회 없음)
+#  - 도착하는 순서대로 (ticker, df, ob) 를 흘려보냄 -> 바로 채점
+# -----------------------------------------------------------------------------
+SCAN_WORKERS = 8
+
+
+def fetch_candles(ticker, interval="minute15", count=100):
+    return CANDLE_CACHE.get(ticker, interval, count)
+
+
+def fetch_orderbook(ticker):
+    return ORDERBOOKS.get(ticker)
+
+
+# 작업 스레드는 스캔 우선순위로 요청 (청산/진입/보유 시세에 양보)
+def _fetch_one(ticker, count, books=None):
+    with priority('scan'): return _fetch_inputs(ticker, count, books)
+
+
+def _fetch_inputs(ticker, count, books=None):
+    try: df = fetch_candles(ticker, count=count)
+    except Exception as e:
+        logging.info(f"캔들 조회 실패 {ticker}: {e}")
+        return ticker, None, None
+    if df is None or len(df) < 20: return ticker, None, None
+    ob = (books or {}).get(ticker)
+    if ob is not None: return ticker, df, ob
+    try: ob = fetch_orderbook(ticker)
+    except Exception as e:
+        logging.info(f"호가 조회 실패 {ticker}: {e}")
+        ob = None
+    return ticker, df, ob
+
+
+def iter_scan_inputs(tickers, workers=SCAN_WORKERS, count=100):
+    books = ORDERBOOKS.snapshot(tickers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fetch_one, t, count, books) for t in tickers]
+        for f in as_completed(futures):
+            yield f.result()
@@ -0,0 +1,156 @@
+import os
+import time
+import zlib
+import logging
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from candle_cache import CANDLE_CACHE, COLS
+from optimizer import share_arrays, attach_arrays
+
+# -----------------------------------------------------------------------------
+# [샤드 스캔] 채점(analyze_quant_coin)을 여러 프로세스로 나눠서
+#  - JAVIS_SCAN_PROCS=4 이면 사용 (0 = 기존 단일 프로세스 스캔)
+#  - 수집(네트워크)은 지금처럼 스캔 스레드가 하고, 모인 캔들/호가를 공유 메모리 배열 하나로 올림
+#    -> 작업 프로세스는 이름으로 붙어서 자기 구간만 읽음 (DataFrame 피클링 없음)
+#  - 결과는 신호 dict (대부분 None) 만 돌려받고 순위/배팅/자동매수/알림은 부모(core)가 처리
+#  - 작업 프로세스는 살려두고 재사용 (core import / 지표 뱅크 준비는 프로세스당 1회)
+#  - 종목은 이름 해시로 항상 같은 프로세스에 배정 -> 그 프로세스의 지표 뱅크(증분 계산)가 계속 데워져 있음
+#  - 호가가 없는 종목은 빈 호가로 채점 (작업 프로세스가 REST 로 직접 조회하면 요청 제한 밖이 됨)
+# -----------------------------------------------------------------------------
+SCAN_PROCS = int(os.getenv("JAVIS_SCAN_PROCS", "0") or 0)
+MIN_SHARD = 16              # 종목이 이보다 적으면 나누지 않음 (프로세스 왕복이 더 비쌈)
+BOOK_UNITS = 15
+BOOK_FIELDS = ('ask_price', 'bid_price', 'ask_size', 'bid_size')
+
+
+# ----- 부모: 배열로 묶기 -----
+def pack_inputs(inputs, window):
+    n = len(inputs)
+    candles = np.full((n, window, len(COLS)), np.nan)
+    ts = np.zeros((n, window), dtype='int64')
+    rows = np.zeros(n, dtype='int64')
+    book = np.zeros((n, BOOK_UNITS, len(BOOK_FIELDS)))
+    units = np.full(n, -1, dtype='int64')          # -1 = 호가 없음
+    for i, (t, df, ob) in enumerate(inputs):
+        df = df.tail(window)
+        k = len(df)
+        rows[i] = k
+        ts[i, :k] = df.index.values.astype('datetime64[ns]').astype('int64')
+        candles[i, :k] = df.reindex(columns=list(COLS)).to_numpy(dtype=np.float64)
+        if ob and ob.get('orderbook_units') is not None:
+            us = ob['orderbook_units'][:BOOK_UNITS]
+            units[i] = len(us)
+            if us: book[i, :len(us)] = [[u[f] for f in BOOK_FIELDS] for u in us]
+    # value 열이 없는 입력 (거래대금 = 종가 x 거래량)
+    miss = np.isnan(candles[..., -1])
+    candles[..., -1][miss] = (candles[..., 3] * candles[..., 4])[miss]
+    return {'candles': candles, 'ts': ts, 'rows': rows, 'book': book, 'units': units}
+
+
+# ----- 작업 프로세스 -----
+_W = {}
+
+# store: 부모 캔들 캐시가 디스크 저장소를 쓰는지 -> 작업 프로세스도 같게 (상위봉 재구성 이력이 같아야 결과가 같음)
+def _init_worker(store=False):
+    logging.basicConfig(level=logging.WARNING)
+    import core                 # 프로세스당 1회 (지표 뱅크 / 상위봉 저장소 읽기 준비)
+    if store: core.attach_candle_store()
+    _W['core'] = core
+
+
+def _score_shard(meta, lo, hi, tickers):
+    core = _W['core']
+    arrays, blocks = attach_arrays(meta)
+    out = []
+    t0 = time.perf_counter()
+    try:
+        for i, t in zip(range(lo, hi), tickers):
+            k = int(arrays['rows'][i])
+            df = pd.DataFrame(np.array(arrays['candles'][i, :k]), columns=list(COLS),
+                              index=pd.DatetimeIndex(np.array(arrays['ts'][i, :k]).astype('datetime64[ns]')))
+            nu = max(int(arrays['units'][i]), 0)
+            ob = {'market': t, 'orderbook_units': [dict(zip(BOOK_FIELDS, map(float, arrays['book'][i, j]))) for j in range(nu)]}
+            res = core.analyze_quant_coin(t, df=df, ob=ob)
+            if res: out.append(res)
+    finally:
+        arrays = None
+        for b in blocks: b.close()
+    return out, hi - lo, (time.perf_counter() - t0) * 1000, os.getpid()
+
+
+class ShardedScanner:
+    def __init__(self, workers=SCAN_PROCS, window=100):
+        self.workers = max(1, workers)
+        self.window = window
+        self.lock = threading.Lock()
+        self._pools = None         # 작업 프로세스마다 1개짜리 풀 (종목 -> 프로세스 고정)
+        self.stats = {'scans': 0, 'tickers': 0, 'pack_ms': 0.0, 'score_ms': 0.0, 'shard_ms': []}
+
+    def pools(self):
+        with self.lock:
+            if self._pools is None:
+                ctx = mp.get_context("spawn")
+                store = CANDLE_CACHE.store is not None
+                self._pools = [ProcessPoolExecutor(max_workers=1, mp_context=ctx, initializer=_init_worker, initargs=(store,))
+                               for _ in range(self.workers)]
+            return self._pools
+
+    def close(self):
+        with self.lock:
+            for p in self._pools or []: p.shutdown(cancel_futures=True)
+            self._pools = None
+
+    # 종목 -> 작업 프로세스 번호 (crc32: 프로세스/재시작이 달라도 같은 값)
+    def worker_of(self, ticker):
+        return zlib.crc32(ticker.encode()) % self.workers
+
+    # (프로세스, 이름) 순 정렬 -> 프로세스별 연속 구간 1개씩
+    def _shards(self, tickers):
+        w = [self.worker_of(t) for t in tickers]
+        order = sorted(range(len(tickers)), key=lambda i: (w[i], tickers[i]))
+        ws = np.array([w[i] for i in order], dtype='int64')
+        bounds = np.searchsorted(ws, np.arange(self.workers + 1))
+        return order, [(k, np.arange(bounds[k], bounds[k + 1])) for k in range(self.workers)]
+
+    # inputs: [(ticker, df, ob)] -> [신호 dict] (완료된 샤드 순서대로 progress(done, total))
+    def score(self, inputs, progress=None):
+        inputs = [x for x in inputs if x[1] is not None]
+        if not inputs: return []
+        t0 = time.perf_counter()
+        order, parts = self._shards([x[0] for x in inputs])
+        inputs = [inputs[i] for i in order]
+        meta, blocks = share_arrays(pack_inputs(inputs, self.window))
+        t1 = time.perf_counter()
+        results, done, shard_ms, pids = [], 0, [], set()
+        try:
+            pools = self.pools()
+            futures = [pools[k].submit(_score_shard, meta, int(p[0]), int(p[-1]) + 1, [inputs[i][0] for i in p])
+                       for k, p in parts if len(p)]
+            for f in as_completed(futures):
+                res, n, ms, pid = f.result()
+                results += res; done += n; shard_ms.append(ms); pids.add(pid)
+                if progress: progress(done, len(inputs))
+        finally:
+            for b in blocks:
+                b.close(); b.unlink()
+        t2 = time.perf_counter()
+        with self.lock:
+            self.stats['scans'] += 1; self.stats['tickers'] += len(inputs)
+            self.stats['pack_ms'] = (t1 - t0) * 1000; self.stats['score_ms'] = (t2 - t1) * 1000
+            self.stats['shard_ms'] = shard_ms; self.stats['procs'] = len(pids)
+        return results
+
+
+SHARDED = None
+_sharded_lock = threading.Lock()
+
+def get_sharded_scanner():
+    global SHARDED
+    with _sharded_lock:
+        if SHARDED is None: SHARDED = ShardedScanner(SCAN_PROCS)
+        return SHARDED
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+# -----------------------------------------------------------------------------
+# [상태 저장소] 신호 보관함 / 감시 종목 / 지갑 스냅샷을 SQLite(WAL) 한 파일에 유지
+#  - 재시작해도 그대로 (엔진 시작 시 만료 안 된 신호만 읽어옴, 수 ms)
+#  - signals: 종목당 1행 + found_at / prob 인덱스 -> 1시간 만료는 인덱스 구간 삭제 (전체 순회 없음)
+#  - state: 키-값 (JSON) - monitored_coins, wallet_snapshot
+#  - WAL: 엔진(쓰기)과 화면/다른 프로세스(읽기)가 서로 막지 않음
+#  - 고점(trailing peak)은 기존대로 exit_engine.PeakStore 파일
+#  python state_store.py show | query --ticker KRW-BTC --min-score 90 --since 60 | compact | backup 경로
+# -----------------------------------------------------------------------------
+STATE_DIR = os.getenv("JAVIS_STATE_DIR", ".javis_state")
+STATE_PATH = os.path.join(STATE_DIR, "state.db")
+SIGNAL_TTL = 3600       # 신호 보관 시간 (초)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (ticker TEXT PRIMARY KEY, found_at REAL NOT NULL, prob REAL NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS signals_found_at ON signals (found_at);
+CREATE INDEX IF NOT EXISTS signals_prob ON signals (prob, found_at);
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL);
+"""
+
+
+# 신호 dict <-> JSON (found_time 은 epoch 초로, numpy 값은 파이썬 값으로)
+def _dump(res):
+    d = dict(res)
+    d['found_time'] = res['found_time'].timestamp()
+    return json.dumps(d, ensure_ascii=False, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+def _load(text):
+    d = json.loads(text)
+    d['found_time'] = datetime.fromtimestamp(d['found_time'])
+    return d
+
+
+class StateStore:
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        if path != ":memory:": os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")       # WAL 에서는 커밋 손실 없이 fsync 만 줄임
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock: self.db.close()
+
+    # ----- 신호 -----
+    def put_signal(self, res):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?)",
+                            (res['t'], res['found_time'].timestamp(), float(res['prob']), _dump(res)))
+
+    def remove_signal(self, ticker):
+        with self.lock: self.db.execute("DELETE FROM signals WHERE ticker = ?", (ticker,))
+
+    def clear_signals(self):
+        with self.lock: self.db.execute("DELETE FROM signals")
+
+    # found_at 인덱스로 오래된 신호만 지움 -> 지운 종목 list
+    def expire(self, ttl=SIGNAL_TTL, now=None):
+        cutoff = (time.time() if now is None else now) - ttl
+        with self.lock:
+            return [r[0] for r in self.db.execute("DELETE FROM signals WHERE found_at < ? RETURNING ticker", (cutoff,))]
+
+    # 조회: 종목 / 최소 점수 / 시간 구간 (epoch 초) -> 최신순 신호 dict list
+    def signals(self, ticker=None, min_prob=None, since=None, until=None, limit=None):
+        where, args = [], []
+        if ticker is not None: where.append("ticker IN (?, ?)"); args += [ticker, f"⚠️ {ticker}"]   # 유의 종목 표시 포함
+        if min_prob is not None: where.append("prob >= ?"); args.append(min_prob)
+        if since is not None: where.append("found_at >= ?"); args.append(since)
+        if until is not None: where.append("found_at < ?"); args.append(until)
+        sql = "SELECT data FROM signals" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY found_at DESC"
+        if limit: sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            return [_load(r[0]) for r in self.db.execute(sql, args)]
+
+    def signal_count(self):
+        with self.lock: return self.db.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+
+    # ----- 키-값 -----
+    def set(self, key, value):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?)", (key, json.dumps(value, ensure_ascii=False), time.time()))
+
+    def get(self, key, default=None):
+        with self.lock: row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # ----- 유지보수 -----
+    # WAL 을 본 파일에 합치고 비움 + 빈 페이지 정리 -> 다음 시작 때 읽을 게 본 파일뿐
+    def compact(self):
+        with self.lock:
+            self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.db.execute("VACUUM")
+
+    # 사용 중에도 일관된 사본 (sqlite 온라인 백업)
+    def backup(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        dst = sqlite3.connect(path)
+        try:
+            with self.lock: self.db.backup(dst)
+        finally: dst.close()
+
+
+class SignalBook:
+    """quant_report 와 같은 dict 인터페이스 (메모리 dict + 저장소 동시 기록)
+    저장소 기록이 실패해도 메모리 보관함은 계속 동작 (로그만 남김)"""
+
+    def __init__(self, store, ttl=SIGNAL_TTL):
+        self.store = store
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.data = {}
+        try:
+            store.expire(ttl)
+            self.data = {r['t']: r for r in reversed(store.signals())}
+        except Exception as e: logging.info(f"신호 보관함 읽기 실패: {e}")
+
+    def _write(self, fn, *args):
+        try: return fn(*args)
+        except Exception as e:
+            logging.info(f"신호 보관함 기록 실패: {e}")
+            return None
+
+    def __setitem__(self, t, res):
+        self._write(self.store.put_signal, res)
+        with self.lock: self.data[t] = res
+
+    def pop(self, t, default=None):
+        with self.lock: res = self.data.pop(t, default)
+        self._write(self.store.remove_signal, t)
+        return res
+
+    def clear(self):
+        self._write(self.store.clear_signals)
+        with self.lock: self.data.clear()
+
+    # 만료된 종목 list (core.expire_report 가 사용)
+    def expire(self):
+        gone = self._write(self.store.expire, self.ttl)
+        if gone is None:        # 저장소 실패 -> 메모리에서 직접
+            cutoff = datetime.fromtimestamp(time.time() - self.ttl)
+            gone = [t for t, r in self.items() if r['found_time'] < cutoff]
+        if gone:
+            with self.lock:
+                for t in gone: self.data.pop(t, None)
+        return gone
+
+    # 다른 스레드가 쓰는 중에도 안전한 사본 (엔진 snapshot / 화면용)
+    def snapshot(self):
+        with self.lock: return dict(self.data)
+
+    def __getitem__(self, t): return self.data[t]
+    def __contains__(self, t): return t in self.data
+    def __len__(self): return len(self.data)
+    def __iter__(self):
+        with self.lock: return iter(list(self.data))
+    def get(self, t, default=None): return self.data.get(t, default)
+    def keys(self):
+        with self.lock: return list(self.data)
+    def values(self):
+        with self.lock: return list(self.data.values())
+    def items(self):
+        with self.lock: return list(self.data.items())
+
+
+STATE = None
+_state_lock = threading.Lock()
+
+def get_state_store():
+    global STATE
+    with _state_lock:
+        if STATE is None: STATE = StateStore()
+        return STATE
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--path", default=STATE_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("show")
+    q = sub.add_parser("query")
+    q.add_argument("--ticker")
+    q.add_argument("--min-score", type=float)
+    q.add_argument("--since", type=float, help="최근 N분")
+    q.add_argument("--limit", type=int, default=50)
+    sub.add_parser("compact")
+    b = sub.add_parser("backup")
+    b.add_argument("dest")
+    a = ap.parse_args()
+
+    store = StateStore(a.path)
+    if a.cmd == "show":
+        print(f"{a.path}: 신호 {store.signal_count()}건")
+        for key in ("monitored_coins", "wallet_snapshot"): print(f"{key}: {store.get(key)}")
+    elif a.cmd == "query":
+        since = time.time() - a.since * 60 if a.since else None
+        for r in store.signals(a.ticker, a.min_score, since, limit=a.limit):
+            print(f"{r['found_time']:%m-%d %H:%M:%S}  {r['t']:14s} {r['prob']:5.0f}점  {r['reasons']}")
+    elif a.cmd == "compact":
+        before = os.path.getsize(a.path) + (os.path.getsize(a.path + "-wal") if os.path.exists(a.path + "-wal") else 0)
+        store.compact()
+        print(f"{before:,} -> {os.path.getsize(a.path):,} bytes")
+    else:
+        store.backup(a.dest)
+        print(f"백업: {a.dest}")
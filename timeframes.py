@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+from candle_cache import CANDLE_CACHE, COLS, INTERVAL_SEC, KST_OFFSET
+from indicators import god_arrays, MA_LEN
+
+# -----------------------------------------------------------------------------
+# [멀티 타임프레임] 15분봉 -> 1시간 / 4시간 / 일봉 로컬 재구성 (추가 API 호출 없음)
+#  - 원본: 디스크 저장소(받은 캔들이 계속 쌓임) + 방금 받은 15분봉
+#  - 버킷 경계는 업비트와 동일: 일봉/4시간봉 모두 KST 09:00 기준 (UTC 자정)
+#  - 마지막 버킷은 진행 중인 봉 (업비트 현재 봉과 같은 의미)
+#  - frame(): 빠진 15분봉이 있는 버킷이 하나라도 있으면 None (저장소 이력 구멍 -> 호출자가 API 사용)
+#  - 상위봉 추세: 종가 > MA20 이고 MA20 상승 = +1, 반대 = -1, 애매 = 0, 봉 부족 = None
+#  - JAVIS_MTF=0 이면 점수 필터 끔 (context 는 계속 계산)
+# -----------------------------------------------------------------------------
+SOURCE = "minute15"
+CONFIRM = ("minute60", "minute240")       # 진입 확인용 상위봉
+CONTEXT = CONFIRM + ("day",)
+BOUNDARY_NS = 9 * 3600 * 10**9            # KST 09:00
+MIN_BARS = MA_LEN + 1                     # MA20 + 기울기 1칸
+WINDOW = 100                              # 상위봉 지표 계산 창
+MTF_FILTER = os.getenv("JAVIS_MTF", "1") == "1"
+_NS = 10**9
+
+
+def source_count(interval, bars=MIN_BARS + 5):
+    return bars * INTERVAL_SEC[interval] // INTERVAL_SEC[SOURCE] + 1
+
+
+# ts: int64 ns (KST naive, 오름차순), 나머지: 같은 길이 배열 -> 상위봉 배열 dict
+def resample(ts, o, h, l, c, v, seconds, value=None):
+    ts = np.asarray(ts, dtype='int64')
+    if len(ts) == 0:
+        return {'ts': ts, **{k: np.zeros(0) for k in COLS}}
+    period = seconds * _NS
+    bucket = (ts - BOUNDARY_NS) // period
+    first = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+    last = np.concatenate([first[1:] - 1, [len(ts) - 1]])
+    out = {'ts': bucket[first] * period + BOUNDARY_NS,
+           'open': np.asarray(o, dtype=np.float64)[first],
+           'high': np.maximum.reduceat(np.asarray(h, dtype=np.float64), first),
+           'low': np.minimum.reduceat(np.asarray(l, dtype=np.float64), first),
+           'close': np.asarray(c, dtype=np.float64)[last],
+           'volume': np.add.reduceat(np.asarray(v, dtype=np.float64), first)}
+    out['value'] = np.add.reduceat(np.asarray(value, dtype=np.float64), first) if value is not None else out['close'] * out['volume']
+    out['n'] = last - first + 1          # 버킷별 원본 봉 수 (완전성 검사용)
+    return out
+
+
+def resample_frame(df, interval):
+    r = resample(df.index.values.astype('datetime64[ns]').astype('int64'), df['open'].values, df['high'].values,
+                 df['low'].values, df['close'].values, df['volume'].values, INTERVAL_SEC[interval],
+                 df['value'].values if 'value' in df else None)
+    return pd.DataFrame({k: r[k] for k in COLS}, index=pd.DatetimeIndex(r['ts'].astype('datetime64[ns]')))
+
+
+def trend(close, ma_len=MA_LEN):
+    c = np.asarray(close, dtype=np.float64)
+    if len(c) < ma_len + 1: return None
+    ma, ma_prev = c[-ma_len:].mean(), c[-ma_len - 1:-1].mean()
+    if c[-1] > ma and ma >= ma_prev: return 1
+    if c[-1] < ma and ma < ma_prev: return -1
+    return 0
+
+
+class MultiTimeframe:
+    def __init__(self, cache=CANDLE_CACHE, intervals=CONTEXT, confirm=CONFIRM):
+        self.cache = cache
+        self.intervals = intervals
+        self.confirm = confirm
+        self.need = max(source_count(i) for i in intervals)
+        self.memo = {}          # ticker -> ((원본 마지막 ts, 개수, 종가), context)
+        self.lock = threading.Lock()
+
+    # 저장소 이력 + (저장 전일 수 있는) 방금 받은 15분봉 -> 원본 배열
+    def _source(self, ticker, df=None, count=None):
+        count = count or self.need
+        ts, cols = np.zeros(0, dtype='int64'), {k: np.zeros(0) for k in COLS}
+        store = self.cache.store
+        if store is not None:
+            try: ts, cols = store.read(ticker, SOURCE, count=count)
+            except Exception: pass
+        if df is not None and len(df):
+            dts = df.index.values.astype('datetime64[ns]').astype('int64')
+            if len(ts) == 0 or dts[-1] >= ts[-1]:
+                keep = ts < dts[0]
+                ts = np.concatenate([ts[keep], dts])[-count:]
+                cols = {k: np.concatenate([np.asarray(cols[k])[keep],
+                                           df[k].to_numpy(dtype=np.float64) if k in df else df['close'].to_numpy() * df['volume'].to_numpy()])[-count:]
+                        for k in COLS}
+        return ts, cols
+
+    def bars(self, ticker, interval, df=None, count=None):
+        # 1봉 여유 -> 원본 시작이 버킷 중간이어도 잘린 첫 버킷은 count 밖으로 밀려남
+        ts, cols = self._source(ticker, df, source_count(interval, count + 1) if count else None)
+        r = resample(ts, cols['open'], cols['high'], cols['low'], cols['close'], cols['volume'],
+                     INTERVAL_SEC[interval], cols['value'])
+        if count: r = {k: a[-count:] for k, a in r.items()}
+        return r
+
+    # 버킷이 연속이고 (빠진 상위봉 없음) 각 버킷의 15분봉이 다 있는지 (마지막 버킷은 지금까지 분량)
+    def complete(self, r, interval, last_ts=None):
+        period, step = INTERVAL_SEC[interval] * _NS, INTERVAL_SEC[SOURCE] * _NS
+        if len(r['ts']) == 0: return False
+        if np.any(np.diff(r['ts']) != period): return False
+        if np.any(r['n'][:-1] != period // step): return False
+        return last_ts is None or r['n'][-1] == (last_ts - r['ts'][-1]) // step + 1
+
+    # 로컬 상위봉 DataFrame (max_stale 초보다 오래된 원본이면 None -> 호출자가 API 사용)
+    #  이력에 구멍이 있으면(빠진 15분봉 / 빠진 상위봉) None -> 틀린 시고저종 대신 API 사용
+    def frame(self, ticker, interval, count=MIN_BARS, max_stale=None):
+        r = self.bars(ticker, interval, count=count)
+        if len(r['ts']) < count: return None
+        ts, cols = self._source(ticker, count=1)
+        if len(ts) == 0 or not self.complete(r, interval, int(ts[-1])): return None
+        if max_stale is not None and (len(ts) == 0 or time.time() - (ts[-1] / _NS - KST_OFFSET) > max_stale): return None
+        return pd.DataFrame({k: r[k] for k in COLS}, index=pd.DatetimeIndex(r['ts'].astype('datetime64[ns]')))
+
+    # 종목 상위봉 요약: {interval: {trend, rsi, close, ma20, bars}, 'against': bool, 'aligned': bool}
+    def context(self, ticker, df=None):
+        ts, cols = self._source(ticker, df)
+        key = (int(ts[-1]) if len(ts) else 0, len(ts), float(cols['close'][-1]) if len(ts) else 0.0)
+        with self.lock:
+            m = self.memo.get(ticker)
+            if m and m[0] == key: return m[1]
+        ctx = {}
+        for iv in self.intervals:
+            r = resample(ts, cols['open'], cols['high'], cols['low'], cols['close'], cols['volume'],
+                         INTERVAL_SEC[iv], cols['value'])
+            n = len(r['ts'])
+            if n < MIN_BARS:
+                ctx[iv] = {'trend': None, 'bars': n}
+                continue
+            w = slice(-WINDOW, None)       # 마지막 값만 쓰므로 15분봉과 같은 창 길이로 계산
+            g = god_arrays(r['open'][w], r['high'][w], r['low'][w], r['close'][w], r['volume'][w])
+            ctx[iv] = {'trend': trend(r['close']), 'bars': n, 'close': float(r['close'][-1]),
+                       'ma20': float(g['ma20'][0]), 'rsi': float(g['rsi'][0, -1]), 'mfi': float(g['mfi'][0, -1])}
+        known = [ctx[iv]['trend'] for iv in self.confirm if ctx[iv]['trend'] is not None]
+        ctx['against'] = any(t < 0 for t in known)
+        ctx['aligned'] = bool(known) and all(t > 0 for t in known)
+        with self.lock: self.memo[ticker] = (key, ctx)
+        return ctx
+
+    def retain(self, tickers):
+        keep = set(tickers)
+        with self.lock:
+            for t in [t for t in self.memo if t not in keep]: del self.memo[t]
+
+
+MTF = MultiTimeframe()
@@ -0,0 +1,267 @@
+import os
+import gzip
+import json
+import time
+import uuid
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyupbit
+
+from request_scheduler import SCHEDULER
+from ratelimit import UPBIT_LIMITS, get_bucket
+
+# -----------------------------------------------------------------------------
+# [픽스처] 업비트 응답 녹화 / 재생 (오프라인 벤치용)
+#  python upbit_fixtures.py record                 # 실제 API 에서 녹화 (종목목록/시세/호가/15분봉/잔고)
+#  python upbit_fixtures.py record --synthetic 200 # 네트워크 없이 가짜 시장 생성
+#  - FixtureUpbit: pyupbit 함수와 같은 모양으로 녹화본을 돌려줌
+#    size 를 주면 녹화 종목을 복제해서 10 ~ 1,000 종목 시장을 만듦 (KRW-BTC.1 ...)
+#  - install(): 시세/호가/캔들/종목목록 서비스의 fetcher + 주문 클라이언트를 재생본으로 교체,
+#    요청 제한 해제 (순수 계산 시간만 측정)
+# -----------------------------------------------------------------------------
+FIXTURE_DIR = os.path.join(os.getenv("JAVIS_STATE_DIR", ".javis_state"), "fixtures")
+DEFAULT_FIXTURE = os.path.join(FIXTURE_DIR, "upbit.json.gz")
+COLS = ('open', 'high', 'low', 'close', 'volume', 'value')   # pyupbit.get_ohlcv 열 그대로
+CANDLES = 200
+
+
+def save(fx, path=DEFAULT_FIXTURE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f: json.dump(fx, f, ensure_ascii=False)
+    return path
+
+
+def load(path=DEFAULT_FIXTURE):
+    with gzip.open(path, "rt", encoding="utf-8") as f: return json.load(f)
+
+
+def _pack_frame(df):
+    out = {'ts': df.index.values.astype('datetime64[ns]').astype('int64').tolist()}
+    if 'value' not in df: df = df.assign(value=df['close'] * df['volume'])
+    for c in COLS: out[c] = df[c].astype(float).tolist()
+    return out
+
+
+def _unpack_frame(d):
+    return pd.DataFrame({c: np.asarray(d[c], dtype=np.float64) for c in COLS},
+                        index=pd.DatetimeIndex(np.asarray(d['ts'], dtype='int64').astype('datetime64[ns]')))
+
+
+# ----- 녹화 -----
+def record(limit=None, interval="minute15", count=CANDLES):
+    markets = SCHEDULER.call('market', pyupbit.get_market_all, is_details=True)
+    tickers = [m['market'] for m in markets if m['market'].startswith("KRW-")][:limit]
+    quotes = []
+    for i in range(0, len(tickers), 100):
+        quotes += SCHEDULER.call('ticker', pyupbit.get_current_price, tickers[i:i + 100], verbose=True)
+    books = []
+    for i in range(0, len(tickers), 15):
+        res = SCHEDULER.call('orderbook', pyupbit.get_orderbook, tickers[i:i + 15])
+        books += res if isinstance(res, list) else [res]
+    candles = {}
+    for k, t in enumerate(tickers):
+        df = SCHEDULER.call('candle', pyupbit.get_ohlcv, t, interval=interval, count=count)
+        if df is not None and len(df): candles[t] = _pack_frame(df)
+        if (k + 1) % 50 == 0: logging.info(f"캔들 {k + 1}/{len(tickers)}")
+    balances = []
+    try:
+        import core
+        if core.access_key: balances = core.exchange().get_balances()
+    except Exception as e: logging.info(f"잔고 녹화 건너뜀: {e}")
+    return {'recorded_at': time.time(), 'source': 'upbit', 'interval': interval,
+            'markets': [m for m in markets if m['market'] in set(tickers)],
+            'tickers': quotes, 'orderbooks': books, 'candles': candles, 'balances': balances}
+
+
+def synthetic(n=200, bars=CANDLES, seed=0):
+    from backtest import synthetic_frames
+    rng = np.random.default_rng(seed)
+    frames = synthetic_frames(n, bars, seed=seed)
+    markets, quotes, books, candles = [], [], [], {}
+    for t, df in frames.items():
+        c = df['close'].to_numpy()
+        day = df.iloc[-96:]
+        markets.append({'market': t, 'korean_name': t[4:], 'english_name': t[4:],
+                        'market_warning': 'CAUTION' if rng.random() < 0.05 else 'NONE'})
+        quotes.append({'market': t, 'trade_price': c[-1], 'high_price': day['high'].max(), 'low_price': day['low'].min(),
+                       'signed_change_rate': c[-1] / day['open'].iloc[0] - 1,
+                       'acc_trade_price_24h': float((day['close'] * day['volume']).sum()) * rng.uniform(0.01, 2)})
+        units = [{'ask_price': c[-1] * (1 + 0.001 * (k + 1)), 'bid_price': c[-1] * (1 - 0.001 * (k + 1)),
+                  'ask_size': rng.lognormal(3, 1), 'bid_size': rng.lognormal(3, 1)} for k in range(15)]
+        books.append({'market': t, 'timestamp': int(time.time() * 1000), 'orderbook_units': units,
+                      'total_ask_size': sum(u['ask_size'] for u in units), 'total_bid_size': sum(u['bid_size'] for u in units)})
+        candles[t] = _pack_frame(df)
+    balances = [{'currency': 'KRW', 'balance': '1000000', 'locked': '0', 'avg_buy_price': '0', 'unit_currency': 'KRW'}]
+    return {'recorded_at': time.time(), 'source': 'synthetic', 'interval': 'minute15', 'markets': markets,
+            'tickers': quotes, 'orderbooks': books, 'candles': candles, 'balances': balances}
+
+
+# ----- 재생 -----
+class FixtureUpbit:
+    """녹화본을 pyupbit 함수 모양으로 돌려줌 (size: 복제해서 만들 시장 크기)"""
+
+    def __init__(self, fx, size=None, latency=0.0):
+        self.fx = fx
+        self.latency = latency
+        self.interval = fx.get('interval', 'minute15')
+        base = [t for t in fx['candles']]
+        size = size or len(base)
+        # 복제 종목 -> 원본 종목
+        self.alias = {}
+        for k in range(size):
+            t, rep = base[k % len(base)], k // len(base)
+            self.alias[t if rep == 0 else f"{t}.{rep}"] = t
+        self.universe = list(self.alias)
+        self._markets = {m['market']: m for m in fx['markets']}
+        self._quotes = {q['market']: q for q in fx['tickers']}
+        self._books = {b['market']: b for b in fx['orderbooks']}
+        self._frames = {t: _unpack_frame(d) for t, d in fx['candles'].items()}
+        self.calls = {'market': 0, 'ticker': 0, 'orderbook': 0, 'candle': 0}
+        self.bar = None         # 재생 시계 (None = 녹화 시점 그대로)
+
+    # bar 번째 캔들까지만 보이게 -> 시세/호가도 그 시점 종가 기준으로 다시 만듦 (모의투자 재생)
+    def seek(self, bar):
+        self.bar = bar
+
+    @property
+    def bars(self):
+        return min(len(df) for df in self._frames.values())
+
+    def _wait(self):
+        if self.latency: time.sleep(self.latency)
+
+    def _row(self, table, t):
+        row = table.get(self.alias.get(t, t))
+        return None if row is None else {**row, 'market': t}
+
+    def _quote_at(self, t):
+        df = self._frames.get(self.alias.get(t, t))
+        if df is None: return None
+        day = df.iloc[max(0, self.bar - 96):self.bar]
+        c = float(day['close'].iloc[-1])
+        return {'market': t, 'trade_price': c, 'high_price': float(day['high'].max()), 'low_price': float(day['low'].min()),
+                'signed_change_rate': c / float(day['open'].iloc[0]) - 1, 'acc_trade_price_24h': float(day['value'].sum())}
+
+    def _book_at(self, t):
+        ob, q = self._row(self._books, t), self._quote_at(t)
+        if ob is None or q is None: return ob
+        k = q['trade_price'] / self._quotes[self.alias.get(t, t)]['trade_price']
+        units = [{**u, 'ask_price': u['ask_price'] * k, 'bid_price': u['bid_price'] * k} for u in ob['orderbook_units']]
+        return {**ob, 'orderbook_units': units}
+
+    def get_market_all(self, is_details=False):
+        self.calls['market'] += 1; self._wait()
+        return [self._row(self._markets, t) or {'market': t} for t in self.universe]
+
+    def get_current_price(self, tickers, verbose=False):
+        self.calls['ticker'] += 1; self._wait()
+        if isinstance(tickers, str): tickers = [tickers]
+        rows = [r for r in (self._row(self._quotes, t) if self.bar is None else self._quote_at(t) for t in tickers) if r]
+        return rows if verbose else {r['market']: r['trade_price'] for r in rows}
+
+    def get_orderbook(self, tickers):
+        self.calls['orderbook'] += 1; self._wait()
+        if isinstance(tickers, str): tickers = [tickers]
+        return [r for r in (self._row(self._books, t) if self.bar is None else self._book_at(t) for t in tickers) if r]
+
+    def get_ohlcv(self, ticker, interval="day", count=200, to=None):
+        self.calls['candle'] += 1; self._wait()
+        df = self._frames.get(self.alias.get(ticker, ticker))
+        if df is None or interval != self.interval: return None
+        if self.bar is not None: df = df.iloc[:self.bar]
+        return df.tail(count).copy()
+
+
+class FixtureClient:
+    """ExchangeClient 대신 녹화 잔고 + 즉시 체결 주문"""
+
+    def __init__(self, balances):
+        self.balances = balances
+        self.orders = []
+
+    def get_balances(self): return [dict(b) for b in self.balances]
+
+    def get_balance(self, ticker="KRW"):
+        cur = ticker.split('-')[-1]
+        return next((float(b['balance']) for b in self.balances if b['currency'] == cur), 0)
+
+    def _order(self, **kw):
+        res = {'uuid': str(uuid.uuid4()), 'state': 'done', **kw}
+        self.orders.append(res)
+        return res
+
+    def buy_market_order(self, ticker, price): return self._order(market=ticker, side='bid', price=price)
+    def sell_market_order(self, ticker, volume): return self._order(market=ticker, side='ask', volume=volume)
+    def get_order(self, order_uuid): return {'uuid': order_uuid, 'state': 'done'}
+
+
+def fixture_balances(fx, replay, holdings):
+    # 녹화 잔고는 원화만 쓰고, 보유 종목은 재생 시장에서 holdings 개 만듦 (자산 조회 규모 맞추기)
+    out = [b for b in fx['balances'] if b['currency'] == 'KRW'] or \
+          [{'currency': 'KRW', 'balance': '1000000', 'locked': '0', 'avg_buy_price': '0', 'unit_currency': 'KRW'}]
+    quotes = replay.get_current_price(replay.universe[:holdings], verbose=True)
+    for k, q in enumerate(quotes):
+        p = q['trade_price']
+        out.append({'currency': q['market'][4:], 'balance': str(20000 / p), 'locked': '0',
+                    'avg_buy_price': str(p * (0.96 + 0.01 * (k % 8))), 'unit_currency': 'KRW'})
+    return out
+
+
+def install(replay, holdings=10, client=None):
+    """전역 서비스들을 재생본으로 교체 -> 이후 core 함수는 네트워크 없이 동작 (client: 주문 클라이언트 지정)"""
+    import exchange
+    from candle_cache import CANDLE_CACHE
+    from quotes import QUOTES
+    from orderbook import ORDERBOOKS
+    from market_meta import MARKET_META
+    CANDLE_CACHE.fetcher = replay.get_ohlcv
+    CANDLE_CACHE.store = None
+    QUOTES.fetcher = lambda ts: replay.get_current_price(ts, verbose=True)
+    ORDERBOOKS.fetcher = replay.get_orderbook
+    MARKET_META.fetcher = lambda: replay.get_market_all(is_details=True)
+    MARKET_META.refresh()
+    client = client or FixtureClient(fixture_balances(replay.fx, replay, holdings))
+    exchange.EXECUTOR = exchange.OrderExecutor(client)
+    for g in list(UPBIT_LIMITS) + ['market']:
+        b = get_bucket(g)
+        b.rate = b.capacity = b.tokens = 1e9
+    return client
+
+
+def reset_quotes():
+    from quotes import QUOTES
+    from orderbook import ORDERBOOKS
+    with QUOTES.lock: QUOTES.rows.clear()
+    with ORDERBOOKS.lock: ORDERBOOKS.books.clear()
+
+
+def reset_caches():
+    from candle_cache import CANDLE_CACHE
+    from indicators import INDICATOR_BANK
+    with CANDLE_CACHE.lock: CANDLE_CACHE.rings.clear(); CANDLE_CACHE.fetched_at.clear()
+    reset_quotes()
+    INDICATOR_BANK.retain([])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("record")
+    r.add_argument("--out", default=DEFAULT_FIXTURE)
+    r.add_argument("--limit", type=int)
+    r.add_argument("--synthetic", type=int, default=0)
+    i = sub.add_parser("info")
+    i.add_argument("path", nargs="?", default=DEFAULT_FIXTURE)
+    a = ap.parse_args()
+
+    if a.cmd == "record":
+        fx = synthetic(a.synthetic) if a.synthetic else record(a.limit)
+        print(f"{save(fx, a.out)}: {len(fx['candles'])}종목 ({fx['source']})")
+    else:
+        fx = load(a.path)
+        print(f"{fx['source']} / {time.strftime('%Y-%m-%d %H:%M', time.localtime(fx['recorded_at']))} / "
+              f"종목 {len(fx['candles'])} / 호가 {len(fx['orderbooks'])} / 잔고 {len(fx['balances'])}")